@@ -0,0 +1,224 @@
+"""Offline benchmarks for the easy_inspect hot paths.
+
+All model calls go to inspect_ai's `mockllm` model, so no network access or API keys
+are needed. Results are written as JSON, to compare runs between commits:
+
+    python benchmarks/run.py --output benchmarks/results/$(git rev-parse --short HEAD).json
+    python benchmarks/run.py --quick  # smaller sizes, for a smoke test
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from copy import deepcopy
+from datetime import datetime, timezone
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any, Callable
+
+# Keep inspect_ai's progress display out of the timings
+os.environ.setdefault("INSPECT_DISPLAY", "none")
+
+import yaml
+
+from inspect_ai.log import read_eval_log, write_eval_log
+
+from easy_inspect import loading
+from easy_inspect.bootstrap import bootstrap_ci
+from easy_inspect.loading import load_question_from_yaml_dir
+from easy_inspect.question import Question, QuestionConfig
+from easy_inspect.runner import Runner
+
+MODEL = "mockllm/model"
+
+Result = dict[str, Any]
+
+def timeit(fn: Callable[[], Any], repeat: int) -> dict[str, float]:
+    """Time `fn` over `repeat` calls, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "median": statistics.median(times)}
+
+def make_config(id: str, paraphrases: int = 3, samples_per_paraphrase: int = 10) -> dict:
+    return {
+        "id": id,
+        "type": "free_form",
+        "paraphrases": [f"Paraphrase {i} of question {id}?" for i in range(paraphrases)],
+        "samples_per_paraphrase": samples_per_paraphrase,
+        "tags": ["benchmark"],
+    }
+
+def bench_load_yaml_dir(tmp_dir: Path, files: int, questions_per_file: int, repeat: int) -> Result:
+    """Look up every question of a large directory of YAML files."""
+    for i in range(files):
+        configs = [make_config(f"q_{i}_{j}") for j in range(questions_per_file)]
+        with open(tmp_dir / f"questions_{i}.yaml", "w") as f:
+            yaml.safe_dump(configs, f)
+    ids = [f"q_{i}_{j}" for i in range(files) for j in range(questions_per_file)]
+
+    def first_lookup():
+        loading._registries.clear()
+        load_question_from_yaml_dir(ids[-1], tmp_dir)
+
+    def all_lookups():
+        for id in ids:
+            load_question_from_yaml_dir(id, tmp_dir)
+
+    first_lookup()
+    return {
+        "files": files,
+        "questions": len(ids),
+        "first_lookup_seconds": timeit(first_lookup, repeat),
+        "all_lookups_seconds": timeit(all_lookups, repeat),
+    }
+
+def bench_build_dataset(samples_per_paraphrase: int, repeat: int) -> Result:
+    """Build the dataset of a question with many samples per paraphrase."""
+    question = Question(QuestionConfig(**make_config("dataset", samples_per_paraphrase=samples_per_paraphrase)))
+    return {
+        "samples": len(question.build_dataset()),
+        "seconds": timeit(question.build_dataset, repeat),
+    }
+
+def bench_log_size(tmp_dir: Path, samples: int, repeat: int) -> Result:
+    """Size of the log, and memory of the dataset, of a judged question with long judge prompts."""
+    judge_prompts = {f"criterion_{i}": f"Rate the answer on criterion {i}. " * 100 for i in range(3)}
+    question = Question(QuestionConfig(
+        id="log_size",
+        type="free_form_judge_0_100",
+        paraphrases=["What is 2+2?"],
+        samples_per_paraphrase=samples,
+        judge_models=MODEL,
+        judge_prompts=judge_prompts,
+    ))
+
+    def resolve_dataset():
+        # inspect_ai deep copies every sample of the dataset when a task starts
+        return [deepcopy(sample) for sample in question.build_dataset()]
+
+    tracemalloc.start()
+    resolve_dataset()
+    _, dataset_peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    runner = Runner(log_dir=tmp_dir).with_question(question).with_models([MODEL])
+    runner.run()
+    return {
+        "samples": samples,
+        "log_bytes": runner.get_log_path(MODEL).stat().st_size,
+        "dataset_peak_bytes": dataset_peak_bytes,
+        "resolve_dataset_seconds": timeit(resolve_dataset, repeat),
+    }
+
+def bench_runner_overhead(tmp_dir: Path, samples: int, repeat: int) -> Result:
+    """End-to-end `Runner.run` time per sample, and the time to skip a cached run."""
+    question = Question(QuestionConfig(**make_config("runner", paraphrases=1, samples_per_paraphrase=samples)))
+    runner = Runner(log_dir=tmp_dir).with_question(question).with_models([MODEL])
+
+    run = timeit(lambda: runner.run(force=True), repeat)
+    cached = timeit(runner.run, repeat)
+    return {
+        "samples": samples,
+        "run_seconds": run,
+        "run_seconds_per_sample": {key: value / samples for key, value in run.items()},
+        "cached_run_seconds": cached,
+    }
+
+def bench_load_logs(tmp_dir: Path, logs: int, samples: int, repeat: int) -> Result:
+    """Load and parse the results of hundreds of cached logs."""
+    questions = [
+        Question(QuestionConfig(**make_config(f"logs_{i}", paraphrases=1, samples_per_paraphrase=samples)))
+        for i in range(logs)
+    ]
+    runner = Runner(log_dir=tmp_dir).with_questions(questions[:1]).with_models([MODEL])
+    runner.run()
+    template = read_eval_log(str(runner.get_log_path(MODEL)))
+
+    # Clone the log for each question, rather than running hundreds of evals
+    for question in questions[1:]:
+        template.eval.task = question.config.id
+        template.eval.metadata = {**template.eval.metadata, "question_hash": question.hash()}
+        write_eval_log(template, str(runner.get_log_path(MODEL, question)), format="eval")
+    runner.with_questions(questions)
+
+    return {
+        "logs": logs,
+        "samples_per_log": samples,
+        "load_logs_seconds": timeit(runner.load_logs, repeat),
+        "parse_results_seconds": timeit(lambda: runner.parse_results(runner.load_logs()), repeat),
+        "load_results_seconds": timeit(runner.load_results, repeat),
+    }
+
+def bench_bootstrap(samples: int, n_resamples: int, repeat: int) -> Result:
+    """Bootstrap confidence intervals over many (question, model, score) groups."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "question_id": rng.integers(0, 50, samples).astype(str),
+        "model": rng.integers(0, 5, samples).astype(str),
+        "paraphrase_index": rng.integers(0, 5, samples),
+        "ethics": rng.random(samples),
+        "harm": rng.random(samples),
+    })
+    return {
+        "samples": samples,
+        "n_resamples": n_resamples,
+        "samples_seconds": timeit(lambda: bootstrap_ci(df, n_resamples=n_resamples, cluster=None), repeat),
+        "clusters_seconds": timeit(lambda: bootstrap_ci(df, n_resamples=n_resamples), repeat),
+    }
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="Run with small sizes")
+    args = parser.parse_args()
+
+    scale = 10 if args.quick else 1
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "inspect_ai": version("inspect_ai"),
+        "benchmarks": {},
+    }
+    benchmarks = {
+        "load_yaml_dir": lambda tmp_dir: bench_load_yaml_dir(tmp_dir, 200 // scale, 25, args.repeat),
+        "build_dataset": lambda tmp_dir: bench_build_dataset(10_000 // scale, args.repeat),
+        "log_size": lambda tmp_dir: bench_log_size(tmp_dir, 2000 // scale, args.repeat),
+        "runner_overhead": lambda tmp_dir: bench_runner_overhead(tmp_dir, 500 // scale, args.repeat),
+        "load_logs": lambda tmp_dir: bench_load_logs(tmp_dir, 300 // scale, 20, args.repeat),
+        "bootstrap": lambda tmp_dir: bench_bootstrap(100_000 // scale, 1000, args.repeat),
+    }
+    for name, benchmark in benchmarks.items():
+        print(f"Running {name}...")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results["benchmarks"][name] = benchmark(Path(tmp_dir))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
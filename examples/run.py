@@ -1,3 +1,5 @@
+import argparse
+
 from pathlib import Path
 from easy_inspect import Runner
 from easy_inspect.loading import load_question_from_yaml_dir
@@ -12,6 +14,11 @@ load_dotenv(curr_dir / ".env")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shard", help="Only run shard i/N of the question x model grid, e.g. 0/4")
+    parser.add_argument("--claim", action="store_true", help="Share the grid with other workers through claim files")
+    args = parser.parse_args()
+
     models = [
         # OpenAI models
         "openai/gpt-4o-mini-2024-07-18",
@@ -24,19 +31,24 @@ if __name__ == "__main__":
 
     runner = Runner(log_dir=curr_dir / "logs")
 
+    # Run both example questions together in a single sweep
     # Example 1: Free-form question
-    question = load_question_from_yaml_dir("example_1", curr_dir)
-    runner.with_question(question).with_models(models).run()
-    df = runner.load_results()
-    print(df)
-
     # Example 2: Free-form question, judged on 0-100 scale
-    question = load_question_from_yaml_dir("example_2", curr_dir)
-    runner.with_question(question).with_models(models).run()
+    questions = [
+        load_question_from_yaml_dir("example_1", curr_dir),
+        load_question_from_yaml_dir("example_2", curr_dir),
+    ]
+    runner.with_questions(questions).with_models(models).run(shard=args.shard, claim=args.claim)
+    missing = runner.verify()
+    if not missing.empty:
+        print(f"Missing cells (run by other workers, or failed):\n{missing}")
     df = runner.load_results()
     print(df)
 
+    # Keep the judged question for plotting, with bootstrap confidence intervals over paraphrases
+    df = runner.bootstrap_results()
+    df = df[df["question_id"] == "example_2"]
+
     # Plot the results
-    # TODO: support error bars
     models_plot(df, metric="ethical_reasoning/mean")
     models_plot(df, metric="harm_consideration/mean")
@@ -1,4 +1,17 @@
-from .question import Question
-from .runner import Runner
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .question import Question
+    from .runner import Runner
 
 __all__ = ["Question", "Runner"]
+
+def __getattr__(name: str):
+    # Import lazily, so `import easy_inspect` doesn't load inspect_ai and pandas
+    if name == "Question":
+        from .question import Question
+        return Question
+    if name == "Runner":
+        from .runner import Runner
+        return Runner
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,90 @@
+import math
+import statistics
+
+from collections import defaultdict
+from typing import Any, Iterable
+
+from inspect_ai.log import EvalLog
+
+from easy_inspect.question import DEFAULT_MIN_SAMPLES_PER_PARAPHRASE, QuestionConfig
+from easy_inspect.results import SampleRow, get_sample_row, get_scorer_names
+
+# z-score of a two-sided 95% confidence interval
+Z_95 = 1.96
+
+ParaphraseStats = dict[str, Any]
+
+def get_paraphrase_stats(rows: Iterable[SampleRow], score_columns: list[str]) -> list[ParaphraseStats]:
+    """Sample count, and mean, stderr and 95% CI of each score, per paraphrase.
+
+    Samples without a score (e.g. the judge answer couldn't be parsed) count in `n`
+    but not in the statistics of that score.
+    """
+    rows_by_paraphrase: dict[int, list[SampleRow]] = defaultdict(list)
+    for row in rows:
+        rows_by_paraphrase[row["paraphrase_index"]].append(row)
+
+    paraphrase_stats = []
+    for paraphrase_index, paraphrase_rows in sorted(rows_by_paraphrase.items()):
+        stats = {"paraphrase_index": paraphrase_index, "n": len(paraphrase_rows)}
+        for column in score_columns:
+            values = [row[column] for row in paraphrase_rows if row.get(column) is not None]
+            values = [value for value in values if not math.isnan(value)]
+            mean = statistics.fmean(values) if values else None
+            stderr = statistics.stdev(values) / math.sqrt(len(values)) if len(values) > 1 else None
+            stats[f"{column}/mean"] = mean
+            stats[f"{column}/stderr"] = stderr
+            stats[f"{column}/ci_low"] = mean - Z_95 * stderr if stderr is not None else None
+            stats[f"{column}/ci_high"] = mean + Z_95 * stderr if stderr is not None else None
+        paraphrase_stats.append(stats)
+    return paraphrase_stats
+
+def get_target_stderr(config: QuestionConfig) -> float:
+    """The stderr at which sampling a paraphrase stops, from the stderr or CI width target."""
+    targets = [config.target_stderr, config.target_ci_width and config.target_ci_width / (2 * Z_95)]
+    return min(target for target in targets if target is not None)
+
+def get_min_samples(config: QuestionConfig) -> int:
+    """Samples per paraphrase of the first wave."""
+    if config.min_samples_per_paraphrase is not None:
+        return config.min_samples_per_paraphrase
+    return min(DEFAULT_MIN_SAMPLES_PER_PARAPHRASE, config.samples_per_paraphrase)
+
+def is_converged(stats: ParaphraseStats, score_columns: list[str], config: QuestionConfig) -> bool:
+    """Whether every score of a paraphrase reached the target precision."""
+    target = get_target_stderr(config)
+    stderrs = [stats.get(f"{column}/stderr") for column in score_columns]
+    return stats["n"] >= get_min_samples(config) and all(
+        stderr is not None and stderr <= target for stderr in stderrs
+    )
+
+def get_next_sample_count(stats: ParaphraseStats, score_columns: list[str], config: QuestionConfig) -> int:
+    """Total samples a paraphrase should have after the next wave.
+
+    The stderr shrinks as 1/sqrt(n), so the sample count expected to reach the
+    target is n * (stderr / target)^2. Early stderr estimates are noisy, so each
+    wave at most doubles the samples, and never goes past `samples_per_paraphrase`.
+    """
+    n = stats["n"]
+    if n >= config.samples_per_paraphrase or is_converged(stats, score_columns, config):
+        return n
+
+    target = get_target_stderr(config)
+    min_samples = get_min_samples(config)
+    stderrs = [stats.get(f"{column}/stderr") for column in score_columns]
+    if any(stderr is None for stderr in stderrs):
+        # Not enough scores to estimate the stderr yet
+        needed = 2 * n
+    else:
+        needed = math.ceil(n * (max(stderrs) / target) ** 2)
+    return min(max(needed, n + 1, min_samples), max(2 * n, min_samples), config.samples_per_paraphrase)
+
+def add_paraphrase_stats(log: EvalLog, config: QuestionConfig) -> None:
+    """Record the achieved sample count and precision of each paraphrase in the log metadata."""
+    scorer_names = get_scorer_names(log)
+    rows = [get_sample_row(log, sample, scorer_names) for sample in log.samples or [] if sample.error is None]
+    score_columns = list(config.judge_prompts)
+    paraphrase_stats = get_paraphrase_stats(rows, score_columns)
+    for stats in paraphrase_stats:
+        stats["converged"] = is_converged(stats, score_columns, config)
+    log.eval.metadata = {**(log.eval.metadata or {}), "paraphrase_stats": paraphrase_stats}
@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Literal
+
+BatchStatus = Literal["running", "completed", "failed"]
+
+# How often to check on submitted batches, in seconds
+DEFAULT_POLL_INTERVAL = 60.0
+
+@dataclass
+class BatchRequest:
+    """A single chat completion request of a batch job."""
+
+    # Identifies the request in the results, e.g. the sample id or judge cache key
+    custom_id: str
+    # Chat messages as {"role": ..., "content": ...} dicts
+    messages: list[dict[str, str]]
+    # Generation options, e.g. {"temperature": 1.0, "max_tokens": 100}
+    config: dict[str, Any] = field(default_factory=dict)
+
+class BatchBackend(ABC):
+    """Submit/poll layer of a provider batch API.
+
+    A batch holds the requests to a single model. Results map each request's
+    `custom_id` to the completion, or to None if the request failed.
+    """
+
+    @abstractmethod
+    def submit(self, model: str, requests: list[BatchRequest]) -> str:
+        """Submit a batch, returning its id."""
+
+    @abstractmethod
+    def status(self, batch_id: str) -> BatchStatus:
+        """Status of a submitted batch."""
+
+    @abstractmethod
+    def results(self, batch_id: str) -> dict[str, str | None]:
+        """Completions of a completed batch, by custom id."""
+
+class LocalBatchBackend(BatchBackend):
+    """File-based stand-in for a provider batch service.
+
+    Batches are directories under `root` holding the requests and, once processed,
+    the results. A batch is processed the first time it is polled, by calling
+    `respond` on each request; by default the requests are sent to the model through
+    inspect_ai. Useful for tests, and to run batch-mode jobs against any model.
+    """
+
+    def __init__(self, root: str | Path, respond: Callable[[str, BatchRequest], str | None] | None = None):
+        self.root = Path(root)
+        self.respond = respond
+
+    def submit(self, model: str, requests: list[BatchRequest]) -> str:
+        batch_id = uuid.uuid4().hex
+        batch_dir = self.root / batch_id
+        batch_dir.mkdir(parents=True)
+        with open(batch_dir / "requests.jsonl", "w") as f:
+            for request in requests:
+                f.write(json.dumps({"model": model, **asdict(request)}) + "\n")
+        return batch_id
+
+    def status(self, batch_id: str) -> BatchStatus:
+        batch_dir = self.root / batch_id
+        if not (batch_dir / "results.jsonl").exists():
+            self._process(batch_dir)
+        return "completed"
+
+    def results(self, batch_id: str) -> dict[str, str | None]:
+        with open(self.root / batch_id / "results.jsonl") as f:
+            return {row["custom_id"]: row["completion"] for row in map(json.loads, f)}
+
+    def _process(self, batch_dir: Path) -> None:
+        with open(batch_dir / "requests.jsonl") as f:
+            rows = [json.loads(line) for line in f]
+        requests = [BatchRequest(row["custom_id"], row["messages"], row["config"]) for row in rows]
+        model = rows[0]["model"] if rows else ""
+        if self.respond is not None:
+            completions = [self.respond(model, request) for request in requests]
+        else:
+            completions = asyncio.run(_generate_all(model, requests))
+
+        tmp_path = batch_dir / f".results.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            for request, completion in zip(requests, completions):
+                f.write(json.dumps({"custom_id": request.custom_id, "completion": completion}) + "\n")
+        os.replace(tmp_path, batch_dir / "results.jsonl")
+
+async def _generate_all(model: str, requests: list[BatchRequest]) -> list[str | None]:
+    """Send batch requests to a model through inspect_ai."""
+    from inspect_ai.model import ChatMessageAssistant, ChatMessageSystem, ChatMessageUser, GenerateConfig, get_model
+
+    message_types = {"system": ChatMessageSystem, "user": ChatMessageUser, "assistant": ChatMessageAssistant}
+    api = get_model(model)
+
+    async def generate(request: BatchRequest) -> str | None:
+        messages = [message_types[message["role"]](content=message["content"]) for message in request.messages]
+        output = await api.generate(messages, config=GenerateConfig(**request.config))
+        return output.completion if not output.error else None
+
+    return await asyncio.gather(*[generate(request) for request in requests])
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API backend, for `openai/...` models.
+
+    Requests are uploaded as a JSONL file of chat completion requests, processed by
+    OpenAI within 24 hours at a discount.
+    """
+
+    def __init__(self, client=None, completion_window: str = "24h"):
+        if client is None:
+            try:
+                from openai import OpenAI
+            except ImportError as e:
+                raise ImportError("The OpenAI batch backend requires openai: pip install openai") from e
+            client = OpenAI()
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, model: str, requests: list[BatchRequest]) -> str:
+        provider, _, model_name = model.partition("/")
+        if provider != "openai":
+            raise ValueError(f"The OpenAI batch backend only supports openai/... models, not {model}")
+
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            for request in requests:
+                f.write(json.dumps({
+                    "custom_id": request.custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {"model": model_name, "messages": request.messages, **request.config},
+                }) + "\n")
+        try:
+            with open(f.name, "rb") as upload:
+                input_file = self.client.files.create(file=upload, purpose="batch")
+        finally:
+            os.unlink(f.name)
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> BatchStatus:
+        status = self.client.batches.retrieve(batch_id).status
+        if status == "completed":
+            return "completed"
+        if status in ("failed", "expired", "cancelled"):
+            return "failed"
+        return "running"
+
+    def results(self, batch_id: str) -> dict[str, str | None]:
+        batch = self.client.batches.retrieve(batch_id)
+        results: dict[str, str | None] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id is None:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                row = json.loads(line)
+                response = row.get("response") or {}
+                if response.get("status_code") == 200:
+                    results[row["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+                else:
+                    results[row["custom_id"]] = None
+        return results
+
+def run_batch(
+    backend: BatchBackend,
+    model: str,
+    requests: list[BatchRequest],
+    state_dir: str | Path,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    timeout: float | None = None,
+) -> dict[str, str | None]:
+    """Submit a batch and wait for its results.
+
+    The id of the submitted batch is saved in `state_dir` until the results are in,
+    so a job restarted after a crash picks up the same batch instead of paying for
+    a new one.
+
+    Raises:
+        RuntimeError: If the batch failed.
+        TimeoutError: If the batch didn't complete within `timeout` seconds.
+    """
+    from inspect_ai._util._async import run_coroutine
+
+    return run_coroutine(run_batch_async(backend, model, requests, state_dir, poll_interval, timeout))
+
+async def run_batch_async(
+    backend: BatchBackend,
+    model: str,
+    requests: list[BatchRequest],
+    state_dir: str | Path,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    timeout: float | None = None,
+) -> dict[str, str | None]:
+    """Like `run_batch`, but waits without blocking the event loop.
+
+    Backend calls run in a worker thread, since the backends use blocking clients.
+    """
+    if not requests:
+        return {}
+    content = json.dumps([model, [asdict(request) for request in requests]], sort_keys=True)
+    state_path = Path(state_dir) / f"{hashlib.sha256(content.encode()).hexdigest()}.json"
+    if state_path.exists():
+        batch_id = json.loads(state_path.read_text())["batch_id"]
+    else:
+        batch_id = await asyncio.to_thread(backend.submit, model, requests)
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        state_path.write_text(json.dumps({"batch_id": batch_id, "model": model, "requests": len(requests)}))
+
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while (status := await asyncio.to_thread(backend.status, batch_id)) == "running":
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"Batch {batch_id} for {model} did not complete within {timeout}s")
+        await asyncio.sleep(poll_interval)
+    if status == "failed":
+        state_path.unlink(missing_ok=True)
+        raise RuntimeError(f"Batch {batch_id} for {model} failed")
+
+    results = await asyncio.to_thread(backend.results, batch_id)
+    state_path.unlink(missing_ok=True)
+    return results
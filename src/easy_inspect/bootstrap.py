@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from easy_inspect.results import SAMPLE_COLUMNS
+
+# numpy and pandas are only imported when computing intervals
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Columns identifying a group of samples to compute intervals for
+GROUP_COLUMNS = ["question_id", "model"]
+
+# Upper bound on the number of resampled values held in memory at once
+MAX_CHUNK_VALUES = 2**22
+
+def get_score_columns(df: pd.DataFrame) -> list[str]:
+    """Score columns of a DataFrame of per-sample rows."""
+    return [
+        column for column in df.columns
+        if column not in SAMPLE_COLUMNS and column not in ("question_hash", "completion")
+    ]
+
+def bootstrap_ci(
+    df: pd.DataFrame,
+    score_columns: list[str] | None = None,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    cluster: str | None = "paraphrase_index",
+    seed: int | None = 0,
+) -> pd.DataFrame:
+    """Percentile bootstrap confidence intervals of the mean scores of each question and model.
+
+    All (question, model, score) groups are resampled at once with NumPy, in chunks
+    of resamples, rather than looping over groups. With `cluster`, whole clusters
+    (by default, all the samples of a paraphrase) are resampled instead of single
+    samples, so correlated samples don't make the intervals too narrow; the mean of
+    a resample is then the mean over all the samples of the drawn clusters.
+
+    Args:
+        df: Per-sample rows, e.g. from `Runner.load_sample_results()`.
+        score_columns: Scores to compute intervals for. Defaults to all of them.
+        n_resamples: Number of bootstrap resamples.
+        confidence: Confidence level of the intervals.
+        cluster: Column of the clusters to resample, or None to resample samples.
+        seed: Seed of the random generator.
+
+    Returns:
+        A DataFrame with one row per question and model, and `{score}/mean`,
+        `{score}/ci_low`, `{score}/ci_high` and `{score}/n` columns for each score.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if not 0 < confidence < 1:
+        raise ValueError(f"confidence must be between 0 and 1, got {confidence}")
+    if n_resamples < 1:
+        raise ValueError(f"n_resamples must be positive, got {n_resamples}")
+    score_columns = get_score_columns(df) if score_columns is None else score_columns
+
+    # One row per (question, model, score, cluster), with the sum and count of its scores
+    long = df.melt(
+        id_vars=GROUP_COLUMNS + ([cluster] if cluster else []),
+        value_vars=score_columns,
+        var_name="score",
+    ).dropna(subset=["value"])
+    if long.empty:
+        return pd.DataFrame(columns=GROUP_COLUMNS)
+    keys = [*GROUP_COLUMNS, "score"]
+    units = (
+        long.groupby(keys + [cluster], sort=True, dropna=False)["value"].agg(["sum", "count"]).reset_index()
+        if cluster
+        else long.assign(sum=long["value"], count=1).sort_values(keys, kind="stable")
+    )
+    groups = units.groupby(keys, sort=True).agg(
+        n_units=("count", "size"), n=("count", "sum"), sum=("sum", "sum")
+    ).reset_index()
+
+    # Units are sorted by group, so each group is a contiguous block of units
+    unit_sums = units["sum"].to_numpy(dtype=float)
+    unit_counts = units["count"].to_numpy(dtype=float)
+    n_units = groups["n_units"].to_numpy()
+    starts = np.concatenate([[0], np.cumsum(n_units)[:-1]])
+    unit_starts = np.repeat(starts, n_units)
+    unit_sizes = np.repeat(n_units, n_units)
+
+    # Resample all the groups at once: unit i of a resample is a random unit of its group
+    rng = np.random.default_rng(seed)
+    chunk_size = max(1, MAX_CHUNK_VALUES // len(units))
+    means = []
+    for chunk_start in range(0, n_resamples, chunk_size):
+        size = min(chunk_size, n_resamples - chunk_start)
+        drawn = unit_starts[:, None] + (rng.random((len(units), size)) * unit_sizes[:, None]).astype(np.int64)
+        sums = np.add.reduceat(unit_sums[drawn], starts, axis=0)
+        if cluster:
+            counts = np.add.reduceat(unit_counts[drawn], starts, axis=0)
+        else:
+            # Every unit is a single sample
+            counts = n_units[:, None]
+        means.append(sums / counts)
+    alpha = 1 - confidence
+    ci_low, ci_high = np.quantile(np.concatenate(means, axis=1), [alpha / 2, 1 - alpha / 2], axis=1)
+
+    groups["mean"] = groups["sum"] / groups["n"]
+    groups["ci_low"] = ci_low
+    groups["ci_high"] = ci_high
+    wide = groups.pivot(index=GROUP_COLUMNS, columns="score", values=["mean", "ci_low", "ci_high", "n"])
+    wide.columns = [f"{score}/{stat}" for stat, score in wide.columns]
+    columns = [f"{score}/{stat}" for score in score_columns for stat in ("mean", "ci_low", "ci_high", "n")]
+    return wide.reindex(columns=[column for column in columns if column in wide.columns]).reset_index()
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import os
+import threading
+
+from copy import copy
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Union
+
+if TYPE_CHECKING:
+    from inspect_ai.model import CachePolicy
+
+# Settings accepted for generation caching: on/off, a policy, or the policy's
+# arguments as a dict (e.g. from YAML: `cache: {expiry: 1W, per_epoch: false}`)
+CacheSetting = Union[bool, "CachePolicy", dict]
+
+# inspect_ai reads its cache directory from the environment on every cache access,
+# so only one `inspect_cache_dir` context can be active per process
+_cache_dir_lock = threading.Lock()
+
+def get_cache_policy(setting: CacheSetting | None) -> bool | CachePolicy:
+    """Resolve a cache setting into the `cache` argument of inspect_ai's `generate`."""
+    from inspect_ai.model import CachePolicy
+
+    if setting is None:
+        return False
+    if isinstance(setting, dict):
+        return CachePolicy(**setting)
+    return setting
+
+def scoped_cache_policy(policy: bool | CachePolicy, **scopes: str) -> bool | CachePolicy:
+    """Add scopes to a cache policy's key.
+
+    inspect_ai's cache key covers the model, messages and config, so all samples of a
+    paraphrase would share one cached answer. Scoping by sample index keeps them independent.
+    """
+    from inspect_ai.model import CachePolicy
+
+    if policy is False:
+        return False
+    policy = CachePolicy() if policy is True else copy(policy)
+    policy.scopes = {**policy.scopes, **scopes}
+    return policy
+
+@contextmanager
+def inspect_cache_dir(cache_dir: str | Path) -> Iterator[None]:
+    """Point inspect_ai's generation cache at `cache_dir` for the duration of the context.
+
+    The directory is set through the process environment, so contexts entered from
+    other threads wait for this one to exit. Runners sharing an event loop must also
+    take turns (see `Runner._eval`), since the lock is held across awaits.
+    """
+    with _cache_dir_lock:
+        previous = os.environ.get("INSPECT_CACHE_DIR")
+        os.environ["INSPECT_CACHE_DIR"] = str(cache_dir)
+        try:
+            yield
+        finally:
+            if previous is None:
+                del os.environ["INSPECT_CACHE_DIR"]
+            else:
+                os.environ["INSPECT_CACHE_DIR"] = previous
+
+def prune_cache_dir(cache_dir: str | Path, max_bytes: int | None = None) -> int:
+    """Delete expired cache entries, then the oldest entries until the cache fits in `max_bytes`.
+
+    Returns:
+        The size of the cache in bytes after pruning.
+    """
+    from inspect_ai.model import cache_prune
+
+    # Pass the files explicitly rather than pointing INSPECT_CACHE_DIR at `cache_dir`,
+    # so pruning doesn't change the cache of an eval running meanwhile
+    files = [path for path in Path(cache_dir).rglob("*") if path.is_file()]
+    if files:
+        cache_prune(files)
+
+    files = [path for path in files if path.exists()]
+    stats = {path: path.stat() for path in files}
+    size = sum(stat.st_size for stat in stats.values())
+    if max_bytes is None:
+        return size
+
+    # Oldest entries first
+    for path in sorted(files, key=lambda path: stats[path].st_mtime):
+        if size <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        size -= stats[path].st_size
+    return size
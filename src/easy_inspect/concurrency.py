@@ -0,0 +1,220 @@
+import asyncio
+import time
+
+from typing import Awaitable, Callable, TypeVar
+
+from tenacity import RetryError
+
+T = TypeVar("T")
+
+# Concurrency budget for models without an explicit one (inspect_ai's default max_connections)
+DEFAULT_MAX_CONNECTIONS = 10
+# Concurrency an adaptive limiter starts from, before probing upwards
+DEFAULT_INITIAL_CONNECTIONS = 4
+# Latency increases smaller than this (in seconds) are treated as noise, not congestion
+LATENCY_SLACK = 0.05
+# Retries of a rate limited request before giving up, unless the generate config sets max_retries
+DEFAULT_MAX_RETRIES = 10
+
+class AdaptiveLimiter:
+    """Concurrency limit for the generate requests to one model.
+
+    With `adaptive=False` this is a plain limit of `max_limit` concurrent requests.
+
+    With `adaptive=True` the limit is adjusted AIMD-style (additive increase,
+    multiplicative decrease), like TCP congestion control:
+    - Each healthy response raises the limit by `increase / limit`, i.e. by
+      `increase` per window of `limit` requests, up to `max_limit`.
+    - A rate limit response, or a smoothed latency above `latency_tolerance` times the
+      fastest latency seen, multiplies the limit by `decrease`, down to `min_limit`.
+      Only requests started after the last decrease can trigger another one, so a
+      burst of failures from the same window backs off once.
+    Rate limited requests are retried after an exponential backoff (capped at `max_backoff`),
+    up to `max_retries` times or until `timeout` seconds have passed, after which the
+    rate limit error is raised (e.g. when a quota is exhausted). Plain limits don't retry:
+    that is left to inspect_ai's own retries, so they aren't multiplied.
+    """
+
+    def __init__(
+        self,
+        max_limit: int = DEFAULT_MAX_CONNECTIONS,
+        adaptive: bool = False,
+        initial: int = DEFAULT_INITIAL_CONNECTIONS,
+        min_limit: int = 1,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        timeout: float | None = None,
+    ):
+        if max_limit < 1:
+            raise ValueError("max_limit must be positive")
+        self.max_limit = max_limit
+        self.adaptive = adaptive
+        self.min_limit = min(min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), max_limit) if adaptive else max_limit)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        self.requests = 0
+        self.rate_limits = 0
+        self._in_flight = 0
+        self._min_latency: float | None = None
+        self._latency: float | None = None
+        self._last_decrease = float("-inf")
+        # Time spent running requests, excluding the gaps between `eval` calls
+        self._elapsed = 0.0
+        self._span: tuple[float, float] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._condition: asyncio.Condition | None = None
+
+    async def run(
+        self,
+        request: Callable[[], Awaitable[T]],
+        is_rate_limit: Callable[[BaseException], bool],
+        max_retries: int | None = None,
+        timeout: float | None = None,
+    ) -> T:
+        """Run a request once a slot is free, retrying it if it is rate limited and the limit is adaptive.
+
+        `max_retries` and `timeout` override the limiter's own, e.g. with the request's generate config.
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        attempt = 0
+        while True:
+            await self._acquire()
+            start = time.monotonic()
+            try:
+                result = await request()
+            except Exception as ex:
+                rate_limited = is_rate_limit(_unwrap_retry(ex))
+                await self._release(start, rate_limited=rate_limited)
+                if not rate_limited or not self.adaptive:
+                    raise
+                delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+                attempt += 1
+                if attempt > max_retries or (deadline is not None and time.monotonic() + delay > deadline):
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            await self._release(start)
+            return result
+
+    def stats(self) -> dict[str, float]:
+        """Completed requests, rate limited attempts, current limit and achieved requests per second."""
+        elapsed = self._elapsed + (self._span[1] - self._span[0] if self._span else 0.0)
+        return {
+            "requests": self.requests,
+            "rate_limits": self.rate_limits,
+            "limit": int(self.limit),
+            "requests_per_sec": self.requests / elapsed if elapsed > 0 else None,
+        }
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Each `eval` call runs its own event loop
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+            self._in_flight = 0
+            if self._span:
+                self._elapsed += self._span[1] - self._span[0]
+                self._span = None
+        return self._condition
+
+    async def _acquire(self):
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+            if self._span is None:
+                self._span = (time.monotonic(), time.monotonic())
+
+    async def _release(self, start: float, rate_limited: bool = False):
+        condition = self._get_condition()
+        async with condition:
+            end = time.monotonic()
+            self._in_flight -= 1
+            self._span = (self._span[0], end)
+            if rate_limited:
+                self.rate_limits += 1
+                self._on_congestion(start)
+            else:
+                self.requests += 1
+                self._on_success(start, end - start)
+            condition.notify_all()
+
+    def _on_success(self, start: float, latency: float):
+        if not self.adaptive:
+            return
+        self._min_latency = latency if self._min_latency is None else min(self._min_latency, latency)
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        if self._latency > self.latency_tolerance * self._min_latency + LATENCY_SLACK:
+            self._on_congestion(start)
+        else:
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+
+    def _on_congestion(self, start: float):
+        if not self.adaptive or start < self._last_decrease:
+            return
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+        self._last_decrease = time.monotonic()
+        # Measure the latency afresh at the new limit
+        self._latency = None
+
+def _unwrap_retry(ex: BaseException) -> BaseException:
+    """The underlying error, if inspect_ai gave up retrying a request."""
+    if isinstance(ex, RetryError) and ex.last_attempt.exception() is not None:
+        return ex.last_attempt.exception()
+    return ex
+
+class ModelLimits:
+    """Concurrency limits for the models of a run, one `AdaptiveLimiter` per model.
+
+    Budgets are looked up by full model name (e.g. "openai/gpt-4o"), then by
+    provider (e.g. "openai"), then fall back to `default`.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, int] | None = None,
+        adaptive: bool = False,
+        default: int = DEFAULT_MAX_CONNECTIONS,
+        **limiter_args,
+    ):
+        self.limits = limits or {}
+        self.adaptive = adaptive
+        self.default = default
+        self.limiter_args = limiter_args
+        self._limiters: dict[str, AdaptiveLimiter] = {}
+
+    def budget(self, model: str) -> int:
+        """Maximum concurrent requests to a model."""
+        provider = model.split("/")[0]
+        return self.limits.get(model, self.limits.get(provider, self.default))
+
+    def get(self, model: str) -> AdaptiveLimiter:
+        if model not in self._limiters:
+            self._limiters[model] = AdaptiveLimiter(
+                max_limit=self.budget(model), adaptive=self.adaptive, **self.limiter_args
+            )
+        return self._limiters[model]
+
+    def max_connections(self, models: list[str]) -> int:
+        """inspect_ai `max_connections` that never binds before the per-model limits.
+
+        inspect_ai shares one connection limit between all models of a provider account.
+        """
+        return sum(self.budget(model) for model in models)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {model: limiter.stats() for model, limiter in self._limiters.items()}
@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+
+from pathlib import Path
+from inspect_ai.log import EvalLog, read_eval_log
+from easy_inspect.locks import FileLock
+from easy_inspect.results import get_scorer_names
+
+INDEX_FILENAME = "index.json"
+LOCK_FILENAME = "index.lock"
+
+IndexEntry = dict[str, str | dict[str, float] | None]
+
+logger = logging.getLogger(__name__)
+
+def get_log_metrics(log: EvalLog) -> dict[str, float]:
+    """Flatten the scorer metrics of a log into `{scorer_name}/{metric_name}` keys."""
+    metrics = {}
+    if log.results is None:
+        return metrics
+
+    scorer_names = get_scorer_names(log)
+    for score in log.results.scores:
+        name = scorer_names[score.name]
+        for metric_name, metric in score.metrics.items():
+            metrics[f"{name}/{metric_name}"] = metric.value
+    return metrics
+
+def get_index_entry(log: EvalLog) -> IndexEntry:
+    """Summarize a log (header only) into an index entry."""
+    metadata = log.eval.metadata or {}
+    return {
+        # Hacky way to get the question id from the task name
+        "question_id": log.eval.task.split("/")[-1],
+        "question_hash": metadata.get("question_hash"),
+        "generation_hash": metadata.get("generation_hash"),
+        "solver_hash": metadata.get("solver_hash"),
+        "model": log.eval.model,
+        "status": log.status,
+        "metrics": get_log_metrics(log),
+    }
+
+class LogIndex:
+    """On-disk manifest of the cached logs in a log directory.
+
+    Maps each cached `.eval` file (by filename, relative to the log directory) to
+    its question id, question hash, model, status and aggregate metrics, so that
+    lookups don't need to deserialize every log.
+
+    Several processes may share a log directory: updates re-read the index from
+    disk and are written under a lock file, so concurrent writers don't drop
+    each other's entries.
+    """
+
+    def __init__(self, log_dir: str | Path):
+        self.log_dir = Path(log_dir)
+        self.path = self.log_dir / INDEX_FILENAME
+        self.entries: dict[str, IndexEntry] = self._read()
+
+    def _lock(self) -> FileLock:
+        return FileLock(self.log_dir / LOCK_FILENAME)
+
+    def _read(self) -> dict[str, IndexEntry]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            # A corrupt index is rebuilt from the logs by `sync`
+            return {}
+
+    def save(self) -> None:
+        """Write the index atomically, so readers never see a partial file."""
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def add(self, log: EvalLog, log_path: str | Path) -> None:
+        """Record a log that was written to `log_path` and save the index."""
+        entry = get_index_entry(log)
+        with self._lock():
+            self.entries = self._read()
+            self.entries[Path(log_path).name] = entry
+            self.save()
+
+    def remove(self, log_path: str | Path) -> None:
+        """Forget a log and save the index."""
+        with self._lock():
+            self.entries = self._read()
+            if self.entries.pop(Path(log_path).name, None) is not None:
+                self.save()
+
+    def sync(self) -> None:
+        """Reconcile the index with the `.eval` files actually present on disk.
+
+        Logs missing from the index (e.g. written by an older version) are indexed
+        from their headers; entries whose file has been deleted are dropped. Files
+        that can't be read (e.g. truncated copies) are skipped with a warning.
+        """
+        self.entries = self._read()
+        on_disk = {path.name for path in self.log_dir.glob("*.eval")}
+        # Read the new headers before taking the lock, to keep it short
+        missing = {}
+        for name in sorted(on_disk - set(self.entries)):
+            try:
+                missing[name] = get_index_entry(read_eval_log(str(self.log_dir / name), header_only=True))
+            except Exception as ex:
+                logger.warning(f"Skipping unreadable log {self.log_dir / name}: {ex!r}")
+        if not missing and on_disk >= set(self.entries):
+            return
+
+        with self._lock():
+            self.entries = {**self._read(), **missing}
+            for name in list(self.entries):
+                if not (self.log_dir / name).exists():
+                    del self.entries[name]
+            self.save()
+
+    def find(
+        self,
+        question_id: str | None = None,
+        question_hash: str | None = None,
+        generation_hash: str | None = None,
+        solver_hash: str | None = None,
+        model: str | None = None,
+        status: str | None = "success",
+    ) -> dict[str, IndexEntry]:
+        """Return the entries (keyed by log filename) matching all the given fields."""
+        query = {
+            "question_id": question_id,
+            "question_hash": question_hash,
+            "generation_hash": generation_hash,
+            "solver_hash": solver_hash,
+            "model": model,
+            "status": status,
+        }
+        query = {k: v for k, v in query.items() if v is not None}
+        return {
+            name: entry for name, entry in self.entries.items()
+            if all(entry.get(k) == v for k, v in query.items())
+        }
@@ -1,51 +1,148 @@
+import fnmatch
 import yaml
 
 from pathlib import Path
 from .question import Question, QuestionConfig
 
+# Use the C-accelerated loader when libyaml is available
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+RawQuestionConfig = dict
+
+def _load_yaml(path: Path) -> list[RawQuestionConfig]:
+    with open(path) as f:
+        return yaml.load(f, Loader=SafeLoader) or []
 
 def load_question_from_yaml(id: str, path: Path) -> Question:
     """Load a specific question from a YAML file.
-    
+
     Args:
         id: ID of the question to load
         path: Path to YAML file containing question configurations
-        
+
     Returns:
         Question object with matching ID from the YAML file
-        
+
     Raises:
         ValueError: If no question with matching ID is found
     """
-    with open(path) as f:
-        raw_config = yaml.safe_load(f)
-        
+    raw_config = _load_yaml(path)
+
     questions = [Question(QuestionConfig(**q)) for q in raw_config if q.get('id') == id]
     if len(questions) > 1:
         raise ValueError(f"Multiple questions found with id '{id}' in {path}")
-    
+
     if not questions:
         raise ValueError(f"No question found with id '{id}' in {path}")
-        
+
     return questions[0]
 
+class QuestionRegistry:
+    """Index of the questions defined in the YAML files of a directory.
+
+    Each file is parsed once and its questions are indexed by id. Files are only
+    re-parsed when their modification time changes, so repeated lookups are cheap.
+    Questions are only built (and validated) when they are loaded.
+    """
+
+    def __init__(self, dir_path: Path, pattern: str = "*.yaml"):
+        self.dir_path = Path(dir_path)
+        self.pattern = pattern
+        # path -> ((mtime, size), raw question configs)
+        self._files: dict[Path, tuple[tuple[int, int], list[RawQuestionConfig]]] = {}
+        # question id -> (path, raw question config)
+        self._index: dict[str, tuple[Path, RawQuestionConfig]] = {}
+        # Error of the files as last parsed, raised again until they change
+        self._error: str | None = None
+
+    def refresh(self) -> None:
+        """Re-parse new or modified files and rebuild the index.
+
+        Raises:
+            ValueError: If the same question id is defined more than once
+        """
+        paths = sorted(self.dir_path.glob(self.pattern))
+        changed = set(self._files) != set(paths)
+        files = {}
+        for path in paths:
+            stat = path.stat()
+            version = (stat.st_mtime_ns, stat.st_size)
+            cached = self._files.get(path)
+            if cached and cached[0] == version:
+                files[path] = cached
+            else:
+                files[path] = (version, _load_yaml(path))
+                changed = True
+
+        if not changed:
+            if self._error is not None:
+                raise ValueError(self._error)
+            return
+
+        self._files = files
+        self._error = None
+        index = {}
+        for path, (_, raw_configs) in files.items():
+            for raw_config in raw_configs:
+                id = raw_config.get('id')
+                if id in index:
+                    self._index = {}
+                    self._error = f"Multiple questions found with id '{id}' in {index[id][0]} and {path}"
+                    raise ValueError(self._error)
+                index[id] = (path, raw_config)
+        self._index = index
+
+    def ids(self) -> list[str]:
+        """IDs of all the questions in the directory."""
+        self.refresh()
+        return list(self._index)
+
+    def load(self, id: str) -> Question:
+        """Load a specific question.
+
+        Raises:
+            ValueError: If no question with matching ID is found
+        """
+        self.refresh()
+        if id not in self._index:
+            raise ValueError(f"No question found with id '{id}' in directory {self.dir_path}")
+        _, raw_config = self._index[id]
+        return Question(QuestionConfig(**raw_config))
+
+    def load_all(self) -> list[Question]:
+        """Load all the questions in the directory."""
+        return [self.load(id) for id in self.ids()]
+
+    def select(self, pattern: str = "*", tags: list[str] | None = None) -> list[Question]:
+        """Load the questions whose id matches a glob pattern and that have all the given tags."""
+        self.refresh()
+        tags = set(tags or [])
+        return [
+            self.load(id) for id, (_, raw_config) in self._index.items()
+            if fnmatch.fnmatchcase(id, pattern) and tags <= set(raw_config.get('tags') or [])
+        ]
+
+# One registry per directory, so repeated lookups don't re-parse the YAML files
+_registries: dict[Path, QuestionRegistry] = {}
+
 def load_question_from_yaml_dir(id: str, dir_path: Path) -> Question:
     """Load a specific question from all YAML files in a directory.
-    
+
     Args:
         id: ID of the question to load
         dir_path: Path to directory containing YAML files
-        
+
     Returns:
         Question object with matching ID from the YAML files
-        
+
     Raises:
-        ValueError: If no question with matching ID is found
+        ValueError: If no question with matching ID is found, or if the
+            ID is defined more than once in the directory
     """
-    for yaml_file in dir_path.glob("*.yaml"):
-        try:
-            return load_question_from_yaml(id, yaml_file)
-        except ValueError:
-            continue
-            
-    raise ValueError(f"No question found with id '{id}' in directory {dir_path}")
\ No newline at end of file
+    dir_path = Path(dir_path).resolve()
+    if dir_path not in _registries:
+        _registries[dir_path] = QuestionRegistry(dir_path)
+    return _registries[dir_path].load(id)
@@ -0,0 +1,113 @@
+import json
+import os
+import socket
+import time
+
+from pathlib import Path
+
+# Locks are held for short critical sections; older lock files were left by a dead process
+DEFAULT_LOCK_STALE_AFTER = 60.0
+# Claims are held while a (question, model) cell runs, which can take hours
+DEFAULT_CLAIM_STALE_AFTER = 24 * 60 * 60.0
+
+def _create_exclusive(path: Path, content: str) -> bool:
+    """Atomically create `path`, unless it already exists.
+
+    `O_CREAT | O_EXCL` is atomic on local filesystems and on NFSv3+, so this works
+    between processes and hosts sharing a log directory.
+    """
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    return True
+
+class FileLock:
+    """Inter-process lock held through the existence of a lock file.
+
+    Lock files older than `stale_after` seconds are assumed to be left by a crashed
+    process and are removed.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        timeout: float = 60.0,
+        stale_after: float = DEFAULT_LOCK_STALE_AFTER,
+        poll_interval: float = 0.01,
+    ):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+
+    def acquire(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        deadline = time.monotonic() + self.timeout
+        while not _create_exclusive(self.path, str(os.getpid())):
+            try:
+                if time.time() - self.path.stat().st_mtime > self.stale_after:
+                    self.path.unlink(missing_ok=True)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Could not acquire lock {self.path} within {self.timeout}s")
+            time.sleep(self.poll_interval)
+
+    def release(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+def _claim_is_stale(path: Path, stale_after: float) -> bool:
+    """Whether the worker holding a claim is gone: dead on this host, or silent for too long."""
+    try:
+        with open(path) as f:
+            owner = json.load(f)
+        age = time.time() - path.stat().st_mtime
+    except FileNotFoundError:
+        return True
+    except (OSError, json.JSONDecodeError):
+        # Claim being written, or unreadable
+        return False
+
+    if age > stale_after:
+        return True
+    if owner.get("host") == socket.gethostname():
+        try:
+            os.kill(owner["pid"], 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+    return False
+
+def try_claim(path: str | Path, stale_after: float = DEFAULT_CLAIM_STALE_AFTER) -> bool:
+    """Claim a unit of work by creating a claim file.
+
+    Returns False if another live worker holds the claim. Claims of dead workers
+    (see `_claim_is_stale`) are taken over.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    owner = json.dumps({"host": socket.gethostname(), "pid": os.getpid(), "time": time.time()})
+    if _create_exclusive(path, owner):
+        return True
+
+    # Take over stale claims one worker at a time, so only one of them wins
+    with FileLock(path.with_name(path.name + ".lock")):
+        if not _claim_is_stale(path, stale_after):
+            return False
+        path.unlink(missing_ok=True)
+        return _create_exclusive(path, owner)
+
+def release_claim(path: str | Path) -> None:
+    Path(path).unlink(missing_ok=True)
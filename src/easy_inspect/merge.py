@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from inspect_ai.log import EvalLog, EvalSample
+from inspect_ai.model import ModelUsage
+
+if TYPE_CHECKING:
+    from inspect_ai.scorer import Scorer
+
+def _add_usage(total: dict[str, ModelUsage], usage: dict[str, ModelUsage]) -> None:
+    for model, model_usage in usage.items():
+        current = total.setdefault(model, ModelUsage())
+        current.input_tokens += model_usage.input_tokens
+        current.output_tokens += model_usage.output_tokens
+        current.total_tokens += model_usage.total_tokens
+        for field in ("input_tokens_cache_write", "input_tokens_cache_read"):
+            if getattr(model_usage, field) is not None:
+                setattr(current, field, (getattr(current, field) or 0) + getattr(model_usage, field))
+
+def merge_logs(logs: list[EvalLog], scorers: list[Scorer]) -> EvalLog:
+    """Merge logs of the same task and model, run on different samples, into one log.
+
+    The samples of all the logs are concatenated, in the order they first appear; if
+    a sample (id and epoch) is in several logs, the last completed one wins. The
+    metrics are recomputed from the sample scores with `scorers`, which must be the
+    scorers the logs were run with. The merged log is successful if the last log is
+    and none of the merged samples failed, so failed samples can be retried later.
+
+    Args:
+        logs: Logs to merge, oldest first. The spec of the last log is kept.
+        scorers: Scorers of the task, e.g. `Question.build_scorer()`.
+    """
+    from inspect_ai._eval.task.results import eval_results
+    from inspect_ai.scorer._metric import SampleScore
+
+    if not logs:
+        raise ValueError("No logs to merge")
+
+    samples: dict[tuple[int | str, int], EvalSample] = {}
+    for log in logs:
+        for sample in log.samples or []:
+            key = (sample.id, sample.epoch)
+            if sample.error is None or key not in samples:
+                samples[key] = sample
+
+    merged = logs[-1].model_copy()
+    merged.samples = list(samples.values())
+    if merged.status == "success" and any(sample.error is not None for sample in merged.samples):
+        failed = next((log for log in reversed(logs) if log.status != "success"), None)
+        merged.status = failed.status if failed else "error"
+        merged.error = failed.error if failed else None
+
+    merged.eval = merged.eval.model_copy(deep=True)
+    sample_ids = list(dict.fromkeys(sample.id for sample in merged.samples))
+    merged.eval.dataset.samples = len(sample_ids)
+    merged.eval.dataset.sample_ids = sample_ids
+
+    merged.stats = merged.stats.model_copy()
+    started = [log.stats.started_at for log in logs if log.stats.started_at]
+    merged.stats.started_at = min(started) if started else ""
+    model_usage: dict[str, ModelUsage] = {}
+    for log in logs:
+        _add_usage(model_usage, log.stats.model_usage)
+    merged.stats.model_usage = model_usage
+
+    sample_scores = [
+        {
+            key: SampleScore(
+                sample_id=sample.id,
+                value=score.value,
+                answer=score.answer,
+                explanation=score.explanation,
+                metadata=score.metadata,
+            )
+            for key, score in sample.scores.items()
+        }
+        for sample in merged.samples
+        if sample.scores is not None
+    ]
+    merged.results, merged.reductions = eval_results(
+        len(merged.samples), sample_scores, reducers=None, scorers=scorers, metrics=None
+    )
+    return merged
+
+def merge_scores(log: EvalLog, rescored: EvalLog, scorers: list[Scorer], stale: list[bool]) -> EvalLog:
+    """Combine the up-to-date scores of a log with the scores of its re-run scorers.
+
+    Args:
+        log: Log with the previous scores, reported under the `name` of their scorers.
+        rescored: The same log scored with only the stale scorers, in order.
+        scorers: Current scorers of the task.
+        stale: Which of `scorers` were re-run in `rescored`; the others keep the scores in `log`.
+    """
+    from inspect_ai._util.registry import registry_params
+    from inspect_ai.scorer._scorer import unique_scorer_name
+
+    from easy_inspect.results import get_scorer_names
+
+    # Keys of the sample scores, deduplicated by inspect_ai as in `score_async`
+    keys, rescored_keys = [], []
+    for scorer, is_stale in zip(scorers, stale):
+        keys.append(unique_scorer_name(scorer, keys))
+        if is_stale:
+            rescored_keys.append(unique_scorer_name(scorer, rescored_keys))
+    previous_keys = {name: key for key, name in get_scorer_names(log).items()}
+
+    merged = rescored.model_copy()
+    merged.samples = []
+    for sample, rescored_sample in zip(log.samples or [], rescored.samples or []):
+        new_scores = iter(rescored_keys)
+        scores = {}
+        for scorer, key, is_stale in zip(scorers, keys, stale):
+            if is_stale:
+                scores[key] = rescored_sample.scores[next(new_scores)]
+            else:
+                scores[key] = sample.scores[previous_keys[registry_params(scorer)["name"]]]
+        merged.samples.append(rescored_sample.model_copy(update={"scores": scores}))
+    return merge_logs([merged], scorers)
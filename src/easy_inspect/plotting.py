@@ -1,10 +1,39 @@
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+from __future__ import annotations
 
-sns.set_theme(style="darkgrid")
+from typing import TYPE_CHECKING
+
+# seaborn and matplotlib are slow to import, so they are only loaded when plotting
+if TYPE_CHECKING:
+    import pandas as pd
 
 def models_plot(df: pd.DataFrame, metric: str):
+    """Bar plot of `metric` per model.
+
+    `df` is e.g. `Runner.load_results()`, or per-sample rows queried from a
+    `Warehouse`, in which case seaborn adds confidence intervals. If `df` has
+    `ci_low` and `ci_high` columns next to `metric` (e.g. `ethics/ci_low` for
+    `ethics/mean`, see `Runner.bootstrap_results`), they are drawn as error bars.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    prefix = metric.rsplit("/", 1)[0] if "/" in metric else metric
+    ci_low, ci_high = f"{prefix}/ci_low", f"{prefix}/ci_high"
+
+    sns.set_theme(style="darkgrid")
     plt.figure(figsize=(10, 6))
-    sns.barplot(x="model", y=metric, data=df)
+    if ci_low in df.columns and ci_high in df.columns:
+        if df["model"].duplicated().any():
+            raise ValueError("Plotting confidence intervals needs one row per model, e.g. filter on question_id")
+        ax = sns.barplot(x="model", y=metric, data=df, order=list(df["model"]), errorbar=None)
+        ax.errorbar(
+            x=range(len(df)),
+            y=df[metric],
+            yerr=[df[metric] - df[ci_low], df[ci_high] - df[metric]],
+            fmt="none",
+            ecolor="black",
+            capsize=4,
+        )
+    else:
+        sns.barplot(x="model", y=metric, data=df)
     plt.show()
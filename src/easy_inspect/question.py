@@ -1,15 +1,23 @@
+from __future__ import annotations
+
 import hashlib
 import json
 
 from dataclasses import dataclass
-from typing import List, Literal, Optional
+from typing import TYPE_CHECKING, Callable, Iterator, List, Literal, Optional, get_args
 
-from inspect_ai.dataset import Sample
-from inspect_ai.solver import Solver, generate, system_message
-from inspect_ai.scorer import Scorer
-from inspect_ai import Task, task
+from easy_inspect.cache import CacheSetting, get_cache_policy
 
-from easy_inspect.scorer import dummy, model_graded_rating
+# inspect_ai is only imported when building tasks, so loading questions stays fast
+if TYPE_CHECKING:
+    from inspect_ai import Task
+    from inspect_ai.dataset import Sample
+    from inspect_ai.model import GenerateConfig
+    from inspect_ai.scorer import Scorer
+    from inspect_ai.solver import Solver
+    from easy_inspect.batch import BatchRequest
+    from easy_inspect.concurrency import ModelLimits
+    from easy_inspect.scorer import JudgeCache
 
 QuestionMetadata = dict[str, str]
 QuestionType = Literal[
@@ -18,6 +26,44 @@ QuestionType = Literal[
     "answer_0_100", # The model is supposed to answer with a number between 0 and 100
     "free_form_judge", # A judge model will grade the model's answer in an arbitrary way
 ]
+JudgeMode = Literal[
+    "separate", # One judge request per judge prompt (default)
+    "batched", # A single judge request rates all judge prompts at once
+    "logprobs", # The judge answers with a bare number; the rating is the expectation over its token probabilities
+]
+
+# Config fields that only affect how answers are scored, not how they are generated
+SCORING_FIELDS = (
+    "judge_models",
+    "judge_prompts",
+    "judge_mode",
+    "judge_escalation_model",
+    "judge_ambiguous_band",
+    "judge_max_disagreement",
+)
+# Config fields that never affect results (organization and caching)
+UNHASHED_FIELDS = ("tags", "cache")
+# Fields of the original question format, always hashed (even when unset) so that
+# questions using only these keep the hash, and the cached logs, they always had
+BASE_HASHED_FIELDS = (
+    "id",
+    "type",
+    "paraphrases",
+    "samples_per_paraphrase",
+    "target",
+    "system_prompt",
+    "judge_models",
+    "judge_prompts",
+)
+# Config fields that affect the answer to a given paraphrase and sample index
+# Answers generated with the same settings are reused when paraphrases or samples are added
+SOLVER_FIELDS = ("system_prompt", "temperature", "max_tokens", "num_choices")
+
+# Samples per paraphrase in the first wave of adaptive sampling, unless set
+DEFAULT_MIN_SAMPLES_PER_PARAPHRASE = 10
+
+# Whether to generate the sample with a given (paraphrase index, sample index)
+SampleFilter = Callable[[int, int], bool]
 
 @dataclass(frozen=True)
 class QuestionConfig:
@@ -29,6 +75,21 @@ class QuestionConfig:
     system_prompt: Optional[str] = None
     judge_models: Optional[str | list[str]] = None
     judge_prompts: Optional[list[dict[str, str]]] = None
+    judge_mode: Optional[JudgeMode] = None
+    # Judge cascade: judge_models rate every answer, and uncertain ratings are escalated to judge_escalation_model
+    judge_escalation_model: Optional[str] = None
+    judge_ambiguous_band: Optional[list[int]] = None # Escalate mean ratings in [low, high] (0-100)
+    judge_max_disagreement: Optional[int] = None # Escalate when judge_models ratings differ by more than this
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    num_choices: Optional[int] = None # Samples of a paraphrase to request per generate call, for providers supporting `n`
+    tags: Optional[list[str]] = None
+    cache: Optional[CacheSetting] = None # Cache generations, e.g. `true` or `{expiry: 1W, per_epoch: false}`
+    # Adaptive sampling: sample each paraphrase in waves until the judge scores reach the target
+    # precision, between min_samples_per_paraphrase and samples_per_paraphrase samples
+    target_stderr: Optional[float] = None # Target standard error of the mean judge score of a paraphrase
+    target_ci_width: Optional[float] = None # Target width of the 95% confidence interval of that mean
+    min_samples_per_paraphrase: Optional[int] = None
 
     def validate(self) -> None:
         """Validate the question configuration."""
@@ -40,6 +101,9 @@ class QuestionConfig:
             
         if self.samples_per_paraphrase < 1:
             raise ValueError(f"Question {self.id}: samples_per_paraphrase must be positive")
+
+        if self.num_choices is not None and self.num_choices < 1:
+            raise ValueError(f"Question {self.id}: num_choices must be positive")
             
         if self.type == "free_form_judge_0_100":
             if not self.judge_models:
@@ -47,12 +111,75 @@ class QuestionConfig:
             if not self.judge_prompts:
                 raise ValueError(f"Question {self.id}: judge_prompts required for {self.type}")
 
+        if self.judge_mode not in (None, *get_args(JudgeMode)):
+            raise ValueError(f"Question {self.id}: unsupported judge_mode '{self.judge_mode}'")
+
+        if self.judge_escalation_model is not None:
+            if self.type != "free_form_judge_0_100" or self.judge_mode not in (None, "separate"):
+                raise ValueError(f"Question {self.id}: judge_escalation_model requires separate judge ratings")
+        elif self.judge_ambiguous_band is not None or self.judge_max_disagreement is not None:
+            raise ValueError(
+                f"Question {self.id}: judge_ambiguous_band and judge_max_disagreement require judge_escalation_model"
+            )
+        if self.judge_ambiguous_band is not None:
+            band = self.judge_ambiguous_band
+            if len(band) != 2 or not 0 <= band[0] <= band[1] <= 100:
+                raise ValueError(f"Question {self.id}: judge_ambiguous_band must be [low, high] within 0-100")
+
+        for name in ("target_stderr", "target_ci_width"):
+            if getattr(self, name) is not None and getattr(self, name) <= 0:
+                raise ValueError(f"Question {self.id}: {name} must be positive")
+        if self.is_adaptive() and self.type != "free_form_judge_0_100":
+            raise ValueError(f"Question {self.id}: adaptive sampling requires judge scores, not {self.type}")
+        if self.min_samples_per_paraphrase is not None:
+            if not self.is_adaptive():
+                raise ValueError(
+                    f"Question {self.id}: min_samples_per_paraphrase requires target_stderr or target_ci_width"
+                )
+            if not 2 <= self.min_samples_per_paraphrase <= self.samples_per_paraphrase:
+                raise ValueError(
+                    f"Question {self.id}: min_samples_per_paraphrase must be between 2 and samples_per_paraphrase"
+                )
+
+    def is_adaptive(self) -> bool:
+        """Whether the samples of each paraphrase are drawn in waves until a target precision."""
+        return self.target_stderr is not None or self.target_ci_width is not None
+
     def hash(self) -> str:
         """This is a unique identifier of a question. Changes when we change the wording.
         
         We use that to determine whether we can use cached results.
+        Fields added after the original format are left out while unset (None),
+        so adding a new optional setting doesn't invalidate existing caches.
+        """
+        return self._hash_attributes(exclude=())
+
+    def generation_hash(self) -> str:
+        """Identifies how answers are generated. Unlike `hash`, ignores the judge settings.
+
+        We use that to determine whether cached answers can be rescored instead of regenerated.
+        """
+        return self._hash_attributes(exclude=SCORING_FIELDS)
+
+    def solver_hash(self) -> str:
+        """Identifies how each answer is generated, regardless of which paraphrases and samples there are.
+
+        Samples with the same paraphrase text and sample index, generated with the same
+        `solver_hash` (and model), are the same and can be reused.
         """
-        attributes = {k: v for k, v in self.__dict__.items()}
+        return self._hash_attributes(exclude=tuple(k for k in self.__dict__ if k not in SOLVER_FIELDS))
+
+    def scoring_hash(self) -> str:
+        """Identifies how each answer is scored, i.e. whether scores of reused samples are still valid."""
+        scoring_fields = (*SCORING_FIELDS, "type", "target")
+        return self._hash_attributes(exclude=tuple(k for k in self.__dict__ if k not in scoring_fields))
+
+    def _hash_attributes(self, exclude: tuple[str, ...]) -> str:
+        exclude = (*exclude, *UNHASHED_FIELDS)
+        attributes = {
+            k: v for k, v in self.__dict__.items()
+            if k not in exclude and (v is not None or k in BASE_HASHED_FIELDS)
+        }
         json_str = json.dumps(attributes, sort_keys=True)
         return hashlib.sha256(json_str.encode()).hexdigest()
 
@@ -64,69 +191,260 @@ class Question:
     def hash(self) -> str:
         return self.config.hash()
 
-    def build_task(self) -> Task:
-        """Build a Task from this Question."""
+    def build_task(
+        self,
+        judge_cache: JudgeCache | None = None,
+        cache: CacheSetting | None = None,
+        limits: ModelLimits | None = None,
+        sample_filter: SampleFilter | None = None,
+        outputs: dict[tuple[str, str], str] | None = None,
+        bypass_cache: bool = False,
+    ) -> Task:
+        """Build a Task from this Question.
+
+        Args:
+            judge_cache: Optional cache of judge responses used by the scorers.
+            cache: Default generation cache setting, if the question doesn't set one.
+            limits: Optional per-model concurrency limits for the generate requests.
+            sample_filter: Only include the samples it accepts, e.g. for a wave of adaptive sampling.
+            outputs: Precomputed completions by (model, sample id), e.g. from a batch job.
+            bypass_cache: Generate without the generation cache, even if the question sets one.
+        """
+        from inspect_ai import Task, task
+
         # Call the task decorator in order to register the task
         @task(name = self.config.id)
         def _task_fn():
             return Task(
-                dataset=self.build_dataset(),
-                solver=self.build_solver(),
-                scorer=self.build_scorer(),
+                dataset=self.build_dataset(sample_filter),
+                solver=self.build_solver(cache, limits, outputs, bypass_cache),
+                scorer=self.build_scorer(judge_cache),
+                config=self.build_generate_config(),
+                metadata=self.task_metadata(),
             )
 
         return _task_fn()
 
+    def task_metadata(self) -> dict:
+        """Metadata logged once in the eval spec, rather than in every sample.
+
+        Holds the hashes, so cached logs can be matched to the config, and the
+        judge configuration, which is the same for all samples.
+        """
+        return {
+            "question_hash": self.hash(),
+            "generation_hash": self.config.generation_hash(),
+            "solver_hash": self.config.solver_hash(),
+            "scoring_hash": self.config.scoring_hash(),
+            "judge_models": self.config.judge_models,
+            "judge_prompts": self.config.judge_prompts,
+            "judge_mode": self.config.judge_mode,
+            "judge_escalation_model": self.config.judge_escalation_model,
+            "judge_ambiguous_band": self.config.judge_ambiguous_band,
+            "judge_max_disagreement": self.config.judge_max_disagreement,
+        }
+
     # TODO: change build_dataset, build_scorer to be private methods? 
 
-    def build_dataset(self) -> List[Sample]:
+    def build_dataset(self, sample_filter: SampleFilter | None = None) -> List[Sample]:
         """Build a dataset from this Question."""
-        samples = []
-        
+        return list(self.iter_samples(sample_filter))
+
+    def iter_samples(self, sample_filter: SampleFilter | None = None) -> Iterator[Sample]:
+        """Generate the samples of this Question one at a time.
+
+        Sample metadata only holds what differs between samples; settings shared by
+        the whole question (e.g. the judge prompts) are in `task_metadata`.
+
+        Args:
+            sample_filter: Only yield the samples whose (paraphrase index, sample index) it accepts.
+        """
+        from inspect_ai.dataset import Sample
+
+        target = self.config.target or ""
         for paraphrase_idx, paraphrase in enumerate(self.config.paraphrases):
             for sample_idx in range(self.config.samples_per_paraphrase):
+                if sample_filter is not None and not sample_filter(paraphrase_idx, sample_idx):
+                    continue
                 metadata: QuestionMetadata = {
                     "question_id": self.config.id,
                     "question_type": self.config.type,
                     "paraphrase_index": paraphrase_idx,
                     "sample_index": sample_idx,
-                    "judge_models": self.config.judge_models,
-                    "judge_prompts": self.config.judge_prompts
-                }            
+                }
 
                 # Create unique ID for each sample
                 sample_id = f"{self.config.id}_p{paraphrase_idx}_s{sample_idx}"
 
-                target = self.config.target or ""
-
                 # Generate a sample                
-                sample = Sample(
+                yield Sample(
                     input=paraphrase,  # Assuming string input, not ChatMessage
                     id=sample_id,
                     target=target,
                     metadata=metadata
                 )
-                samples.append(sample)
-        
-        return samples
     
-    def build_solver(self) -> list[Solver]:
-        """Build a solver for this Question."""
+    def build_solver(
+        self,
+        cache: CacheSetting | None = None,
+        limits: ModelLimits | None = None,
+        outputs: dict[tuple[str, str], str] | None = None,
+        bypass_cache: bool = False,
+    ) -> list[Solver]:
+        """Build a solver for this Question.
+
+        Args:
+            cache: Default generation cache setting, if the question doesn't set one.
+            limits: Optional per-model concurrency limits for the generate requests.
+            outputs: Precomputed completions by (model, sample id), replayed instead of generating.
+            bypass_cache: Neither read nor write the generation cache, even if the question sets one.
+        """
+        from inspect_ai.solver import generate, system_message
+        from easy_inspect.solver import generate_choices, generate_sample, replay
+
+        cache = False if bypass_cache else get_cache_policy(self.config.cache if self.config.cache is not None else cache)
         solver = []
         if self.config.system_prompt:
             solver.append(system_message(self.config.system_prompt))
-        solver.append(generate())
+        if outputs is not None:
+            solver.append(replay(outputs))
+        elif self.config.num_choices and self.config.num_choices > 1:
+            # Share one multi-choice request between several samples of the same paraphrase
+            num_choices = min(self.config.num_choices, self.config.samples_per_paraphrase)
+            solver.append(generate_choices(num_choices, cache=cache, limits=limits))
+        elif cache or limits is not None:
+            solver.append(generate_sample(cache=cache, limits=limits))
+        else:
+            solver.append(generate())
         return solver
     
-    def build_scorer(self) -> list[Scorer]:
+    def build_batch_requests(self, config: GenerateConfig | None = None) -> list[BatchRequest]:
+        """Generation requests of all the samples, for a provider batch job.
+
+        Args:
+            config: Runner generate config; the question's own settings take precedence.
+        """
+        from inspect_ai.model import GenerateConfig
+        from easy_inspect.batch import BatchRequest
+
+        config = (config or GenerateConfig()).merge(self.build_generate_config())
+        options = config.model_dump(include={"temperature", "max_tokens", "top_p", "seed"}, exclude_none=True)
+        system = [{"role": "system", "content": self.config.system_prompt}] if self.config.system_prompt else []
+        return [
+            BatchRequest(
+                custom_id=str(sample.id),
+                messages=[*system, {"role": "user", "content": sample.input}],
+                config=options,
+            )
+            for sample in self.iter_samples()
+        ]
+
+    def build_judge_batch_requests(
+        self,
+        model: str,
+        outputs: dict[tuple[str, str], str],
+    ) -> dict[str, list[BatchRequest]]:
+        """Judge requests rating the answers of `model`, for provider batch jobs, by judge model.
+
+        Each request's custom id is its judge cache key, so batch results can be put in
+        the judge cache and picked up by the scorers. Only the default judge mode
+        (one `model_graded_rating` request per judge prompt) is supported; other judge
+        modes, and escalations of a judge cascade, call their judges as usual.
+
+        Args:
+            model: The model that answered.
+            outputs: Completions by (model, sample id), e.g. from a generation batch job.
+        """
+        from inspect_ai.model import ModelName, ModelOutput, get_model
+        from inspect_ai.solver import TaskState
+        from easy_inspect.batch import BatchRequest
+        from easy_inspect.scorer import JudgeCache
+        from easy_inspect.scorer.model_graded_rating import (
+            DEFAULT_MODEL_GRADED_RATING_INSTRUCTIONS,
+            DEFAULT_MODEL_GRADED_RATING_TEMPLATE,
+            _score_prompt,
+        )
+
+        if self.config.type != "free_form_judge_0_100" or self.config.judge_mode not in (None, "separate"):
+            return {}
+        judge_models = self.config.judge_models
+        judge_models = judge_models if isinstance(judge_models, list) else [judge_models]
+
+        model = str(model)
+        requests: dict[str, dict[str, BatchRequest]] = {judge: {} for judge in judge_models}
+        for sample in self.iter_samples():
+            completion = outputs.get((model, str(sample.id)))
+            if completion is None:
+                continue
+            # The state the scorers will see for this sample
+            state = TaskState(
+                model=ModelName(model),
+                sample_id=sample.id,
+                epoch=1,
+                input=sample.input,
+                messages=[],
+                output=ModelOutput.from_content(model=model, content=completion),
+                metadata=sample.metadata,
+            )
+            for criterion in self.config.judge_prompts.values():
+                prompt = _score_prompt(
+                    state,
+                    DEFAULT_MODEL_GRADED_RATING_TEMPLATE,
+                    criterion,
+                    DEFAULT_MODEL_GRADED_RATING_INSTRUCTIONS,
+                    include_history=False,
+                )
+                for judge in judge_models:
+                    key = JudgeCache.key(get_model(judge), prompt)
+                    requests[judge][key] = BatchRequest(key, [{"role": "user", "content": prompt}])
+        return {judge: list(judge_requests.values()) for judge, judge_requests in requests.items() if judge_requests}
+
+    def build_generate_config(self) -> GenerateConfig:
+        """Build the generation config for this Question."""
+        from inspect_ai.model import GenerateConfig
+
+        return GenerateConfig(
+            temperature=self.config.temperature,
+            max_tokens=self.config.max_tokens,
+        )
+
+    def build_scorer(self, judge_cache: JudgeCache | None = None) -> list[Scorer]:
         """Build a scorer for this Question."""
-        if self.config.type == "free_form_judge_0_100":
+        from easy_inspect.scorer import (
+            dummy,
+            model_graded_logprob_rating,
+            model_graded_multi_rating,
+            model_graded_rating,
+        )
+
+        if self.config.type == "free_form_judge_0_100" and self.config.judge_mode == "batched":
+            # One judge request per sample covering all judge prompts
+            return [model_graded_multi_rating(
+                criteria=self.config.judge_prompts,
+                model=self.config.judge_models,
+                cache=judge_cache,
+            )]
+        elif self.config.type == "free_form_judge_0_100":
             scorers = []
+            rating_scorer = (
+                model_graded_logprob_rating if self.config.judge_mode == "logprobs" else model_graded_rating
+            )
+            cascade_args = {}
+            if self.config.judge_escalation_model:
+                # Only model_graded_rating (the default judge mode) supports a judge cascade
+                band = self.config.judge_ambiguous_band
+                cascade_args = {
+                    "escalation_model": self.config.judge_escalation_model,
+                    "ambiguous_band": tuple(band) if band is not None else None,
+                    "max_disagreement": self.config.judge_max_disagreement,
+                }
             for name, prompt in self.config.judge_prompts.items():
-                scorers.append(model_graded_rating(
+                scorers.append(rating_scorer(
                     name=name,
                     model=self.config.judge_models,
                     criterion=prompt,
+                    cache=judge_cache,
+                    **cascade_args,
                 ))
             return scorers
         elif self.config.type == "free_form":
@@ -139,3 +457,22 @@ class Question:
             raise NotImplementedError("Free form judge not implemented")
         else:
             raise ValueError(f"Unsupported question type: {self.config.type}")
+
+    def stale_scorers(self, metadata: dict) -> list[bool]:
+        """Which scorers of `build_scorer` must re-run to update scores made with other judge settings.
+
+        With one judge per prompt, only the judges of new or edited prompts are stale,
+        as long as the other judge settings are unchanged. Otherwise every scorer is.
+
+        Args:
+            metadata: Task metadata of the log holding the scores (see `task_metadata`).
+        """
+        if self.config.type != "free_form_judge_0_100" or self.config.judge_mode == "batched":
+            return [True] * len(self.build_scorer())
+        # Compare as they round-trip through the log, e.g. tuples become lists
+        current = json.loads(json.dumps(self.task_metadata()))
+        shared = [field for field in SCORING_FIELDS if field != "judge_prompts"]
+        if any(metadata.get(field) != current[field] for field in shared):
+            return [True] * len(self.config.judge_prompts)
+        old_prompts = metadata.get("judge_prompts") or {}
+        return [old_prompts.get(name) != prompt for name, prompt in self.config.judge_prompts.items()]
@@ -0,0 +1,126 @@
+from pathlib import Path
+from typing import Any, Iterator
+
+from inspect_ai.log import EvalLog, EvalSample, read_eval_log, read_eval_log_samples
+from inspect_ai.scorer import value_to_float
+
+SampleRow = dict[str, Any]
+
+# Columns present in every per-sample row, in order
+# Scorer columns (one per scorer name) follow these
+SAMPLE_COLUMNS = [
+    "question_id",
+    "model",
+    "paraphrase_index",
+    "sample_index",
+    "sample_id",
+    "epoch",
+    "input_tokens",
+    "output_tokens",
+    "total_tokens",
+    "latency",
+]
+
+to_float = value_to_float()
+
+def get_scorer_names(log: EvalLog) -> dict[str, str]:
+    """Map the scorer keys used in a log to the scorer names we report.
+
+    inspect_ai deduplicates scorers with the same registry name (e.g. several
+    `model_graded_rating` scorers become `model_graded_rating`, `model_graded_rating1`, ...).
+    If the name was set at runtime through the `name` parameter, we report that instead.
+    """
+    if log.results is None:
+        return {}
+    return {score.name: score.params.get("name", score.name) for score in log.results.scores}
+
+def get_sample_row(log: EvalLog, sample: EvalSample, scorer_names: dict[str, str]) -> SampleRow:
+    """Flatten a single sample into a row of scores, token usage and latency."""
+    usage = sample.model_usage.get(log.eval.model)
+    row = {
+        # Hacky way to get the question id from the task name
+        "question_id": log.eval.task.split("/")[-1],
+        "model": log.eval.model,
+        "paraphrase_index": sample.metadata.get("paraphrase_index"),
+        "sample_index": sample.metadata.get("sample_index"),
+        "sample_id": str(sample.id),
+        "epoch": sample.epoch,
+        "input_tokens": usage.input_tokens if usage else None,
+        "output_tokens": usage.output_tokens if usage else None,
+        "total_tokens": usage.total_tokens if usage else None,
+        "latency": sample.output.time,
+    }
+    for key, score in (sample.scores or {}).items():
+        if isinstance(score.value, dict):
+            # Scorers rating several criteria at once report one value per criterion
+            for name, value in score.value.items():
+                row[name] = to_float(value)
+        else:
+            name = scorer_names.get(key, key)
+            row[name] = to_float(score.value) if not isinstance(score.value, list) else None
+    return row
+
+def iter_sample_rows(log_path: str | Path) -> Iterator[SampleRow]:
+    """Stream the per-sample rows of a log, reading one sample at a time."""
+    log_path = str(log_path)
+    header = read_eval_log(log_path, header_only=True)
+    scorer_names = get_scorer_names(header)
+    for sample in read_eval_log_samples(log_path, all_samples_required=False):
+        yield get_sample_row(header, sample, scorer_names)
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Writing Parquet files requires pyarrow: pip install easy-inspect[parquet]"
+        ) from e
+    return pyarrow
+
+# Arrow types of the columns in SAMPLE_COLUMNS
+SAMPLE_COLUMN_TYPES = {
+    "question_id": "string",
+    "model": "string",
+    "paraphrase_index": "int64",
+    "sample_index": "int64",
+    "sample_id": "string",
+    "epoch": "int64",
+    "input_tokens": "int64",
+    "output_tokens": "int64",
+    "total_tokens": "int64",
+    "latency": "float64",
+}
+
+def sample_rows_schema(
+    score_columns: list[str],
+    columns: list[str] = SAMPLE_COLUMNS,
+    extra: dict[str, str] | None = None,
+):
+    """Arrow schema of per-sample rows: `columns`, then `extra` (name -> type alias), then float scores."""
+    pa = _import_pyarrow()
+    types = {**SAMPLE_COLUMN_TYPES, **(extra or {})}
+    return pa.schema(
+        [(name, pa.type_for_alias(types[name])) for name in [*columns, *(extra or {})]]
+        + [(name, pa.float64()) for name in score_columns]
+    )
+
+def write_sample_rows_parquet(
+    rows: Iterator[SampleRow],
+    path: str | Path,
+    score_columns: list[str],
+    batch_size: int = 10_000,
+) -> None:
+    """Write per-sample rows to a Parquet file in batches of `batch_size` rows."""
+    pa = _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    schema = sample_rows_schema(score_columns)
+    with pq.ParquetWriter(str(path), schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
@@ -1,84 +1,1025 @@
+from __future__ import annotations
+
+import asyncio
 import hashlib
-import pandas as pd
+import json
+import logging
+import os
+import time
+import weakref
 
 from pathlib import Path
-from inspect_ai import eval
-from inspect_ai.log import EvalLog, write_eval_log, read_eval_log
-from easy_inspect.question import Question
+from typing import TYPE_CHECKING, Callable, Iterator
+from inspect_ai import Task, eval_async, score_async
+from inspect_ai._display import display
+from inspect_ai._eval.task.task import PreviousTask
+from inspect_ai._util._async import run_coroutine
+from inspect_ai._util.display import display_type, init_display_type
+from inspect_ai._util.platform import platform_init
+from inspect_ai.log import EvalLog, write_eval_log, read_eval_log, read_eval_log_samples
+from inspect_ai.model import GenerateConfig
+from easy_inspect.adaptive import add_paraphrase_stats, get_next_sample_count
+from easy_inspect.batch import DEFAULT_POLL_INTERVAL, BatchBackend, BatchRequest, run_batch_async
+from easy_inspect.bootstrap import bootstrap_ci
+from easy_inspect.cache import CacheSetting, inspect_cache_dir, prune_cache_dir
+from easy_inspect.concurrency import ModelLimits
+from easy_inspect.index import IndexEntry, LogIndex, get_log_metrics
+from easy_inspect.locks import release_claim, try_claim
+from easy_inspect.merge import merge_logs, merge_scores
+from easy_inspect.question import Question, SampleFilter
+from easy_inspect.scorer import JudgeCache
+from easy_inspect.results import (
+    SAMPLE_COLUMNS,
+    SampleRow,
+    get_scorer_names,
+    iter_sample_rows,
+    write_sample_rows_parquet,
+)
+from easy_inspect.telemetry import TELEMETRY_COLUMNS, TelemetryRow, get_telemetry_rows, iter_log_telemetry
+from easy_inspect.warehouse import Warehouse
+
+# pandas is slow to import, so it is only loaded when building DataFrames
+if TYPE_CHECKING:
+    import pandas as pd
 
 def get_filename(question_hash: str | int, model_hash: str | int) -> Path:
     return hashlib.sha256(f"{question_hash}_{model_hash}".encode()).hexdigest()
 
+# Number of (question, model) cells a worker claims at a time when sharing a log directory
+CLAIM_BATCH_SIZE = 32
+
+def write_log_atomic(log: EvalLog, log_path: Path) -> None:
+    """Write a log so that other processes never see a partially written file."""
+    tmp_path = log_path.with_name(f".{log_path.name}.{os.getpid()}.tmp")
+    write_eval_log(log, str(tmp_path), format="eval")
+    os.replace(tmp_path, log_path)
+
+def parse_shard(shard: str) -> tuple[int, int]:
+    """Parse a shard spec "i/N" into (i, N)."""
+    try:
+        index, count = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{shard}': expected 'i/N', e.g. '0/4'")
+    if not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{shard}': expected 0 <= i < N")
+    return index, count
+
+# Generate config fields that only affect scheduling, not the model outputs
+# These are left out of the cache key
+CONCURRENCY_CONFIG_FIELDS = {"max_connections", "max_retries", "timeout"}
+
+logger = logging.getLogger(__name__)
+
+# inspect_ai allows a single `eval_async` call at a time per process (it changes the
+# working directory), so runners sharing an event loop wait for each other's calls:
+# their generation never overlaps
+_eval_locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = weakref.WeakKeyDictionary()
+
+def _eval_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    if loop not in _eval_locks:
+        _eval_locks[loop] = asyncio.Lock()
+    return _eval_locks[loop]
+
+def _reuse_keys(samples: list) -> list[tuple[str, int, int]]:
+    """Keys matching the samples of different versions of a question.
+
+    A sample is identified by its paraphrase text, the occurrence of that text among
+    the paraphrases (in `paraphrase_index` order) and its sample index. Paraphrases
+    can then move without losing their answers, while duplicate paraphrases don't
+    share theirs.
+    """
+    indices: dict[str, set[int]] = {}
+    for sample in samples:
+        indices.setdefault(sample.input, set()).add(sample.metadata["paraphrase_index"])
+    occurrences = {
+        (text, index): occurrence
+        for text, text_indices in indices.items()
+        for occurrence, index in enumerate(sorted(text_indices))
+    }
+    return [
+        (sample.input, occurrences[sample.input, sample.metadata["paraphrase_index"]], sample.metadata["sample_index"])
+        for sample in samples
+    ]
+
+def _cancelling() -> bool:
+    """Whether the running task was cancelled.
+
+    inspect_ai handles a cancelled `eval_async` by returning cancelled logs instead of
+    raising, so the runner checks this to save them and then re-raise.
+    """
+    task = asyncio.current_task()
+    return task is not None and task.cancelling() > 0
+
 class Runner:
 
     log_dir: Path
-    question: Question | None = None
+    questions: list[Question]
     models: list[str] | None = None
+    generate_config: GenerateConfig
+    judge_cache: JudgeCache | None = None
+    cache: CacheSetting | None = None
+    limits: ModelLimits | None = None
+    telemetry_hook: Callable[[list[TelemetryRow]], None] | None = None
+    warehouse: Warehouse | None = None
+    batch: BatchBackend | None = None
 
     def __init__(self, log_dir: str | Path = "./logs"):
         self.log_dir = Path(log_dir)
         # Put the base inspect logs in a subdirectory
         self.inspect_log_dir = self.log_dir / "inspect_logs"
+        # Put inspect's generation cache in a subdirectory too
+        self.cache_dir = self.log_dir / "cache"
+        # Failed or cancelled logs, kept so their completed samples can be reused
+        self.partial_dir = self.log_dir / "partial"
+        # Claims of the cells being run by workers sharing the log directory
+        self.claims_dir = self.log_dir / "claims"
+        # Ids of the submitted batch jobs waiting for results
+        self.batches_dir = self.log_dir / "batches"
+        self.questions = []
+        self.generate_config = GenerateConfig()
+        self.index = LogIndex(self.log_dir)
+
+    @property
+    def question(self) -> Question | None:
+        """The question being run, if the runner holds a single question."""
+        if len(self.questions) != 1:
+            return None
+        return self.questions[0]
 
     # Use builder pattern to set the question and models
 
     def with_question(self, question: Question):
-        self.question = question
+        return self.with_questions([question])
+
+    def with_questions(self, questions: list[Question]):
+        """Set several questions, which are run together in a single `eval` call."""
+        ids = [question.config.id for question in questions]
+        duplicates = sorted({id for id in ids if ids.count(id) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate question ids: {duplicates}")
+        self.questions = list(questions)
         return self
 
     def with_models(self, models: list[str]):
         self.models = models
         return self
 
-    def run(self):
-        """Run the question on a given set of models."""
+    def with_generate_config(self, config: GenerateConfig):
+        """Set generation options (e.g. max_connections) passed to every `eval` call."""
+        self.generate_config = config
+        return self
+
+    def with_judge_cache(self, path: str | Path | None = None, max_entries: int | None = None):
+        """Cache judge responses on disk, so unchanged judge requests are never re-sent.
+
+        Args:
+            path: SQLite file for the cache. Defaults to `judge_cache.sqlite` in the log directory.
+            max_entries: Maximum number of cached responses (least recently used are evicted).
+        """
+        path = path or self.log_dir / "judge_cache.sqlite"
+        kwargs = {"max_entries": max_entries} if max_entries else {}
+        self.judge_cache = JudgeCache(path, **kwargs)
+        return self
+
+    def with_cache(self, cache: CacheSetting = True):
+        """Cache model generations in the log directory.
+
+        Identical requests (same model, messages, config and sample index) are then
+        answered from the cache, e.g. across questions sharing paraphrases or when
+        re-running after a crash. Questions with their own `cache` setting keep it.
+        Models re-run with `force` or `refresh_models` bypass the cache.
+
+        Args:
+            cache: True, a `CachePolicy`, or the policy arguments as a dict
+                (e.g. `{"expiry": "1W", "per_epoch": False}`).
+        """
+        self.cache = cache
+        return self
+
+    def with_concurrency(
+        self,
+        limits: dict[str, int] | ModelLimits | None = None,
+        adaptive: bool = False,
+        default: int | None = None,
+        **limiter_args,
+    ):
+        """Limit the concurrent generate requests per provider or per model.
+
+        By default inspect_ai applies the same `max_connections` to every provider, so
+        fast providers are throttled like slow ones. Budgets are looked up by full
+        model name, then by provider. Judge requests are not limited.
+
+        Args:
+            limits: Maximum concurrent requests, e.g. `{"openai": 50, "anthropic/claude-3-5-sonnet-latest": 8}`.
+                Or a `ModelLimits`, to share one budget (and the adaptive limits learned so far)
+                between several runners, e.g. ones awaited concurrently with `run_async`.
+            adaptive: Start low and adjust the concurrency of each model AIMD-style, up to its
+                budget: raise it while latency stays healthy, halve it on rate limit responses.
+            default: Budget for models without one. Defaults to inspect_ai's default of 10.
+            **limiter_args: Further `AdaptiveLimiter` options (e.g. `initial`, `backoff`).
+        """
+        if isinstance(limits, ModelLimits):
+            if adaptive or default or limiter_args:
+                raise ValueError("Set the options of shared limits on the ModelLimits")
+            self.limits = limits
+            return self
+        kwargs = {"default": default} if default else {}
+        self.limits = ModelLimits(limits, adaptive=adaptive, **kwargs, **limiter_args)
+        return self
+
+    def concurrency_stats(self) -> pd.DataFrame:
+        """Requests, rate limits, final concurrency limit and achieved requests/sec per model.
+
+        Covers the requests made by this runner since `with_concurrency` was called.
+        """
+        import pandas as pd
+
+        if self.limits is None:
+            return pd.DataFrame()
+        return pd.DataFrame([{"model": model, **stats} for model, stats in self.limits.stats().items()])
+
+    def with_telemetry_hook(self, hook: Callable[[list[TelemetryRow]], None]):
+        """Call `hook` with the telemetry rows of each log as soon as `run` saves it.
+
+        Use this to export latency, token and throughput numbers to a metrics pipeline
+        while a long run is in progress. See `stats` for the rows.
+        """
+        self.telemetry_hook = hook
+        return self
+
+    def with_batch(
+        self,
+        backend: BatchBackend,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        timeout: float | None = None,
+    ):
+        """Run generation and judge requests through a provider batch API.
+
+        `run` then packs the generation requests of the grid into one batch job per
+        model, and the judge requests rating the answers into one batch job per judge
+        model, waits for them, and replays the results through the usual `eval` call,
+        so the cached logs are the same as for a normal run. Judge results are put in
+        the judge cache (see `with_judge_cache`, enabled if not set).
+
+        Args:
+            backend: Batch API, e.g. `OpenAIBatchBackend()` or `LocalBatchBackend(path)`.
+            poll_interval: Seconds between checks on the submitted batches.
+            timeout: Give up waiting for a batch after this many seconds.
+        """
+        self.batch = backend
+        self.batch_poll_interval = poll_interval
+        self.batch_timeout = timeout
+        if self.judge_cache is None:
+            self.with_judge_cache()
+        return self
+
+    def with_warehouse(self, path: str | Path | None = None, completion_chars: int | None = None):
+        """Keep the per-sample results in a Parquet dataset partitioned by question and model.
+
+        `run` and `rescore` add every log they save, and `load_results` and
+        `load_sample_results` are then answered from the dataset instead of the logs.
+        Logs cached before the warehouse was set are added by `compact`.
+
+        Args:
+            path: Directory of the dataset. Defaults to `warehouse` in the log directory.
+            completion_chars: Also store the first `completion_chars` characters of each completion.
+        """
+        self.warehouse = Warehouse(path or self.log_dir / "warehouse", completion_chars=completion_chars)
+        return self
+
+    def compact(self) -> int:
+        """Add the cached logs missing from the warehouse, and drop the files of deleted logs.
+
+        Returns:
+            The number of logs added.
+        """
+        if self.warehouse is None:
+            raise ValueError("No warehouse set, use `with_warehouse` first")
+        self.index.sync()
+        return self.warehouse.compact(self.log_dir / name for name in self.index.find())
+
+    def stats(self) -> pd.DataFrame:
+        """Telemetry of the cached logs for the current questions.
+
+        Returns a DataFrame with one row per (question, model, step), where the step is
+        "generation" for the answers or the name of a scorer for its judge calls:
+        request count, retries, cache hits, p50/p95/p99 latency in seconds, input and
+        output tokens, requests/sec over the run, rating parse failures and samples
+        escalated by a judge cascade.
+        """
+        import pandas as pd
+
+        self.index.sync()
+        rows = [row for name in self._find_log_entries() for row in iter_log_telemetry(self.log_dir / name)]
+        return pd.DataFrame(rows, columns=TELEMETRY_COLUMNS)
+
+    def cache_stats(self) -> pd.DataFrame:
+        """Generation cache usage of the cached logs for the current questions.
+
+        Returns a DataFrame with one row per (question, model): the number of
+        generate requests, cache reads and writes, and the hit rate.
+        """
+        import pandas as pd
+
+        self.index.sync()
+        rows = []
+        for name, entry in self._find_log_entries().items():
+            requests, reads, writes = 0, 0, 0
+            for sample in read_eval_log_samples(str(self.log_dir / name), all_samples_required=False):
+                # Only count the generation of the answers, not the judges (even if they are the same model)
+                scoring = False
+                for event in sample.events:
+                    if event.event == "step" and event.type == "scorer":
+                        scoring = event.action == "begin"
+                    elif event.event == "model" and not scoring:
+                        requests += 1
+                        reads += event.cache == "read"
+                        writes += event.cache == "write"
+            rows.append({
+                "question_id": entry["question_id"],
+                "model": entry["model"],
+                "requests": requests,
+                "cache_reads": reads,
+                "cache_writes": writes,
+                "hit_rate": reads / requests if requests else None,
+            })
+        return pd.DataFrame(rows)
+
+    def prune_cache(self, max_bytes: int | None = None) -> int:
+        """Delete expired generation cache entries, and the oldest ones beyond `max_bytes`.
+
+        Returns:
+            The size of the generation cache in bytes after pruning.
+        """
+        if not self.cache_dir.exists():
+            return 0
+        return prune_cache_dir(self.cache_dir, max_bytes)
+
+    def judge_cache_stats(self) -> dict[str, dict[str, int]]:
+        """Judge cache hits and misses per scorer name, for the runs made by this runner."""
+        if self.judge_cache is None:
+            return {}
+        return self.judge_cache.stats()
+
+    def get_model_hash(self, model: str) -> str:
+        """Identify a model together with the generation config it is run with."""
+        config = self.generate_config.model_dump(exclude_none=True, exclude=CONCURRENCY_CONFIG_FIELDS)
+        if not config:
+            return model
+        json_str = json.dumps({"model": model, "config": config}, sort_keys=True)
+        return hashlib.sha256(json_str.encode()).hexdigest()
+
+    def get_log_path(self, model: str, question: Question | None = None) -> Path:
+        """Path of the cached log for a question (default: the current one) and a model."""
+        question = question or self.question
+        log_path = self.log_dir / get_filename(question.hash(), self.get_model_hash(model))
+        return log_path.with_suffix(".eval")
+
+    def get_partial_log_path(self, model: str, question: Question | None = None) -> Path:
+        """Path of the partial (failed or cancelled) log for a question and a model."""
+        return self.partial_dir / self.get_log_path(model, question).name
+
+    def get_claim_path(self, model: str, question: Question | None = None) -> Path:
+        """Path of the claim file of the worker running a question and a model."""
+        return self.claims_dir / self.get_log_path(model, question).with_suffix(".claim").name
 
-        if not self.question:
+    def run(
+        self,
+        force: bool = False,
+        refresh_models: list[str] | None = None,
+        max_tasks: int | None = None,
+        max_samples: int | None = None,
+        max_connections: int | None = None,
+        shard: str | None = None,
+        claim: bool = False,
+    ):
+        """Run the questions on a given set of models.
+
+        (question, model) pairs that already have a cached log are skipped. Pairs
+        whose answers are cached but whose judge settings changed are rescored
+        (see `rescore`). All remaining pairs are submitted to `eval` together, so
+        the questions run in parallel rather than one after another.
+
+        Pairs whose last run failed or was cancelled are resumed from their partial
+        log: only the samples that errored or never ran are executed again, and the
+        result is cached as a single complete log.
+
+        The (question, model) grid can be split between several processes or hosts
+        sharing the log directory, either statically with `shard` or dynamically
+        with `claim`, or both. Use `verify` afterwards to find the missing cells.
+
+        Args:
+            force: Re-run all models, ignoring cached logs. The answers are generated
+                again without the generation cache (see `with_cache`), which is left as is.
+            refresh_models: Re-run only these models, ignoring their cached logs and
+                the generation cache.
+            max_tasks: Maximum number of (question, model) tasks to run in parallel.
+                Defaults to all of them; requests are still bounded per model by
+                `max_connections`.
+            max_samples: Maximum number of samples to run in parallel per task.
+            max_connections: Maximum number of concurrent connections per model.
+                Overrides the value in the runner's generate config. See `with_concurrency`
+                for per-provider and adaptive limits.
+            shard: Only run the cells of shard "i/N" (e.g. "0/4"). Cells are assigned
+                to shards by their cache key, so all workers agree on the split.
+            claim: Claim cells through claim files in the log directory before running
+                them, `CLAIM_BATCH_SIZE` at a time, and skip cells claimed or finished by
+                other workers. Workers can then share the grid as a pool.
+        """
+        # Like inspect_ai's `eval`, run in its task display (and its own event loop)
+        platform_init()
+        display().run_task_app(
+            self._run(force, refresh_models, max_tasks, max_samples, max_connections, shard, claim)
+        )
+
+    async def run_async(
+        self,
+        force: bool = False,
+        refresh_models: list[str] | None = None,
+        max_tasks: int | None = None,
+        max_samples: int | None = None,
+        max_connections: int | None = None,
+        shard: str | None = None,
+        claim: bool = False,
+    ):
+        """Like `run`, but awaitable from a running event loop, e.g. in a service or a notebook.
+
+        Evaluations go through `eval_async`, and logs are read and written in worker
+        threads. inspect_ai runs one evaluation at a time per process, so runners
+        awaited concurrently do not generate concurrently: each `eval_async` call waits
+        for the other runners' calls to finish. Only their batch waits, rescoring and
+        log I/O overlap. To generate the answers of several question sets at once, add
+        them all to one runner instead. Runners can still pass the same `ModelLimits`
+        to `with_concurrency`, to share the adaptive limits learned so far.
+
+        If the run is cancelled, the completed samples of the interrupted cells are
+        saved as partial logs, which the next run resumes, and the cancellation is
+        then re-raised.
+        """
+        if display_type() == "full":
+            # The full screen display needs an event loop of its own
+            init_display_type("rich")
+        await self._run(force, refresh_models, max_tasks, max_samples, max_connections, shard, claim)
+
+    async def _run(
+        self,
+        force: bool,
+        refresh_models: list[str] | None,
+        max_tasks: int | None,
+        max_samples: int | None,
+        max_connections: int | None,
+        shard: str | None,
+        claim: bool,
+    ):
+        if not self.questions:
             raise ValueError("Question not set")
         if not self.models:
             raise ValueError("Models not set")
+        if shard is not None:
+            shard_index, shard_count = parse_shard(shard)
+
+        started = time.time()
+        refresh_models = refresh_models or []
 
-        task = self.question.build_task()
-        # TODO: Filter tasks that have already been run
+        def is_done(question: Question, model: str) -> bool:
+            log_path = self.get_log_path(model, question)
+            if not log_path.exists():
+                return False
+            # Refreshed cells are done once a log was written during this run (e.g. by another worker)
+            return not (force or model in refresh_models) or log_path.stat().st_mtime >= started
+
+        cells = [
+            (question, model) for question in self.questions for model in self.models
+            if shard is None or int(self.get_log_path(model, question).stem, 16) % shard_count == shard_index
+        ]
+
+        config = self.generate_config.model_dump(exclude_none=True)
+        if max_connections is not None:
+            config["max_connections"] = max_connections
+
+        await asyncio.to_thread(self.index.sync)
+        attempted = set()
+        while True:
+            todo = [cell for cell in cells if cell not in attempted and not is_done(*cell)]
+            batch = self._claim_cells(todo, is_done) if claim else todo
+            if not batch:
+                break
+            attempted.update(batch)
+            try:
+                await self._run_cells(batch, force, refresh_models, config, max_tasks, max_samples)
+            finally:
+                if claim:
+                    for question, model in batch:
+                        release_claim(self.get_claim_path(model, question))
+
+    def verify(self) -> pd.DataFrame:
+        """Report the (question, model) cells without a cached log.
+
+        Run this after the workers of a sharded run are done. Workers write their logs
+        into the shared log directory, so nothing needs merging beyond syncing the index.
+
+        Returns:
+            A DataFrame with the question_id, model and status of each missing cell:
+            "partial" (the run failed, the next run resumes it), "claimed" (a worker is
+            running it, or died less than a day ago) or "missing" (never run).
+        """
+        import pandas as pd
+
+        self.index.sync()
+        rows = []
+        for question in self.questions:
+            for model in self.models:
+                if self.get_log_path(model, question).exists():
+                    continue
+                if self.get_partial_log_path(model, question).exists():
+                    status = "partial"
+                elif self.get_claim_path(model, question).exists():
+                    status = "claimed"
+                else:
+                    status = "missing"
+                rows.append({"question_id": question.config.id, "model": model, "status": status})
+        return pd.DataFrame(rows, columns=["question_id", "model", "status"])
+
+    def _claim_cells(self, cells: list[tuple[Question, str]], is_done) -> list[tuple[Question, str]]:
+        """Claim up to `CLAIM_BATCH_SIZE` cells that no other worker is running."""
+        claimed = []
+        for question, model in cells:
+            if len(claimed) == CLAIM_BATCH_SIZE:
+                break
+            claim_path = self.get_claim_path(model, question)
+            if not try_claim(claim_path):
+                continue
+            if is_done(question, model):
+                # Finished by another worker since we listed the cells
+                release_claim(claim_path)
+                continue
+            claimed.append((question, model))
+        return claimed
+
+    async def _run_cells(
+        self,
+        cells: list[tuple[Question, str]],
+        force: bool,
+        refresh_models: list[str],
+        config: dict,
+        max_tasks: int | None,
+        max_samples: int | None,
+    ):
+        """Rescore, resume or run (question, model) cells."""
+        # Find the models each question still has to be run on, and whether they bypass the generation cache
+        pending_models: dict[tuple[str, bool], list[str]] = {}
+        # Interrupted runs to resume, by model
+        resumable: dict[str, list[Question]] = {}
+        # Questions sampled in waves until a target precision, by model and whether they bypass the generation cache
+        adaptive: dict[tuple[str, bool], list[Question]] = {}
+        # Edited questions with cached samples to reuse, by model
+        reusable: dict[str, list[tuple[Question, EvalLog]]] = {}
+        questions_by_id = {}
+        for question, model in cells:
+            questions_by_id[question.config.id] = question
+            refresh = force or model in refresh_models
+            # Cached answers only need to be scored with the new judges
+            if not refresh and await self._rescore_cell(question, model):
+                continue
+            if question.config.is_adaptive():
+                if refresh:
+                    self.get_partial_log_path(model, question).unlink(missing_ok=True)
+                adaptive.setdefault((model, refresh), []).append(question)
+            elif not refresh and self.get_partial_log_path(model, question).exists():
+                resumable.setdefault(model, []).append(question)
+            elif not refresh and (reused_log := await self._find_reusable_samples(question, model)) is not None:
+                reusable.setdefault(model, []).append((question, reused_log))
+            else:
+                pending_models.setdefault((question.config.id, refresh), []).append(model)
+
+        # Group questions by their pending models, so each group is one `eval` call
+        pending: dict[tuple[tuple[str, ...], bool], list[Question]] = {}
+        for (id, refresh), models in pending_models.items():
+            pending.setdefault((tuple(models), refresh), []).append(questions_by_id[id])
+
+        for (models, refresh), questions in pending.items():
+            outputs = await self._run_batches(questions, list(models)) if self.batch is not None else None
+            tasks = [
+                question.build_task(self.judge_cache, self.cache, self.limits, outputs=outputs, bypass_cache=refresh)
+                for question in questions
+            ]
+            logs = await self._eval(tasks, list(models), config, max_tasks, max_samples)
+            await self._save_logs(logs, questions)
+
+        # A previous log is tied to one model, so resumed runs are grouped by model
+        for model, questions in resumable.items():
+            tasks = [await self._resume_task(question, model) for question in questions]
+            logs = await self._eval(tasks, [model], config, max_tasks, max_samples)
+            await self._save_logs(logs, questions)
+
+        for (model, refresh), questions in adaptive.items():
+            await self._run_adaptive(model, questions, config, max_tasks, max_samples, bypass_cache=refresh)
+
+        for model, reused in reusable.items():
+            await self._run_reused(model, reused, config, max_tasks, max_samples)
+
+    async def _find_reusable_samples(self, question: Question, model: str) -> EvalLog | None:
+        """Cached samples of `model` that `question` would generate the same way.
+
+        Looks through the cached logs of earlier versions of the question with the
+        same solver settings (see `QuestionConfig.solver_hash`), and matches samples
+        by paraphrase text and sample index (see `_reuse_keys`), so adding paraphrases
+        or samples keeps the answers we already have. The samples are renumbered to match `question`.
+
+        Returns:
+            A copy of the newest matching log holding the reusable samples, or None
+            if there are none.
+        """
+        entries = self.index.find(question_id=question.config.id, solver_hash=question.config.solver_hash())
+        model_hash = self.get_model_hash(model)
+        # The filename identifies the model and runner generate config the log was made with
+        names = [
+            name for name, entry in entries.items()
+            if name == f"{get_filename(entry['question_hash'], model_hash)}.eval"
+        ]
+        if not names:
+            return None
+
+        samples = list(question.iter_samples())
+        wanted = dict(zip(_reuse_keys(samples), samples))
+        reused = {}
+        logs = []
+        # Prefer the samples of the newest logs
+        for name in sorted(names, key=lambda name: (self.log_dir / name).stat().st_mtime, reverse=True):
+            log = await asyncio.to_thread(read_eval_log, str(self.log_dir / name))
+            logs.append(log)
+            for key, sample in zip(_reuse_keys(log.samples or []), log.samples or []):
+                if key in wanted and key not in reused and sample.error is None:
+                    current = wanted[key]
+                    reused[key] = sample.model_copy(update={
+                        "id": current.id,
+                        "metadata": current.metadata,
+                        "target": current.target,
+                    })
+        if not reused:
+            return None
+
+        reused_log = logs[0].model_copy()
+        reused_log.samples = list(reused.values())
+        reused_log.eval = reused_log.eval.model_copy(deep=True)
+        if any((log.eval.metadata or {}).get("scoring_hash") != question.config.scoring_hash() for log in logs):
+            # Some samples were scored differently (or by an older version), so `_run_reused` scores them again
+            reused_log.eval.metadata = {**(reused_log.eval.metadata or {}), "scoring_hash": None}
+        return reused_log
+
+    async def _run_reused(
+        self,
+        model: str,
+        reused: list[tuple[Question, EvalLog]],
+        config: dict,
+        max_tasks: int | None,
+        max_samples: int | None,
+    ):
+        """Generate the samples missing from the reusable cached samples, and merge them in."""
+        tasks = []
+        for question, reused_log in reused:
+            done = {
+                (sample.metadata["paraphrase_index"], sample.metadata["sample_index"])
+                for sample in reused_log.samples
+            }
+            if len(done) < len(question.config.paraphrases) * question.config.samples_per_paraphrase:
+                tasks.append(question.build_task(
+                    self.judge_cache,
+                    self.cache,
+                    self.limits,
+                    sample_filter=lambda paraphrase_index, sample_index, done=done: (
+                        (paraphrase_index, sample_index) not in done
+                    ),
+                ))
+        new_logs = {
+            log.eval.task.split("/")[-1]: log
+            for log in (await self._eval(tasks, [model], config, max_tasks, max_samples) if tasks else [])
+        }
+
+        merged = []
+        for question, reused_log in reused:
+            scorers = question.build_scorer(self.judge_cache)
+            if (reused_log.eval.metadata or {}).get("scoring_hash") != question.config.scoring_hash():
+                reused_log = await score_async(reused_log, scorers)
+            new_log = new_logs.get(question.config.id)
+            log = merge_logs([reused_log, new_log] if new_log else [reused_log], scorers)
+            log.samples.sort(key=lambda sample: (sample.metadata["paraphrase_index"], sample.metadata["sample_index"]))
+            log.eval.metadata = {**(log.eval.metadata or {}), **question.task_metadata()}
+            merged.append(log)
+        await self._save_logs(merged, [question for question, _ in reused])
+
+    async def _run_batches(self, questions: list[Question], models: list[str]) -> dict[tuple[str, str], str]:
+        """Generate the answers, and rate them with the judges, through batch jobs.
+
+        Returns the completions by (model, sample id). Judge completions go to the judge cache.
+        """
+        # Models may be given as `Model` objects, but `replay` looks the outputs up by name
+        models = [str(model) for model in models]
+        outputs: dict[tuple[str, str], str] = {}
+        for model in models:
+            requests = [
+                request for question in questions for request in question.build_batch_requests(self.generate_config)
+            ]
+            results = await self._run_batch(model, requests)
+            outputs.update({(model, id): completion for id, completion in results.items() if completion is not None})
+
+        # Judge requests depend on the answers, so they go in a second round of batches
+        judge_requests: dict[str, dict[str, BatchRequest]] = {}
+        for question in questions:
+            for model in models:
+                for judge, requests in question.build_judge_batch_requests(model, outputs).items():
+                    for request in requests:
+                        if request.custom_id not in self.judge_cache:
+                            judge_requests.setdefault(judge, {})[request.custom_id] = request
+        for judge, requests in judge_requests.items():
+            for key, completion in (await self._run_batch(judge, list(requests.values()))).items():
+                if completion is not None:
+                    self.judge_cache.set(key, completion)
+        return outputs
+
+    async def _run_batch(self, model: str, requests: list[BatchRequest]) -> dict[str, str | None]:
+        logger.info(f"Running a batch of {len(requests)} requests for {model}")
+        return await run_batch_async(
+            self.batch,
+            model,
+            requests,
+            self.batches_dir,
+            poll_interval=self.batch_poll_interval,
+            timeout=self.batch_timeout,
+        )
+
+    async def _run_adaptive(
+        self,
+        model: str,
+        questions: list[Question],
+        config: dict,
+        max_tasks: int | None,
+        max_samples: int | None,
+        bypass_cache: bool = False,
+    ):
+        """Sample adaptive questions in waves, until each paraphrase reaches its target precision.
+
+        Each wave is one `eval` call over the questions that still need samples. The
+        logs of the waves are merged into a single log per question, recording the
+        achieved sample count and confidence interval of each paraphrase. With
+        `bypass_cache`, the waves are generated without the generation cache.
+        """
+        # Logs of the waves so far, starting with the completed samples of an interrupted run
+        logs: dict[str, list[EvalLog]] = {question.config.id: [] for question in questions}
+        for question in questions:
+            partial_path = self.get_partial_log_path(model, question)
+            if partial_path.exists():
+                partial_log = await asyncio.to_thread(read_eval_log, str(partial_path))
+                partial_log.samples = [sample for sample in partial_log.samples or [] if sample.error is None]
+                # Failed samples are dropped, so they are run again if still needed
+                partial_log.status = "success"
+                logs[question.config.id].append(partial_log)
+
+        active = list(questions)
+        unfinished: set[str] = set()
+        try:
+            while active:
+                tasks, wave = [], []
+                for question in active:
+                    sample_filter = self._next_wave(question, logs[question.config.id])
+                    if sample_filter is not None:
+                        tasks.append(question.build_task(
+                            self.judge_cache, self.cache, self.limits, sample_filter, bypass_cache=bypass_cache,
+                        ))
+                        wave.append(question)
+                if not tasks:
+                    break
+
+                failed = set()
+                for log in await self._eval(tasks, [model], config, max_tasks, max_samples):
+                    id = log.eval.task.split("/")[-1]
+                    logs[id].append(log)
+                    if log.status != "success":
+                        failed.add(id)
+                active = [question for question in wave if question.config.id not in failed]
+                if _cancelling():
+                    raise asyncio.CancelledError
+        except asyncio.CancelledError:
+            # Questions cancelled between waves are saved as partial logs too, and `_save_logs` re-raises
+            unfinished = {question.config.id for question in active}
+
+        merged = []
+        for question in questions:
+            if logs[question.config.id]:
+                log = self._merge_adaptive_logs(question, logs[question.config.id])
+                if question.config.id in unfinished:
+                    log.status = "cancelled"
+                merged.append(log)
+        await self._save_logs(merged, questions)
+
+    def _merge_adaptive_logs(self, question: Question, logs: list[EvalLog]) -> EvalLog:
+        log = merge_logs(logs, question.build_scorer(self.judge_cache))
+        add_paraphrase_stats(log, question.config)
+        return log
+
+    def _next_wave(self, question: Question, logs: list[EvalLog]) -> SampleFilter | None:
+        """Samples of the next wave of a question, or None if every paraphrase is done."""
+        done: set[tuple[int, int]] = set()
+        counts = {index: 0 for index in range(len(question.config.paraphrases))}
+        stats = {}
+        if logs:
+            log = self._merge_adaptive_logs(question, logs)
+            for sample in log.samples:
+                if sample.error is None:
+                    done.add((sample.metadata["paraphrase_index"], sample.metadata["sample_index"]))
+            stats = {row["paraphrase_index"]: row for row in log.eval.metadata["paraphrase_stats"]}
+
+        score_columns = list(question.config.judge_prompts)
+        for index in counts:
+            counts[index] = get_next_sample_count(stats.get(index, {"n": 0}), score_columns, question.config)
+
+        def sample_filter(paraphrase_index: int, sample_index: int) -> bool:
+            return sample_index < counts[paraphrase_index] and (paraphrase_index, sample_index) not in done
+
+        wave_size = sum(
+            sample_filter(index, sample_index)
+            for index, count in counts.items()
+            for sample_index in range(count)
+        )
+        return sample_filter if wave_size else None
+
+    async def _eval(
+        self,
+        tasks: list[Task] | list[PreviousTask],
+        models: list[str],
+        config: dict,
+        max_tasks: int | None,
+        max_samples: int | None,
+    ) -> list[EvalLog]:
+        """Run `eval_async` on tasks and models with the runner's settings."""
+        if self.limits is not None and "max_connections" not in config:
+            # The per-model limits apply in the solver; don't let inspect_ai's limit bind first
+            config = {**config, "max_connections": self.limits.max_connections(models)}
 
         # Save the inspect logs somewhere else
-        logs: list[EvalLog] = eval(tasks = [task], model = self.models, log_dir = str(self.inspect_log_dir))
+        async with _eval_lock():
+            with inspect_cache_dir(self.cache_dir):
+                return await eval_async(
+                    tasks = tasks,
+                    model = models,
+                    log_dir = str(self.inspect_log_dir),
+                    max_tasks = max_tasks or len(tasks) * len(models),
+                    max_samples = max_samples,
+                    **config,
+                )
+
+    async def _resume_task(self, question: Question, model: str) -> PreviousTask:
+        """Task that re-runs a partial log, reusing its completed samples."""
+        partial_log = await asyncio.to_thread(read_eval_log, str(self.get_partial_log_path(model, question)))
+        return PreviousTask(
+            id=partial_log.eval.task_id,
+            task=question.build_task(self.judge_cache, self.cache, self.limits),
+            task_args={},
+            log=partial_log,
+        )
+
+    def rescore(self, models: list[str] | None = None) -> int:
+        """Score cached answers with the current judge settings, without regenerating them.
+
+        For each (question, model) pair without a cached log, looks for a cached log
+        whose answers were generated with the same settings (i.e. the same
+        `generation_hash`, which ignores the judge models and prompts) and re-runs
+        the scorers over its samples. Only the judges of new or edited prompts are
+        run if the other judge settings are unchanged (see `Question.stale_scorers`).
+        The rescored log is cached under the current question hash, and replaces
+        the partial log of an interrupted run of the pair, if any.
+
+        Args:
+            models: Models to rescore. Defaults to the runner's models.
+
+        Returns:
+            The number of logs that were rescored.
+        """
+        return run_coroutine(self._rescore(models))
+
+    async def _rescore(self, models: list[str] | None) -> int:
+        models = models if models is not None else self.models
+        if models is None:
+            raise ValueError("Models not set")
+        await asyncio.to_thread(self.index.sync)
+        rescored = 0
+        for question in self.questions:
+            for model in models:
+                if not self.get_log_path(model, question).exists():
+                    rescored += await self._rescore_cell(question, model)
+        return rescored
+
+    async def _rescore_cell(self, question: Question, model: str) -> bool:
+        """Rescore the cached answers for a question and a model, if there are any."""
+        source_path = self._find_generation_log(question, model)
+        if source_path is None:
+            return False
 
-        # Motivation for the subsequent code:
+        log_path = self.get_log_path(model, question)
+        source_log = await asyncio.to_thread(read_eval_log, str(source_path))
+        # Only the judges whose settings changed are run again
+        scorers = question.build_scorer(self.judge_cache)
+        stale = question.stale_scorers(source_log.eval.metadata or {})
+        stale_scorers = [scorer for scorer, is_stale in zip(scorers, stale) if is_stale]
+        rescored = await score_async(source_log, stale_scorers) if stale_scorers else source_log
+        log = merge_scores(source_log, rescored, scorers, stale)
+        log.eval.metadata = {**(log.eval.metadata or {}), **question.task_metadata()}
+        if question.config.is_adaptive():
+            # The precision reached by each paraphrase changes with the judges
+            add_paraphrase_stats(log, question.config)
+        if self.judge_cache is not None:
+            self.judge_cache.flush()
+        await asyncio.to_thread(self._cache_log, log, log_path)
+        # An interrupted run of the cell is superseded by the rescored log
+        self.get_partial_log_path(model, question).unlink(missing_ok=True)
+        return True
+
+    def _cache_log(self, log: EvalLog, log_path: Path):
+        """Write a complete log to the log cache, and add it to the index and warehouse."""
+        write_log_atomic(log, log_path)
+        self.index.add(log, log_path)
+        if self.warehouse is not None:
+            self.warehouse.add(log, log.samples or [], log_path.name)
+
+    def _find_generation_log(self, question: Question, model: str) -> Path | None:
+        """Find a cached log for this model with the answers `question` would generate."""
+        entries = self.index.find(
+            question_id=question.config.id,
+            generation_hash=question.config.generation_hash(),
+        )
+        model_hash = self.get_model_hash(model)
+        for name, entry in sorted(entries.items()):
+            # The filename identifies the model and runner generate config the log was made with
+            if name == f"{get_filename(entry['question_hash'], model_hash)}.eval":
+                return self.log_dir / name
+        return None
+
+    async def _save_logs(self, logs: list[EvalLog], questions: list[Question]):
+        """Copy the logs returned by `eval_async` into the log cache.
+
+        Re-raises the cancellation of the run once the logs are saved.
+        """
+
+        # Motivation for this code:
         # - inspect_ai's `eval` function doesn't allow caching previous runs. 
         # - We'd like to be able skip tasks that have already been run.
 
         # Implemented fix: 
         # - Write logs to a custom directory, with hash determined based on the question config
+        #   (including the solver and generation settings) and the model + runner generate config
         # - Check if the task has been run before by checking the log directory
+        # - Failed or cancelled logs are kept apart as partial logs, so the next run
+        #   only has to re-run the samples that errored or never ran
 
+        if self.judge_cache is not None:
+            self.judge_cache.flush()
+        questions_by_id = {question.config.id: question for question in questions}
         for log in logs:
-            question_hash = self.question.hash()
-            model_hash = log.eval.model
-            # New filename is a hash of the question and model
-            # TODO: Are there other relevant variables to include in the hash?
-            log_path = self.log_dir / get_filename(question_hash, model_hash)
-            log_path = log_path.with_suffix(".eval")
-            # Skip the failed logs
+            if self.telemetry_hook is not None:
+                self.telemetry_hook(get_telemetry_rows(log, log.samples or []))
+
+            question = questions_by_id[log.eval.task.split("/")[-1]]
+            log_path = self.get_log_path(log.eval.model, question)
+            partial_path = self.get_partial_log_path(log.eval.model, question)
             if log.status == "success":
-                write_eval_log(log, str(log_path), format="eval")
-            else: 
-                print(f"Skipping {log_path} because it failed")
+                await asyncio.to_thread(self._cache_log, log, log_path)
+                partial_path.unlink(missing_ok=True)
+                continue
 
-    def load_logs(self) -> list[EvalLog]:
-        """Load the results from the log directory."""
-        logs = []
-        for log_path in self.log_dir.glob("*.eval"):
-            log = read_eval_log(str(log_path))
-            if log.status != "success":
+            completed = [sample for sample in log.samples or [] if sample.error is None]
+            if not completed:
+                logger.warning(f"Skipping {log_path} because it failed")
                 continue
-            # Hacky way to check if the log is for the current question
-            if log.eval.task.split("/")[-1] == self.question.config.id:
-                logs.append(log)
-        return logs
+            partial_path.parent.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(write_log_atomic, log, partial_path)
+            logger.warning(
+                f"Run of {log.eval.task} on {log.eval.model} did not succeed ({log.status}); "
+                f"saved its {len(completed)} completed samples to {partial_path} to resume from"
+            )
+
+        if _cancelling():
+            raise asyncio.CancelledError
+
+    def load_logs(self) -> list[EvalLog]:
+        """Load the logs for the current questions from the log directory.
+
+        Only the logs listed in the index for these questions are opened.
+        """
+        self.index.sync()
+        return [read_eval_log(str(self.log_dir / name)) for name in self._find_log_entries()]
+
+    def _find_log_entries(self) -> dict[str, IndexEntry]:
+        """Index entries of the successful logs for the current questions."""
+        entries = {}
+        for question in self.questions:
+            entries.update(self.index.find(question_id=question.config.id, question_hash=question.hash()))
+        return dict(sorted(entries.items()))
 
     def parse_results(self, logs: list[EvalLog]) -> pd.DataFrame:
         """Parse the results from the logs into a DataFrame."""
+        import pandas as pd
+
         # NOTE: Parsing logic handles some quirks of the `run` method 
         # Hence why they are bundled together in the `Runner` class
         rows = []
@@ -95,29 +1036,115 @@ class Runner:
             }
 
             # Get the metrics
-            scores = log.results.scores
-            for score in scores:
-                # get the scorer name
-                if "name" in score.params:
-                    # If name was set at runtime, use that instead
-                    name = score.params["name"]
-                else:
-                    # Else, default to the scorer name
-                    name = score.name
-
-                metrics = score.metrics
-                for metric_name, metric in metrics.items():
-                    row[f"{name}/{metric_name}"] = metric.value
-
+            row.update(get_log_metrics(log))
             rows.append(row)
 
         df = pd.DataFrame(rows)
         return df
     
     def load_results(self) -> pd.DataFrame:
-        """Load the results from the log directory.
-        
-        Syntactic sugar for `load_logs` and `parse_results`.
+        """Load the results for the current questions from the log directory.
+
+        Equivalent to `parse_results(load_logs())`, but answered from the
+        aggregate metrics in the index without opening any logs. With a warehouse
+        (see `with_warehouse`), the mean and stderr of every score are computed
+        from the warehouse instead.
+        """
+        import pandas as pd
+
+        if self.warehouse is not None:
+            return self.warehouse.load_results(self._warehouse_filters())
+
+        self.index.sync()
+        rows = [
+            {"question_id": entry["question_id"], "model": entry["model"], **entry["metrics"]}
+            for entry in self._find_log_entries().values()
+        ]
+        return pd.DataFrame(rows)
+
+    async def load_results_async(self) -> pd.DataFrame:
+        """Like `load_results`, but reads the index, logs or warehouse in a worker thread."""
+        return await asyncio.to_thread(self.load_results)
+
+    def bootstrap_results(
+        self,
+        n_resamples: int = 1000,
+        confidence: float = 0.95,
+        cluster: str | None = "paraphrase_index",
+        seed: int | None = 0,
+    ) -> pd.DataFrame:
+        """Mean scores of the current questions with bootstrap confidence intervals.
+
+        Like `load_results`, one row per question and model, with `{score}/mean`,
+        `{score}/ci_low`, `{score}/ci_high` and `{score}/n` columns, which `models_plot`
+        draws as error bars. See `bootstrap_ci` for the arguments.
+        """
+        return bootstrap_ci(
+            self.load_sample_results(),
+            n_resamples=n_resamples,
+            confidence=confidence,
+            cluster=cluster,
+            seed=seed,
+        )
+
+    def load_paraphrase_stats(self) -> pd.DataFrame:
+        """Achieved sample count and 95% CI of each paraphrase of the adaptive questions.
+
+        Returns a DataFrame with one row per (question, model, paraphrase): n, whether
+        the target precision was reached, and the mean, stderr, ci_low and ci_high of
+        each judge score. Questions with a fixed sample count are left out.
+        """
+        import pandas as pd
+
+        self.index.sync()
+        rows = []
+        for name in self._find_log_entries():
+            header = read_eval_log(str(self.log_dir / name), header_only=True)
+            for stats in (header.eval.metadata or {}).get("paraphrase_stats", []):
+                rows.append({"question_id": header.eval.task.split("/")[-1], "model": header.eval.model, **stats})
+        return pd.DataFrame(rows)
+
+    def iter_sample_results(self) -> Iterator[SampleRow]:
+        """Stream one row per sample for the current questions.
+
+        Samples are read from the logs one at a time, so memory stays flat
+        regardless of the number of samples.
+        """
+        self.index.sync()
+        for name in self._find_log_entries():
+            yield from iter_sample_rows(self.log_dir / name)
+
+    def load_sample_results(self) -> pd.DataFrame:
+        """Load the per-sample results for the current questions.
+
+        Returns a tidy DataFrame with one row per sample: question_id, model,
+        paraphrase_index, sample_index, token usage, latency and one column per scorer.
+        """
+        import pandas as pd
+
+        if self.warehouse is not None:
+            return self.warehouse.query(self._warehouse_filters())
+
+        df = pd.DataFrame(self.iter_sample_results())
+        columns = SAMPLE_COLUMNS + sorted(set(df.columns) - set(SAMPLE_COLUMNS))
+        return df.reindex(columns=columns)
+
+    def _warehouse_filters(self) -> dict[str, list[str]]:
+        """Bring the warehouse up to date, and filter it on the current questions."""
+        self.compact()
+        return {
+            "question_id": [question.config.id for question in self.questions],
+            "question_hash": [question.hash() for question in self.questions],
+        }
+
+    def export_sample_results(self, path: str | Path, batch_size: int = 10_000):
+        """Write the per-sample results for the current questions to a Parquet file.
+
+        Rows are streamed from the logs and written in batches, without building a DataFrame.
         """
-        logs = self.load_logs()
-        return self.parse_results(logs)
+        self.index.sync()
+        score_columns = set()
+        for name in self._find_log_entries():
+            header = read_eval_log(str(self.log_dir / name), header_only=True)
+            score_columns.update(get_scorer_names(header).values())
+        write_sample_rows_parquet(self.iter_sample_results(), path, sorted(score_columns), batch_size)
@@ -1,7 +1,13 @@
 from .dummy import dummy
+from .judge_cache import JudgeCache
 from .model_graded_rating import model_graded_rating
+from .model_graded_multi_rating import model_graded_multi_rating
+from .model_graded_logprob_rating import model_graded_logprob_rating
 
 __all__ = [
     "dummy",
+    "JudgeCache",
     "model_graded_rating",
+    "model_graded_multi_rating",
+    "model_graded_logprob_rating",
 ]
\ No newline at end of file
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+from pathlib import Path
+
+from inspect_ai.model import GenerateConfig, Model
+
+# Default maximum number of judge responses kept in the cache
+DEFAULT_MAX_ENTRIES = 100_000
+# Number of pending writes (new entries and uses of existing ones) that triggers a flush
+FLUSH_SIZE = 100
+
+class JudgeCache:
+    """Persistent, content-addressed cache of judge model responses.
+
+    Entries are keyed by (judge model, fully formatted score prompt, generation config),
+    so a hit is only possible when the judge would have been sent exactly the same request.
+    The cache is bounded to `max_entries`; the least recently used entries are evicted first.
+
+    New entries and the use times of hits are kept in memory and written in one
+    transaction by `flush`, every `FLUSH_SIZE` writes, so scorers don't commit to
+    SQLite for every judged sample. Call `flush` when done (`Runner` does).
+
+    Hit and miss counts are tracked per scope (the scorer name), see `stats`.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._counts: dict[str, dict[str, int]] = {}
+        # key -> (completion, last used), not yet written
+        self._pending: dict[str, tuple[str, float]] = {}
+        # key -> last used, for existing entries
+        self._touched: dict[str, float] = {}
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS judge_cache ("
+            "key TEXT PRIMARY KEY, completion TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS judge_cache_last_used ON judge_cache (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(model: Model, prompt: str, config: GenerateConfig | None = None) -> str:
+        """Content address of a judge request, optionally generated with a per-call `config`."""
+        config = model.config.merge(config) if config else model.config
+        request = {
+            "model": str(model),
+            "prompt": prompt,
+            # Scheduling options don't change the response
+            "config": config.model_dump(
+                exclude_none=True, exclude={"max_connections", "max_retries", "timeout"}
+            ),
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str, scope: str = "") -> str | None:
+        """Return the cached judge completion for a key, or None on a miss."""
+        if key in self._pending:
+            completion = self._pending[key][0]
+        else:
+            row = self._conn.execute(
+                "SELECT completion FROM judge_cache WHERE key = ?", (key,)
+            ).fetchone()
+            completion = row[0] if row is not None else None
+        counts = self._counts.setdefault(scope, {"hits": 0, "misses": 0})
+        if completion is None:
+            counts["misses"] += 1
+            return None
+
+        counts["hits"] += 1
+        if key in self._pending:
+            self._pending[key] = (completion, time.time())
+        else:
+            self._touched[key] = time.time()
+            self._flush_if_full()
+        return completion
+
+    def set(self, key: str, completion: str) -> None:
+        """Store a judge response. It is written, and the cache bounded, on the next flush."""
+        self._pending[key] = (completion, time.time())
+        self._touched.pop(key, None)
+        self._flush_if_full()
+
+    def flush(self) -> None:
+        """Write the pending entries and use times, evicting the least recently used entries if needed."""
+        if not self._pending and not self._touched:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO judge_cache (key, completion, last_used) VALUES (?, ?, ?)",
+                [(key, completion, last_used) for key, (completion, last_used) in self._pending.items()],
+            )
+            self._conn.executemany(
+                "UPDATE judge_cache SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._touched.items()],
+            )
+            # Other runners or workers may share the file, so count its entries again
+            size = self._conn.execute("SELECT COUNT(*) FROM judge_cache").fetchone()[0]
+            if size > self.max_entries:
+                self._evict(size)
+        self._pending.clear()
+        self._touched.clear()
+
+    def _flush_if_full(self) -> None:
+        if len(self._pending) + len(self._touched) >= FLUSH_SIZE:
+            self.flush()
+
+    def _evict(self, size: int) -> None:
+        # Evict down to 90% of the bound, so we don't evict on every flush
+        target = int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM judge_cache WHERE key IN "
+            "(SELECT key FROM judge_cache ORDER BY last_used ASC LIMIT ?)",
+            (max(size - target, 0),),
+        )
+
+    def __contains__(self, key: str) -> bool:
+        """Whether a response is cached for a key, without counting a hit or miss."""
+        if key in self._pending:
+            return True
+        return self._conn.execute("SELECT 1 FROM judge_cache WHERE key = ?", (key,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._conn.execute("SELECT COUNT(*) FROM judge_cache").fetchone()[0]
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Hit and miss counts per scope (scorer name) since this cache was opened."""
+        return {scope: dict(counts) for scope, counts in self._counts.items()}
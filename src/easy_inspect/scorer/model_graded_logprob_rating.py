@@ -0,0 +1,181 @@
+import json
+import math
+from typing import Callable
+from functools import partial
+
+from inspect_ai.model import GenerateConfig, ModelOutput
+from inspect_ai.model._model import Model, get_model
+from inspect_ai.solver._task_state import TaskState
+
+from inspect_ai.scorer._metric import Score
+from inspect_ai.scorer._metrics import mean, stderr
+from inspect_ai.scorer._multi import multi_scorer
+from inspect_ai.scorer._scorer import Scorer, scorer
+from inspect_ai.scorer._target import Target
+
+from easy_inspect.scorer.judge_cache import JudgeCache
+from easy_inspect.scorer.model_graded_rating import (
+    DEFAULT_MODEL_GRADED_RATING_TEMPLATE,
+    MIN_SCORE,
+    MAX_SCORE,
+    _cached_judge,
+    _score_prompt,
+)
+
+# Minimalist instructions for the model to answer with the bare rating.
+# The rating is read from the distribution over the first output token, so no reasoning is requested.
+DEFAULT_MODEL_GRADED_LOGPROB_RATING_INSTRUCTIONS = """Please evaluate the answer based on the given criterion.
+Respond with only your numerical score between 0 and 100, and nothing else."""
+
+# Number of alternative tokens to request logprobs for
+# 20 is the maximum supported by OpenAI
+DEFAULT_TOP_LOGPROBS = 20
+
+@scorer(metrics=[mean(), stderr()])
+def model_graded_logprob_rating(
+    name: str, # NOTE: The name is not used here, but will be logged in the EvalResults, enabling us to distinguish between multiple scorers
+    criterion: str,
+    template: str | None = None,
+    instructions: str | None = None,
+    include_history: bool | Callable[[TaskState], str] = False,
+    model: list[str | Model] | str | Model | None = None,
+    top_logprobs: int = DEFAULT_TOP_LOGPROBS,
+    cache: JudgeCache | None = None,
+) -> Scorer:
+    """Score a question/answer task using the judge's token probabilities over ratings.
+
+    Instead of asking for reasoning followed by a rating, the judge is asked for the
+    bare number with a 1-2 token budget and `top_logprobs`. The score is the expected
+    rating under the probability distribution over numeric tokens (0-100). The probability
+    mass that fell on non-numeric tokens is reported in the score metadata as
+    `non_numeric_mass`, as a signal of how valid the rating is.
+
+    Requires a judge model that supports logprobs (e.g. OpenAI models). If no logprobs
+    are returned, falls back to parsing the completion as a number.
+
+    Args:
+        name (str): Name of the scorer.
+        criterion (str): The judge prompt to use for scoring.
+        template (str | None): Template for grading prompt, with the same variables as
+            for `model_graded_rating`. Defaults to DEFAULT_MODEL_GRADED_RATING_TEMPLATE.
+        instructions (str | None): Grading instructions for the model. Should ask for
+            the bare rating. Defaults to DEFAULT_MODEL_GRADED_LOGPROB_RATING_INSTRUCTIONS.
+        include_history (bool | Callable[[TaskState], str]): Whether to include the
+            full chat history in the presented question. If False (default), presents
+            only the original sample input. Can provide a function to customize how
+            the chat history is presented.
+        model (list[str | Model] | str | Model | None): Model(s) to use for grading.
+            If multiple models are passed, their ratings will be averaged. If None,
+            uses the model being evaluated.
+        top_logprobs (int): Number of most likely tokens to request logprobs for.
+        cache (JudgeCache | None): Persistent cache of judge responses.
+
+    Returns:
+        Scorer: A scoring function that returns normalized scores between 0 and 1.
+    """
+
+    # bind variables
+    get_scorer = partial(
+        _model_graded_logprob_rating_single,
+        criterion = criterion,
+        template = template or DEFAULT_MODEL_GRADED_RATING_TEMPLATE,
+        instructions = instructions or DEFAULT_MODEL_GRADED_LOGPROB_RATING_INSTRUCTIONS,
+        include_history = include_history,
+        config = GenerateConfig(max_tokens=2, logprobs=True, top_logprobs=top_logprobs),
+        cache = cache,
+        cache_scope = name,
+    )
+    # if only a single model is passed, return a single scorer
+    if model is None or not isinstance(model, list):
+        return get_scorer(model = model)
+
+    # otherwise, use multi scorer
+    assert isinstance(model, list)
+    scorers = [get_scorer(model = m) for m in model]
+    return multi_scorer(scorers, "mean")
+
+def _model_graded_logprob_rating_single(
+    criterion: str,
+    template: str,
+    instructions: str,
+    config: GenerateConfig,
+    include_history: bool | Callable[[TaskState], str] = False,
+    model: str | Model | None = None,
+    cache: JudgeCache | None = None,
+    cache_scope: str = "",
+) -> Scorer:
+    async def score(state: TaskState, target: Target) -> Score:
+        # resolve model
+        nonlocal model
+        model = model if isinstance(model, Model) else get_model(model)
+
+        score_prompt = _score_prompt(state, template, criterion, instructions, include_history)
+
+        # query the model for the rating distribution, unless we have already seen this exact request
+        # Only distributions with a rating are cached, so a parse failure is retried on the next run
+        response, output = await _cached_judge(
+            model,
+            score_prompt,
+            cache,
+            cache_scope,
+            is_valid=lambda response: _expected_rating(json.loads(response))[0] is not None,
+            response=lambda output: json.dumps(_token_distribution(output)),
+            config=config,
+        )
+        distribution = json.loads(response)
+        rating, numeric_mass = _expected_rating(distribution)
+        if rating is None:
+            return Score(
+                value=MIN_SCORE,
+                explanation="No numeric rating (0-100) among the judge's most likely tokens: "
+                + f"{distribution}",
+                metadata=dict(non_numeric_mass=1.0, parse_failure=True, judge_cache_hit=output is None),
+            )
+
+        return Score(
+            value=rating / MAX_SCORE,  # Normalize to 0-1 range
+            answer=state.output.completion,
+            explanation=f"Expected rating {rating:.2f} from token distribution {distribution}",
+            metadata=dict(
+                non_numeric_mass=1.0 - numeric_mass,
+                judge_cache_hit=output is None,
+            ),
+        )
+
+    return score
+
+def _token_distribution(output: ModelOutput) -> dict[str, float]:
+    """Probabilities of the most likely first output tokens.
+
+    If the model returned no logprobs, the whole completion is treated as a single token.
+    """
+    logprobs = output.choices[0].logprobs if output.choices else None
+    if logprobs is None or not logprobs.content:
+        return {output.completion: 1.0}
+
+    first = logprobs.content[0]
+    top = first.top_logprobs or []
+    distribution = {t.token: math.exp(t.logprob) for t in top}
+    distribution.setdefault(first.token, math.exp(first.logprob))
+    return distribution
+
+def _expected_rating(distribution: dict[str, float]) -> tuple[float | None, float]:
+    """Expected rating over the numeric tokens of a distribution, and their total probability.
+
+    Tokens that aren't integers between MIN_SCORE and MAX_SCORE are ignored. Returns
+    (None, 0.0) if no probability mass fell on numeric tokens.
+    """
+    numeric_mass = 0.0
+    weighted_sum = 0.0
+    for token, probability in distribution.items():
+        token = token.strip()
+        if not token.isdigit():
+            continue
+        rating = int(token)
+        if MIN_SCORE <= rating <= MAX_SCORE:
+            numeric_mass += probability
+            weighted_sum += rating * probability
+
+    if numeric_mass == 0:
+        return None, 0.0
+    return weighted_sum / numeric_mass, min(numeric_mass, 1.0)
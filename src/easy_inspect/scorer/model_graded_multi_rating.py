@@ -0,0 +1,174 @@
+import re
+from typing import Callable
+from functools import partial
+
+from inspect_ai.model._chat_message import (
+    ChatMessageAssistant,
+    ChatMessageUser,
+)
+from inspect_ai.model._model import Model, get_model
+from inspect_ai.solver._task_state import TaskState
+
+from inspect_ai.scorer._metric import Score
+from inspect_ai.scorer._metrics import mean, stderr
+from inspect_ai.scorer._multi import multi_scorer
+from inspect_ai.scorer._scorer import Scorer, scorer
+from inspect_ai.scorer._target import Target
+
+from easy_inspect.scorer.judge_cache import JudgeCache
+from easy_inspect.scorer.model_graded_rating import MIN_SCORE, MAX_SCORE, _cached_judge, _format_score_prompt
+
+# Minimalist template for the model to evaluate the answer based on several criteria at once.
+# Include the question, answer, criteria, and instructions.
+DEFAULT_MODEL_GRADED_MULTI_RATING_TEMPLATE = """You are evaluating an answer to a question based on several criteria.
+
+Question: {question}
+
+Answer: {answer}
+
+Criteria:
+{criteria}
+
+{instructions}
+"""
+
+# Minimalist instructions for the model to evaluate the answer based on each criterion.
+# Include the instruction to rate the answer between 0 and 100 for every criterion.
+DEFAULT_MODEL_GRADED_MULTI_RATING_INSTRUCTIONS = """Please evaluate the answer based on each criterion separately.
+For each criterion, include a line "JUDGE_RATING[name]: X" where name is the name of the criterion
+and X is your numerical score between 0 and 100. Rate every criterion."""
+
+# Regex pattern to extract the criterion name and numerical rating from the model response.
+# NOTE: Custom instructions should respect this pattern, or the scores will be invalid.
+DEFAULT_MODEL_GRADED_MULTI_RATING_PATTERN = r"JUDGE_RATING\[([^\]]+)\]:\s*(\d+)"
+
+@scorer(metrics={"*": [mean(), stderr()]})
+def model_graded_multi_rating(
+    criteria: dict[str, str],
+    template: str | None = None,
+    instructions: str | None = None,
+    rating_pattern: str | None = None,
+    include_history: bool | Callable[[TaskState], str] = False,
+    model: list[str | Model] | str | Model | None = None,
+    cache: JudgeCache | None = None,
+) -> Scorer:
+    """Score a question/answer task on several criteria with a single judge request per model.
+
+    Equivalent to one `model_graded_rating` scorer per criterion, but the question and
+    answer are sent to the judge once instead of once per criterion. The score value is
+    a dict of normalized ratings keyed by criterion name, so each criterion gets its own
+    `{name}/mean` and `{name}/stderr` metrics.
+
+    Args:
+        criteria (dict[str, str]): Judge prompts, keyed by criterion name.
+        template (str | None): Template for grading prompt. This template has
+            four variables: `question`, `answer`, `criteria`, and `instructions`.
+            Variables from sample `metadata` are also available in the template.
+            Defaults to DEFAULT_MODEL_GRADED_MULTI_RATING_TEMPLATE.
+        instructions (str | None): Grading instructions for the model. Should guide
+            the model to provide one rating per criterion matching the specified
+            `rating_pattern`. Defaults to DEFAULT_MODEL_GRADED_MULTI_RATING_INSTRUCTIONS.
+        rating_pattern (str | None): Regex to extract the ratings from the model
+            response. Should have two capture groups: the criterion name and a number
+            between 0-100. Defaults to DEFAULT_MODEL_GRADED_MULTI_RATING_PATTERN.
+        include_history (bool | Callable[[TaskState], str]): Whether to include the
+            full chat history in the presented question. If False (default), presents
+            only the original sample input. Can provide a function to customize how
+            the chat history is presented.
+        model (list[str | Model] | str | Model | None): Model(s) to use for grading.
+            If multiple models are passed, their ratings will be averaged. If None,
+            uses the model being evaluated.
+        cache (JudgeCache | None): Persistent cache of judge responses.
+
+    Returns:
+        Scorer: A scoring function that returns normalized scores between 0 and 1 per criterion.
+    """
+
+    # bind variables
+    get_scorer = partial(
+        _model_graded_multi_rating_single,
+        criteria = criteria,
+        template = template or DEFAULT_MODEL_GRADED_MULTI_RATING_TEMPLATE,
+        instructions = instructions or DEFAULT_MODEL_GRADED_MULTI_RATING_INSTRUCTIONS,
+        rating_pattern = rating_pattern or DEFAULT_MODEL_GRADED_MULTI_RATING_PATTERN,
+        include_history = include_history,
+        cache = cache,
+    )
+    # if only a single model is passed, return a single scorer
+    if model is None or not isinstance(model, list):
+        return get_scorer(model = model)
+
+    # otherwise, use multi scorer
+    assert isinstance(model, list)
+    scorers = [get_scorer(model = m) for m in model]
+    return multi_scorer(scorers, "mean")
+
+def _model_graded_multi_rating_single(
+    criteria: dict[str, str],
+    template: str,
+    instructions: str,
+    rating_pattern: str,
+    include_history: bool | Callable[[TaskState], str] = False,
+    model: str | Model | None = None,
+    cache: JudgeCache | None = None,
+) -> Scorer:
+    async def score(state: TaskState, target: Target) -> Score:
+        # resolve model
+        nonlocal model
+        model = model if isinstance(model, Model) else get_model(model)
+
+        score_prompt = _format_score_prompt(
+            state,
+            template,
+            include_history,
+            criteria="\n".join(f"[{name}]: {prompt}" for name, prompt in criteria.items()),
+            instructions=instructions,
+        )
+
+        # query the model for the scores, unless we have already seen this exact request
+        # Only complete answers are cached, so missing ratings are asked for again on the next run
+        completion, output = await _cached_judge(
+            model,
+            score_prompt,
+            cache,
+            ",".join(criteria),
+            is_valid=lambda completion: None not in _parse_ratings(completion, rating_pattern, list(criteria)).values(),
+        )
+        message = output.message if output is not None else ChatMessageAssistant(content=completion)
+
+        # fan the ratings back out to the criteria
+        ratings = _parse_ratings(completion, rating_pattern, list(criteria))
+        missing = [name for name, rating in ratings.items() if rating is None]
+        return Score(
+            value={
+                name: (rating if rating is not None else MIN_SCORE) / MAX_SCORE  # Normalize to 0-1 range
+                for name, rating in ratings.items()
+            },
+            answer=state.output.completion,
+            explanation=completion,
+            metadata=dict(
+                grading=[
+                    ChatMessageUser(content=score_prompt),
+                    message,
+                ],
+                missing_ratings=missing,
+                judge_cache_hit=output is None,
+            ),
+        )
+
+    return score
+
+def _parse_ratings(completion: str, rating_pattern: str, names: list[str]) -> dict[str, int | None]:
+    """Extract one rating per criterion name; criteria without a valid rating map to None."""
+    ratings: dict[str, int | None] = {name: None for name in names}
+    for name, value in re.findall(rating_pattern, completion):
+        name = name.strip()
+        # Use the first valid rating for each criterion
+        if name in ratings and ratings[name] is None:
+            try:
+                rating = int(value)
+            except ValueError:
+                continue
+            if MIN_SCORE <= rating <= MAX_SCORE:
+                ratings[name] = rating
+    return ratings
@@ -1,11 +1,15 @@
+import asyncio
 import re
+from dataclasses import dataclass
 from typing import Callable
 from functools import partial
 
 from inspect_ai._util.dict import omit
 from inspect_ai.model._chat_message import (
+    ChatMessageAssistant,
     ChatMessageUser,
 )
+from inspect_ai.model import GenerateConfig, ModelOutput
 from inspect_ai.model._model import Model, get_model
 from inspect_ai.solver._task_state import TaskState
 
@@ -16,6 +20,8 @@ from inspect_ai.scorer._scorer import Scorer, scorer
 from inspect_ai.scorer._target import Target
 from inspect_ai.scorer._model import chat_history
 
+from easy_inspect.scorer.judge_cache import JudgeCache
+
 MIN_SCORE = 0
 MAX_SCORE = 100
 
@@ -51,6 +57,10 @@ def model_graded_rating(
     rating_pattern: str | None = None,
     include_history: bool | Callable[[TaskState], str] = False,
     model: list[str | Model] | str | Model | None = None,
+    cache: JudgeCache | None = None,
+    escalation_model: str | Model | None = None,
+    ambiguous_band: tuple[int, int] | None = None,
+    max_disagreement: int | None = None,
 ) -> Scorer:
     """Score a question/answer task using a model to assign a numerical rating.
 
@@ -77,6 +87,17 @@ def model_graded_rating(
         model (list[str | Model] | str | Model | None): Model(s) to use for grading.
             If multiple models are passed, their ratings will be averaged. If None,
             uses the model being evaluated.
+        cache (JudgeCache | None): Persistent cache of judge responses. Requests
+            already in the cache are answered without calling the judge model.
+            Hits and misses are counted under the scorer `name`.
+        escalation_model (str | Model | None): Stronger judge for a cascade. If set,
+            the judges in `model` rate every sample, and only uncertain samples are
+            escalated to this model, whose rating is then used: samples where a rating
+            doesn't match `rating_pattern`, where the mean rating falls in
+            `ambiguous_band`, or where the ratings differ by more than `max_disagreement`.
+        ambiguous_band (tuple[int, int] | None): Ratings (0-100, inclusive) to escalate.
+        max_disagreement (int | None): Largest difference (0-100) between the ratings
+            of the judges in `model` that is not escalated.
 
     Returns:
         Scorer: A scoring function that returns normalized scores between 0 and 1.
@@ -90,7 +111,24 @@ def model_graded_rating(
         instructions = instructions or DEFAULT_MODEL_GRADED_RATING_INSTRUCTIONS,
         rating_pattern = rating_pattern or DEFAULT_MODEL_GRADED_RATING_PATTERN,
         include_history = include_history,
+        cache = cache,
+        cache_scope = name,
     )
+    if escalation_model is not None:
+        return _model_graded_rating_cascade(
+            criterion = criterion,
+            template = template or DEFAULT_MODEL_GRADED_RATING_TEMPLATE,
+            instructions = instructions or DEFAULT_MODEL_GRADED_RATING_INSTRUCTIONS,
+            rating_pattern = rating_pattern or DEFAULT_MODEL_GRADED_RATING_PATTERN,
+            include_history = include_history,
+            models = model if isinstance(model, list) else [model],
+            escalation_model = escalation_model,
+            ambiguous_band = ambiguous_band,
+            max_disagreement = max_disagreement,
+            cache = cache,
+            cache_scope = name,
+        )
+
     # if only a single model is passed, return a single scorer
     if model is None or not isinstance(model, list):
         return get_scorer(model = model)
@@ -107,61 +145,219 @@ def _model_graded_rating_single(
     rating_pattern: str,
     include_history: bool | Callable[[TaskState], str] = False,
     model: str | Model | None = None,
+    cache: JudgeCache | None = None,
+    cache_scope: str = "",
 ) -> Scorer:
     async def score(state: TaskState, target: Target) -> Score:
         # resolve model
         nonlocal model
         model = model if isinstance(model, Model) else get_model(model)
 
-        # metadata without template variables
-        metadata = omit(
-            state.metadata, ["question", "answer", "criterion", "instructions"]
+        score_prompt = _score_prompt(state, template, criterion, instructions, include_history)
+        judgement = await _judge(model, score_prompt, rating_pattern, cache, cache_scope)
+
+        if judgement.rating is not None:
+            return Score(
+                value=judgement.rating / MAX_SCORE,  # Normalize to 0-1 range
+                answer=state.output.completion,
+                explanation=judgement.completion,
+                metadata=dict(
+                    grading=[
+                        ChatMessageUser(content=score_prompt),
+                        judgement.message,
+                    ],
+                    judge_cache_hit=judgement.cache_hit,
+                ),
+            )
+
+        return Score(
+            value=MIN_SCORE,
+            explanation="Valid rating (0-100) not found in model output: "
+            + f"{judgement.completion}",
+            metadata=dict(parse_failure=True, judge_cache_hit=judgement.cache_hit),
         )
 
-        # present the question
-        if include_history:
-            question = chat_history(state)
-        elif callable(include_history):
-            question = include_history(state)
-        else:
-            question = state.input_text
-
-        # format the scoring template
-        score_prompt = template.format(
-            question=question,
-            answer=state.output.completion,
-            criterion=criterion,
-            instructions=instructions,
-            **metadata,
+    return score
+
+def _model_graded_rating_cascade(
+    criterion: str,
+    template: str,
+    instructions: str,
+    rating_pattern: str,
+    include_history: bool | Callable[[TaskState], str],
+    models: list[str | Model | None],
+    escalation_model: str | Model,
+    ambiguous_band: tuple[int, int] | None = None,
+    max_disagreement: int | None = None,
+    cache: JudgeCache | None = None,
+    cache_scope: str = "",
+) -> Scorer:
+    async def score(state: TaskState, target: Target) -> Score:
+        # resolve models
+        nonlocal models, escalation_model
+        models = [model if isinstance(model, Model) else get_model(model) for model in models]
+        escalation_model = escalation_model if isinstance(escalation_model, Model) else get_model(escalation_model)
+
+        score_prompt = _score_prompt(state, template, criterion, instructions, include_history)
+        judgements = await asyncio.gather(*[
+            _judge(model, score_prompt, rating_pattern, cache, cache_scope) for model in models
+        ])
+        ratings = [judgement.rating for judgement in judgements]
+        parsed = [rating for rating in ratings if rating is not None]
+        spread = max(parsed) - min(parsed) if len(parsed) > 1 else None
+
+        reasons = []
+        if len(parsed) < len(ratings):
+            reasons.append("parse_failure")
+        if parsed and ambiguous_band is not None and ambiguous_band[0] <= sum(parsed) / len(parsed) <= ambiguous_band[1]:
+            reasons.append("ambiguous")
+        if spread is not None and max_disagreement is not None and spread > max_disagreement:
+            reasons.append("disagreement")
+
+        rating = sum(parsed) / len(parsed) if parsed else None
+        escalation = None
+        if reasons:
+            escalation = await _judge(escalation_model, score_prompt, rating_pattern, cache, cache_scope)
+            judgements.append(escalation)
+            if escalation.rating is not None:
+                rating = escalation.rating
+
+        metadata = dict(
+            judge_ratings=ratings,
+            judge_spread=spread,
+            escalated=escalation is not None,
+            escalation_reasons=reasons,
+            escalation_rating=escalation.rating if escalation else None,
+            judge_cache_hit=all(judgement.cache_hit for judgement in judgements),
         )
+        if rating is not None:
+            final = escalation if escalation is not None and escalation.rating is not None else judgements[0]
+            return Score(
+                value=rating / MAX_SCORE,  # Normalize to 0-1 range
+                answer=state.output.completion,
+                explanation=final.completion,
+                metadata=dict(
+                    grading=[ChatMessageUser(content=score_prompt), final.message],
+                    **metadata,
+                ),
+            )
 
-        # query the model for the score
-        result = await model.generate(score_prompt)
-
-        # extract the rating
-        match = re.search(rating_pattern, result.completion)
-        if match:
-            try:
-                rating = int(match.group(1))
-                if MIN_SCORE <= rating <= MAX_SCORE:
-                    return Score(
-                        value=rating / MAX_SCORE,  # Normalize to 0-1 range
-                        answer=state.output.completion,
-                        explanation=result.completion,
-                        metadata=dict(
-                            grading=[
-                                ChatMessageUser(content=score_prompt),
-                                result.message,
-                            ]
-                        ),
-                    )
-            except ValueError:
-                pass
-            
         return Score(
             value=MIN_SCORE,
-            explanation="Valid rating (0-100) not found in model output: "
-            + f"{result.completion}",
+            explanation="Valid rating (0-100) not found in model outputs: "
+            + " | ".join(judgement.completion for judgement in judgements),
+            metadata=dict(parse_failure=True, **metadata),
         )
 
-    return score
\ No newline at end of file
+    return score
+
+@dataclass
+class _Judgement:
+    rating: int | None
+    completion: str
+    message: ChatMessageAssistant
+    cache_hit: bool
+
+def _score_prompt(
+    state: TaskState,
+    template: str,
+    criterion: str,
+    instructions: str,
+    include_history: bool | Callable[[TaskState], str],
+) -> str:
+    """Format the grading template of a single criterion for a sample."""
+    return _format_score_prompt(state, template, include_history, criterion=criterion, instructions=instructions)
+
+def _format_score_prompt(
+    state: TaskState,
+    template: str,
+    include_history: bool | Callable[[TaskState], str],
+    **variables: str,
+) -> str:
+    """Format a grading template for a sample, with the question, the answer and `variables`."""
+    # metadata without template variables
+    metadata = omit(
+        state.metadata, ["question", "answer", *variables]
+    )
+
+    # present the question
+    question = _present_question(state, include_history)
+
+    # format the scoring template
+    return template.format(
+        question=question,
+        answer=state.output.completion,
+        **variables,
+        **metadata,
+    )
+
+async def _judge(
+    model: Model,
+    score_prompt: str,
+    rating_pattern: str,
+    cache: JudgeCache | None,
+    cache_scope: str,
+) -> _Judgement:
+    """Ask a judge for its rating, unless we have already seen this exact request."""
+    completion, output = await _cached_judge(
+        model,
+        score_prompt,
+        cache,
+        cache_scope,
+        is_valid=lambda completion: _parse_rating(completion, rating_pattern) is not None,
+    )
+    message = output.message if output is not None else ChatMessageAssistant(content=completion)
+    return _Judgement(_parse_rating(completion, rating_pattern), completion, message, output is None)
+
+async def _cached_judge(
+    model: Model,
+    score_prompt: str,
+    cache: JudgeCache | None,
+    cache_scope: str,
+    is_valid: Callable[[str], bool],
+    response: Callable[[ModelOutput], str] = lambda output: output.completion,
+    config: GenerateConfig | None = None,
+) -> tuple[str, ModelOutput | None]:
+    """Send a grading prompt to a judge, unless we have already seen this exact request.
+
+    Only the responses accepted by `is_valid` are cached, so a parse failure is
+    retried on the next run.
+
+    Args:
+        response: What to keep (and cache) of the judge's output. Defaults to its completion.
+        config: Generation config of the judge request.
+
+    Returns:
+        The response, and the judge's output if the response wasn't cached.
+    """
+    cache_key = JudgeCache.key(model, score_prompt, config) if cache is not None else None
+    cached = cache.get(cache_key, cache_scope) if cache is not None else None
+    if cached is not None:
+        return cached, None
+
+    output = await model.generate(score_prompt, config=config or GenerateConfig())
+    result = response(output)
+    if cache is not None and is_valid(result):
+        cache.set(cache_key, result)
+    return result, output
+
+def _present_question(state: TaskState, include_history: bool | Callable[[TaskState], str]) -> str:
+    """Present the question to the judge, optionally with the full chat history."""
+    if include_history:
+        return chat_history(state)
+    elif callable(include_history):
+        return include_history(state)
+    else:
+        return state.input_text
+
+def _parse_rating(completion: str, rating_pattern: str) -> int | None:
+    """Extract a rating between MIN_SCORE and MAX_SCORE from the judge completion."""
+    match = re.search(rating_pattern, completion)
+    if match:
+        try:
+            rating = int(match.group(1))
+            if MIN_SCORE <= rating <= MAX_SCORE:
+                return rating
+        except ValueError:
+            pass
+    return None
@@ -0,0 +1,134 @@
+import asyncio
+
+from typing import Awaitable, Callable, TypeVar
+
+from inspect_ai.model import CachePolicy, GenerateConfig, ModelOutput, get_model
+from inspect_ai.model._generate_config import active_generate_config
+from inspect_ai.solver import Generate, Solver, TaskState, solver
+
+from easy_inspect.cache import scoped_cache_policy
+from easy_inspect.concurrency import ModelLimits
+
+T = TypeVar("T")
+
+async def _limited(limits: ModelLimits | None, request: Callable[[GenerateConfig], Awaitable[T]]) -> T:
+    """Run a generate request within the concurrency limit of the active model, if any.
+
+    `request` receives config overrides to apply. Adaptive limiters handle rate limits
+    themselves, so inspect_ai's own retries are turned off for them, and the limiter
+    gives up after the `max_retries` and `timeout` of the generate config instead.
+    Plain limits leave the retries to inspect_ai.
+    """
+    if limits is None:
+        return await request(GenerateConfig())
+    model = get_model()
+    limiter = limits.get(str(model))
+    config = GenerateConfig(max_retries=1) if limiter.adaptive else GenerateConfig()
+    active = active_generate_config()
+    return await limiter.run(
+        lambda: request(config),
+        model.api.is_rate_limit,
+        max_retries=active.max_retries,
+        timeout=active.timeout,
+    )
+
+@solver
+def generate_sample(cache: bool | CachePolicy = False, limits: ModelLimits | None = None) -> Solver:
+    """Generate output from the model, caching each sample separately.
+
+    Args:
+        cache: Caching behaviour for generate responses (defaults to no caching).
+        limits: Per-model concurrency limits for the generate requests.
+    """
+    async def solve(state: TaskState, generate: Generate) -> TaskState:
+        sample_cache = scoped_cache_policy(cache, sample_index=str(state.metadata["sample_index"]))
+        return await _limited(
+            limits, lambda config: generate(state, cache=sample_cache, **config.model_dump(exclude_none=True))
+        )
+
+    return solve
+
+def _forget_failed(requests: dict[tuple, asyncio.Future[ModelOutput]], key: tuple, request: asyncio.Future[ModelOutput]):
+    """Drop a failed or cancelled shared request, so the next sample of its block sends it again."""
+    if (request.cancelled() or request.exception() is not None) and requests.get(key) is request:
+        del requests[key]
+
+@solver
+def generate_choices(
+    num_choices: int,
+    cache: bool | CachePolicy = False,
+    limits: ModelLimits | None = None,
+) -> Solver:
+    """Generate several samples of the same paraphrase with a single multi-choice request.
+
+    Samples with the same paraphrase, epoch and model are grouped in blocks of
+    `num_choices` consecutive sample indices. The first sample of a block to run
+    issues one request with `num_choices` choices; every sample in the block then
+    takes the choice matching its sample index. Samples stay separate, so they are
+    still scored and reported individually.
+
+    Providers that don't support multiple choices return a single choice; the other
+    samples in the block then fall back to a normal generate call.
+
+    Args:
+        num_choices: Number of choices to request per generate call.
+        cache: Caching behaviour for generate responses (defaults to no caching).
+        limits: Per-model concurrency limits for the generate requests.
+    """
+    # (model, epoch, paraphrase index, block) -> shared request
+    requests: dict[tuple[str, int, int, int], asyncio.Future[ModelOutput]] = {}
+
+    async def solve(state: TaskState, generate: Generate) -> TaskState:
+        block, choice = divmod(state.metadata["sample_index"], num_choices)
+        key = (str(state.model), state.epoch, state.metadata["paraphrase_index"], block)
+        if key not in requests:
+            block_cache = scoped_cache_policy(cache, choice_block=str(block))
+            messages = list(state.messages)
+            request = asyncio.ensure_future(_limited(
+                limits,
+                lambda config: get_model().generate(
+                    messages, config=config.merge(GenerateConfig(num_choices=num_choices)), cache=block_cache
+                ),
+            ))
+            request.add_done_callback(lambda request, key=key: _forget_failed(requests, key, request))
+            requests[key] = request
+        # Shielded, so cancelling a sample (e.g. on its time limit) doesn't cancel the request of its block
+        output = await asyncio.shield(requests[key])
+
+        if choice >= len(output.choices):
+            # The provider returned fewer choices than requested
+            sample_cache = scoped_cache_policy(cache, sample_index=str(state.metadata["sample_index"]))
+            return await _limited(
+                limits, lambda config: generate(state, cache=sample_cache, **config.model_dump(exclude_none=True))
+            )
+
+        state.output = ModelOutput(
+            model=output.model,
+            choices=[output.choices[choice]],
+            # Only count the usage of the shared request once
+            usage=output.usage if choice == 0 else None,
+            time=output.time,
+        )
+        state.messages.append(output.choices[choice].message)
+        return state
+
+    return solve
+
+@solver
+def replay(outputs: dict[tuple[str, str], str]) -> Solver:
+    """Answer with precomputed completions, e.g. from a batch job, instead of calling the model.
+
+    Samples without a completion (e.g. their batch request failed) are generated as usual.
+
+    Args:
+        outputs: Completions by (model, sample id).
+    """
+    async def solve(state: TaskState, generate: Generate) -> TaskState:
+        completion = outputs.get((str(state.model), str(state.sample_id)))
+        if completion is None:
+            return await generate(state)
+        state.output = ModelOutput.from_content(model=str(state.model), content=completion)
+        state.messages.append(state.output.message)
+        return state
+
+    return solve
@@ -0,0 +1,131 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from inspect_ai.log import EvalLog, EvalSample, read_eval_log, read_eval_log_samples
+from inspect_ai.scorer import Score
+
+from easy_inspect.results import get_scorer_names
+
+TelemetryRow = dict[str, Any]
+
+# Step of the model calls made by the solver, i.e. generating the answers
+GENERATION_STEP = "generation"
+
+# Columns of the telemetry rows, one row per (question, model, step)
+# The step is either GENERATION_STEP or the name of a scorer
+TELEMETRY_COLUMNS = [
+    "question_id",
+    "model",
+    "step",
+    "requests",
+    "retries",
+    "cache_hits",
+    "latency_p50",
+    "latency_p95",
+    "latency_p99",
+    "input_tokens",
+    "output_tokens",
+    "requests_per_sec",
+    "parse_failures",
+    "escalations",
+]
+
+class _StepStats:
+    """Accumulates the model calls and scores of one step."""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.retries = 0
+        self.cache_hits = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.parse_failures = 0
+        self.escalations = 0
+
+    def add_model_call(self, event) -> None:
+        if event.pending:
+            # The call never completed, e.g. a rate limited attempt that was retried
+            self.retries += 1
+        elif event.cache == "read":
+            self.cache_hits += 1
+        else:
+            self.latencies.append(event.output.time or 0.0)
+            if event.output.usage:
+                self.input_tokens += event.output.usage.input_tokens
+                self.output_tokens += event.output.usage.output_tokens
+
+    def add_score(self, score: Score) -> None:
+        metadata = score.metadata or {}
+        self.cache_hits += bool(metadata.get("judge_cache_hit"))
+        self.parse_failures += bool(metadata.get("parse_failure")) + len(metadata.get("missing_ratings") or [])
+        # Samples a judge cascade escalated to its strong judge
+        self.escalations += bool(metadata.get("escalated"))
+
+    def row(self, elapsed: float | None) -> TelemetryRow:
+        import numpy as np
+
+        percentiles = np.percentile(self.latencies, [50, 95, 99]) if self.latencies else [None] * 3
+        return {
+            "requests": len(self.latencies),
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "latency_p50": percentiles[0],
+            "latency_p95": percentiles[1],
+            "latency_p99": percentiles[2],
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "requests_per_sec": len(self.latencies) / elapsed if elapsed else None,
+            "parse_failures": self.parse_failures,
+            "escalations": self.escalations,
+        }
+
+def _elapsed(log: EvalLog) -> float | None:
+    """Wall-clock duration of a run, in seconds."""
+    if not log.stats.started_at or not log.stats.completed_at:
+        return None
+    started = datetime.fromisoformat(log.stats.started_at)
+    completed = datetime.fromisoformat(log.stats.completed_at)
+    return (completed - started).total_seconds()
+
+def get_telemetry_rows(log: EvalLog, samples: Iterable[EvalSample]) -> list[TelemetryRow]:
+    """Summarize the model calls of a log, for answer generation and for each scorer.
+
+    Latency percentiles, token counts and requests/sec only cover the calls actually
+    sent to a model; cached responses are counted as cache hits instead. Judge calls
+    are attributed to their scorer through the scorer steps of each sample.
+
+    Args:
+        log: The log (the header is enough).
+        samples: The samples of the log, e.g. streamed with `read_eval_log_samples`.
+    """
+    scorer_names = get_scorer_names(log)
+    steps: dict[str, _StepStats] = {GENERATION_STEP: _StepStats()}
+    for sample in samples:
+        step = GENERATION_STEP
+        for event in sample.events:
+            if event.event == "step" and event.type == "scorer":
+                step = scorer_names.get(event.name, event.name) if event.action == "begin" else GENERATION_STEP
+            elif event.event == "model":
+                steps.setdefault(step, _StepStats()).add_model_call(event)
+        for key, score in (sample.scores or {}).items():
+            steps.setdefault(scorer_names.get(key, key), _StepStats()).add_score(score)
+
+    elapsed = _elapsed(log)
+    return [
+        {
+            # Hacky way to get the question id from the task name
+            "question_id": log.eval.task.split("/")[-1],
+            "model": log.eval.model,
+            "step": step,
+            **stats.row(elapsed),
+        }
+        for step, stats in steps.items()
+    ]
+
+def iter_log_telemetry(log_path: str | Path) -> Iterator[TelemetryRow]:
+    """Stream the telemetry rows of a log file, reading one sample at a time."""
+    log_path = str(log_path)
+    header = read_eval_log(log_path, header_only=True)
+    samples = read_eval_log_samples(log_path, all_samples_required=False)
+    yield from get_telemetry_rows(header, samples)
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import os
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+from urllib.parse import quote
+
+from inspect_ai.log import EvalLog, EvalSample, read_eval_log, read_eval_log_samples
+
+from easy_inspect.results import SAMPLE_COLUMNS, _import_pyarrow, get_sample_row, get_scorer_names, sample_rows_schema
+
+# pyarrow and pandas are only needed once the warehouse is written or queried
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Hive partitions of the warehouse, i.e. `question_id=<id>/model=<model>/` directories
+PARTITION_COLUMNS = ["question_id", "model"]
+
+# Columns stored in the Parquet files; the partition columns are stored in the paths
+FILE_COLUMNS = [column for column in SAMPLE_COLUMNS if column not in PARTITION_COLUMNS]
+
+class Warehouse:
+    """Per-sample results of many logs, stored as a partitioned Parquet dataset.
+
+    Each log becomes one Parquet file in `root/question_id=<id>/model=<model>/`,
+    named after the log. Queries filtering on the question id or model only open the
+    matching partitions, and other filters are pushed down to the Parquet row groups,
+    so results can be loaded without opening any `.eval` log.
+
+    Args:
+        root: Directory of the dataset.
+        completion_chars: Keep the first `completion_chars` characters of every
+            completion in a `completion` column. Completions are not stored by default.
+    """
+
+    def __init__(self, root: str | Path, completion_chars: int | None = None):
+        self.root = Path(root)
+        self.completion_chars = completion_chars
+
+    def get_partition_dir(self, question_id: str, model: str) -> Path:
+        # Model names contain slashes; pyarrow decodes the quoted values when reading
+        return self.root / f"question_id={quote(question_id, safe='')}" / f"model={quote(model, safe='')}"
+
+    def files(self) -> dict[str, Path]:
+        """The Parquet file of each log in the warehouse, keyed by log filename."""
+        return {f"{path.stem}.eval": path for path in sorted(self.root.glob("*/*/*.parquet"))}
+
+    def add(self, log: EvalLog, samples: Iterable[EvalSample], log_name: str) -> Path:
+        """Write the samples of a log to the warehouse, replacing any previous version of the log."""
+        pa = _import_pyarrow()
+        import pyarrow.parquet as pq
+
+        scorer_names = get_scorer_names(log)
+        question_hash = (log.eval.metadata or {}).get("question_hash")
+        rows = []
+        for sample in samples:
+            row = get_sample_row(log, sample, scorer_names)
+            row["question_hash"] = question_hash
+            if self.completion_chars is not None:
+                row["completion"] = sample.output.completion[: self.completion_chars]
+            rows.append(row)
+
+        extra = {"question_hash": "string"}
+        if self.completion_chars is not None:
+            extra["completion"] = "string"
+        score_columns = sorted({column for row in rows for column in row} - set(SAMPLE_COLUMNS) - set(extra))
+        schema = sample_rows_schema(score_columns, columns=FILE_COLUMNS, extra=extra)
+
+        path = self.get_partition_dir(log.eval.task.split("/")[-1], log.eval.model) / f"{Path(log_name).stem}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so queries never see a half-written file
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        pq.write_table(pa.Table.from_pylist(rows, schema=schema), str(tmp_path))
+        os.replace(tmp_path, path)
+        return path
+
+    def add_log_file(self, log_path: str | Path) -> Path:
+        """Write a log file to the warehouse, streaming its samples."""
+        header = read_eval_log(str(log_path), header_only=True)
+        samples = read_eval_log_samples(str(log_path), all_samples_required=False)
+        return self.add(header, samples, Path(log_path).name)
+
+    def compact(self, log_paths: Iterable[str | Path]) -> int:
+        """Bring the warehouse up to date with a set of logs.
+
+        Logs that are missing from the warehouse, or were rewritten since they were
+        added, are added. Files of logs that are not in `log_paths` are removed.
+
+        Returns:
+            The number of logs added.
+        """
+        files = self.files()
+        added = 0
+        for log_path in map(Path, log_paths):
+            path = files.pop(log_path.name, None)
+            if path is None or path.stat().st_mtime < log_path.stat().st_mtime:
+                if path is not None:
+                    # The question id or model of a log never changes, but be safe
+                    path.unlink()
+                self.add_log_file(log_path)
+                added += 1
+        for path in files.values():
+            path.unlink(missing_ok=True)
+        return added
+
+    def query(self, filters: dict[str, Any] | None = None, columns: list[str] | None = None) -> pd.DataFrame:
+        """Load per-sample rows matching `filters`.
+
+        Args:
+            filters: Column name -> value, or list of accepted values.
+                E.g. `{"question_id": ["q1", "q2"], "model": "openai/gpt-4o"}`.
+            columns: Columns to load. Defaults to all of them.
+
+        Returns:
+            A DataFrame with one row per sample: the columns of `load_sample_results`,
+            plus `question_hash` and, if stored, `completion`.
+        """
+        pa = _import_pyarrow()
+        import pandas as pd
+        import pyarrow.dataset as ds
+
+        partitioning = ds.partitioning(
+            pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]), flavor="hive"
+        )
+        expression = _filter_expression(filters or {})
+        files = [str(path) for path in self.files().values()]
+        if files:
+            dataset = ds.dataset(files, format="parquet", partitioning=partitioning, partition_base_dir=str(self.root))
+            # Prune partitions first, then unify the score columns of the remaining files
+            fragments = list(dataset.get_fragments(filter=expression))
+            files = [fragment.path for fragment in fragments]
+        if not files:
+            return pd.DataFrame(columns=columns or SAMPLE_COLUMNS)
+
+        schema = pa.unify_schemas([partitioning.schema, *(fragment.physical_schema for fragment in fragments)])
+        dataset = ds.dataset(
+            files, schema=schema, format="parquet", partitioning=partitioning, partition_base_dir=str(self.root)
+        )
+        df = dataset.to_table(columns=columns, filter=expression).to_pandas()
+        if columns is None:
+            df = df.reindex(columns=SAMPLE_COLUMNS + sorted(set(df.columns) - set(SAMPLE_COLUMNS)))
+        return df
+
+    def load_results(self, filters: dict[str, Any] | None = None) -> pd.DataFrame:
+        """Aggregate the rows matching `filters` into one row per question and model.
+
+        Every score column gets `{score}/mean` and `{score}/stderr` columns, like the
+        metrics reported by `Runner.load_results`.
+        """
+        import pandas as pd
+
+        df = self.query(filters)
+        score_columns = [
+            column for column in df.columns
+            if column not in SAMPLE_COLUMNS and column not in ("question_hash", "completion")
+        ]
+        rows = []
+        for (question_id, model), group in df.groupby(PARTITION_COLUMNS, sort=True):
+            row = {"question_id": question_id, "model": model}
+            for column in score_columns:
+                values = group[column].dropna()
+                if values.empty:
+                    continue
+                row[f"{column}/mean"] = values.mean()
+                row[f"{column}/stderr"] = values.sem() if len(values) > 1 else 0.0
+            rows.append(row)
+        return pd.DataFrame(rows, columns=None if rows else PARTITION_COLUMNS)
+
+def _filter_expression(filters: dict[str, Any]):
+    """Combine `{column: value or values}` filters into a pyarrow expression."""
+    import pyarrow.dataset as ds
+
+    expression = None
+    for column, value in filters.items():
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        term = ds.field(column).isin(values)
+        expression = term if expression is None else expression & term
+    return expression
@@ -0,0 +1,17 @@
+import pytest
+
+from easy_inspect.question import Question, QuestionConfig
+
+@pytest.fixture
+def make_question():
+    """Factory of small free-form questions. Keyword arguments override the config."""
+    def _make_question(id: str, **config) -> Question:
+        return Question(QuestionConfig(**{
+            "id": id,
+            "type": "free_form",
+            "paraphrases": ["What is 2+2?"],
+            "samples_per_paraphrase": 1,
+            **config,
+        }))
+
+    return _make_question
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from inspect_ai.model import ChatMessage, GenerateConfig, ModelAPI, ModelOutput, modelapi
+
+from easy_inspect.adaptive import get_next_sample_count, get_target_stderr
+from easy_inspect.question import Question, QuestionConfig
+from easy_inspect.runner import Runner
+
+MODEL = "mockllm/model"
+
+class RaterAPI(ModelAPI):
+    """Judge rating answers to the "easy" paraphrase 50, and others 0 or 100 at random."""
+
+    def __init__(self, model_name: str, base_url: str | None = None, api_key: str | None = None,
+                 config: GenerateConfig = GenerateConfig(), **model_args):
+        super().__init__(model_name, base_url, api_key, [], config)
+        self.random = random.Random(0)
+
+    async def generate(self, input: list[ChatMessage], tools, tool_choice, config: GenerateConfig) -> ModelOutput:
+        rating = 50 if "easy" in input[-1].text else self.random.choice([0, 100])
+        return ModelOutput.from_content(model=self.model_name, content=f"JUDGE_RATING: {rating}")
+
+@modelapi(name="rater")
+def rater():
+    return RaterAPI
+
+def make_config(**kwargs) -> QuestionConfig:
+    return QuestionConfig(**{
+        "id": "adaptive_test",
+        "type": "free_form_judge_0_100",
+        "paraphrases": ["An easy question?", "A hard question?"],
+        "samples_per_paraphrase": 16,
+        "judge_models": "rater/model",
+        "judge_prompts": {"quality": "Rate the quality"},
+        "target_stderr": 0.01,
+        "min_samples_per_paraphrase": 4,
+        **kwargs,
+    })
+
+def test_validation():
+    with pytest.raises(ValueError, match="requires judge scores"):
+        QuestionConfig(id="q", type="free_form", paraphrases=["?"], samples_per_paraphrase=4, target_stderr=0.1).validate()
+    with pytest.raises(ValueError, match="min_samples_per_paraphrase"):
+        make_config(min_samples_per_paraphrase=32).validate()
+
+def test_next_sample_count():
+    config = make_config(target_stderr=None, target_ci_width=0.196)
+    assert get_target_stderr(config) == pytest.approx(0.05)
+    # First wave
+    assert get_next_sample_count({"n": 0}, ["quality"], config) == 4
+    # Converged
+    assert get_next_sample_count({"n": 4, "quality/stderr": 0.01}, ["quality"], config) == 4
+    # Needs 4 * (0.06 / 0.05)^2 = 5.76 samples
+    assert get_next_sample_count({"n": 4, "quality/stderr": 0.06}, ["quality"], config) == 6
+    # At most doubles, and never goes past samples_per_paraphrase
+    assert get_next_sample_count({"n": 4, "quality/stderr": 0.5}, ["quality"], config) == 8
+    assert get_next_sample_count({"n": 12, "quality/stderr": 0.5}, ["quality"], config) == 16
+
+def test_adaptive_run_stops_converged_paraphrases(tmp_path):
+    question = Question(make_config())
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([MODEL])
+    runner.run()
+
+    log, = runner.load_logs()
+    easy, hard = log.eval.metadata["paraphrase_stats"]
+    # The easy paraphrase has no variance, so the first wave is enough
+    assert easy["n"] == 4 and easy["converged"]
+    assert easy["quality/mean"] == pytest.approx(0.5)
+    assert easy["quality/ci_low"] == easy["quality/ci_high"] == pytest.approx(0.5)
+    # The hard one never reaches the target and stops at samples_per_paraphrase
+    assert hard["n"] == 16 and not hard["converged"]
+    assert hard["quality/ci_low"] < hard["quality/mean"] < hard["quality/ci_high"]
+
+    assert len(log.samples) == 20
+    assert log.results.completed_samples == 20
+    df = runner.load_results()
+    assert df["quality/mean"].iloc[0] == pytest.approx(
+        sum(score.value for sample in log.samples for score in sample.scores.values()) / 20
+    )
+
+    stats = runner.load_paraphrase_stats()
+    assert list(stats["n"]) == [4, 16]
+    assert list(stats["question_id"]) == ["adaptive_test"] * 2
@@ -0,0 +1,132 @@
+import pytest
+
+from inspect_ai.model import get_model
+from easy_inspect.batch import BatchBackend, BatchRequest, LocalBatchBackend, run_batch
+from easy_inspect.question import Question, QuestionConfig
+from easy_inspect.runner import Runner
+
+MODEL = "mockllm/model"
+JUDGE = "mockllm/judge"
+
+@pytest.fixture
+def question():
+    return Question(QuestionConfig(
+        id="batch_test",
+        type="free_form_judge_0_100",
+        paraphrases=["What is 2+2?", "What is 3+3?"],
+        samples_per_paraphrase=2,
+        system_prompt="Answer in words.",
+        judge_models=JUDGE,
+        judge_prompts={"ethics": "Rate the ethics"},
+    ))
+
+def respond(model: str, request: BatchRequest) -> str:
+    if model == JUDGE:
+        return "JUDGE_RATING: 70"
+    assert request.messages[0] == {"role": "system", "content": "Answer in words."}
+    return f"answer to {request.messages[-1]['content']}"
+
+def test_batch_run(tmp_path, question):
+    service = LocalBatchBackend(tmp_path / "service", respond=respond)
+    runner = Runner(log_dir=tmp_path / "logs").with_question(question).with_models([MODEL])
+    runner.with_batch(service, poll_interval=0).run()
+
+    # One generation batch and one judge batch
+    assert len(list((tmp_path / "service").iterdir())) == 2
+    assert not any(runner.batches_dir.iterdir())
+
+    # The results are replayed into a normal cached log, without calling the models
+    log, = runner.load_logs()
+    assert sorted(sample.output.completion for sample in log.samples) == [
+        "answer to What is 2+2?", "answer to What is 2+2?", "answer to What is 3+3?", "answer to What is 3+3?",
+    ]
+    assert runner.load_results()["ethics/mean"].iloc[0] == pytest.approx(0.7)
+    stats = runner.stats().set_index("step")
+    assert stats["requests"].sum() == 0
+    assert stats.loc["ethics", "cache_hits"] == 4
+
+def test_batch_run_with_model_object(tmp_path, question):
+    service = LocalBatchBackend(tmp_path / "service", respond=respond)
+    runner = Runner(log_dir=tmp_path / "logs").with_question(question).with_models([get_model(MODEL)])
+    runner.with_batch(service, poll_interval=0).run()
+
+    # The batch results are replayed rather than generated again
+    log, = runner.load_logs()
+    assert all(sample.output.completion.startswith("answer to") for sample in log.samples)
+    assert runner.stats()["requests"].sum() == 0
+
+def test_batch_run_with_inspect_models(tmp_path, question):
+    runner = Runner(log_dir=tmp_path / "logs").with_question(question).with_models([MODEL])
+    runner.with_batch(LocalBatchBackend(tmp_path / "service"), poll_interval=0).run()
+    assert runner.get_log_path(MODEL).exists()
+
+class SlowBackend(BatchBackend):
+    """Batch service that completes batches once `done` is set."""
+
+    def __init__(self):
+        self.submitted = 0
+        self.done = False
+
+    def submit(self, model, requests):
+        self.submitted += 1
+        return "batch-1"
+
+    def status(self, batch_id):
+        return "completed" if self.done else "running"
+
+    def results(self, batch_id):
+        return {"a": "done"}
+
+def test_run_batch_resumes_submitted_batch(tmp_path):
+    backend = SlowBackend()
+    requests = [BatchRequest("a", [{"role": "user", "content": "hi"}])]
+    with pytest.raises(TimeoutError):
+        run_batch(backend, MODEL, requests, tmp_path, poll_interval=0, timeout=0)
+
+    # A restarted job waits for the same batch instead of submitting a new one
+    backend.done = True
+    assert run_batch(backend, MODEL, requests, tmp_path, poll_interval=0) == {"a": "done"}
+    assert backend.submitted == 1
+    assert list(tmp_path.iterdir()) == []
+
+class FakeOpenAIClient:
+    """Records uploaded batch files and serves canned results."""
+
+    class Object:
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+
+    def __init__(self):
+        self.uploaded = []
+        self.files = self.Object(create=self._create_file, content=self._file_content)
+        self.batches = self.Object(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, file, purpose):
+        self.uploaded.append(file.read().decode())
+        return self.Object(id="file-in")
+
+    def _file_content(self, file_id):
+        return self.Object(text=(
+            '{"custom_id": "a", "response": {"status_code": 200, "body": {"choices": [{"message": {"content": "4"}}]}}}\n'
+            '{"custom_id": "b", "response": {"status_code": 500, "body": {}}}'
+        ))
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        return self.Object(id="batch-1")
+
+    def _retrieve_batch(self, batch_id):
+        return self.Object(status="completed", output_file_id="file-out", error_file_id=None)
+
+def test_openai_batch_backend():
+    from easy_inspect.batch import OpenAIBatchBackend
+
+    client = FakeOpenAIClient()
+    backend = OpenAIBatchBackend(client)
+    requests = [BatchRequest(id, [{"role": "user", "content": "2+2?"}], {"temperature": 0.0}) for id in "ab"]
+    batch_id = backend.submit("openai/gpt-4o-mini", requests)
+
+    assert '"body": {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "2+2?"}], "temperature": 0.0}' in client.uploaded[0]
+    assert backend.status(batch_id) == "completed"
+    assert backend.results(batch_id) == {"a": "4", "b": None}
+    with pytest.raises(ValueError, match="openai"):
+        backend.submit("anthropic/claude-3-5-haiku-latest", requests)
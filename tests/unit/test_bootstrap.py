@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from easy_inspect.bootstrap import bootstrap_ci
+
+def make_samples(rng: np.random.Generator, paraphrases: int, samples: int, paraphrase_sd: float) -> pd.DataFrame:
+    """Scores of two models, with a random offset per paraphrase."""
+    rows = []
+    for model, mean in [("model_a", 0.3), ("model_b", 0.7)]:
+        for paraphrase_index in range(paraphrases):
+            offset = rng.normal(0, paraphrase_sd)
+            for sample_index in range(samples):
+                rows.append({
+                    "question_id": "q",
+                    "model": model,
+                    "paraphrase_index": paraphrase_index,
+                    "sample_index": sample_index,
+                    "ethics": mean + offset + rng.normal(0, 0.1),
+                    "constant": 1.0,
+                })
+    return pd.DataFrame(rows)
+
+def test_bootstrap_ci():
+    df = make_samples(np.random.default_rng(0), paraphrases=20, samples=50, paraphrase_sd=0.0)
+    # A missing score only drops that score
+    df.loc[0, "ethics"] = np.nan
+
+    results = bootstrap_ci(df, cluster=None, n_resamples=2000).set_index("model")
+    assert list(results.columns) == [
+        "question_id",
+        "ethics/mean", "ethics/ci_low", "ethics/ci_high", "ethics/n",
+        "constant/mean", "constant/ci_low", "constant/ci_high", "constant/n",
+    ]
+    assert list(results["ethics/n"]) == [999, 1000]
+    assert list(results["constant/ci_low"]) == list(results["constant/ci_high"]) == [1.0, 1.0]
+
+    # Close to the normal approximation for independent samples
+    for model, group in df.groupby("model"):
+        mean, sem = group["ethics"].mean(), group["ethics"].sem()
+        assert results.loc[model, "ethics/mean"] == pytest.approx(mean)
+        assert results.loc[model, "ethics/ci_low"] == pytest.approx(mean - 1.96 * sem, abs=0.2 * sem)
+        assert results.loc[model, "ethics/ci_high"] == pytest.approx(mean + 1.96 * sem, abs=0.2 * sem)
+
+def test_cluster_bootstrap_is_wider_for_correlated_samples():
+    df = make_samples(np.random.default_rng(0), paraphrases=10, samples=50, paraphrase_sd=0.1)
+    samples = bootstrap_ci(df, ["ethics"], cluster=None)
+    clusters = bootstrap_ci(df, ["ethics"], cluster="paraphrase_index")
+
+    width = lambda results: results["ethics/ci_high"] - results["ethics/ci_low"]
+    assert (width(clusters) > 2 * width(samples)).all()
+    assert list(clusters["ethics/mean"]) == pytest.approx(list(samples["ethics/mean"]))
+
+def test_bootstrap_ci_is_reproducible():
+    df = make_samples(np.random.default_rng(0), paraphrases=3, samples=5, paraphrase_sd=0.1)
+    pd.testing.assert_frame_equal(bootstrap_ci(df, seed=1), bootstrap_ci(df, seed=1))
+    with pytest.raises(ValueError, match="confidence"):
+        bootstrap_ci(df, confidence=95)
@@ -0,0 +1,174 @@
+import asyncio
+
+import pytest
+
+from inspect_ai.model import ChatMessage, GenerateConfig, ModelAPI, ModelOutput, modelapi
+
+from easy_inspect.concurrency import AdaptiveLimiter, ModelLimits
+from easy_inspect.question import Question, QuestionConfig
+from easy_inspect.runner import Runner
+
+class RateLimitError(Exception):
+    pass
+
+class FakeServer:
+    """Serves requests with a fixed latency, and rate limits beyond `capacity` concurrent requests."""
+
+    def __init__(self, capacity: int, latency: float = 0.01):
+        self.capacity = capacity
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def request(self) -> str:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.in_flight > self.capacity:
+                raise RateLimitError()
+            await asyncio.sleep(self.latency)
+            return "ok"
+        finally:
+            self.in_flight -= 1
+
+def is_rate_limit(ex: BaseException) -> bool:
+    return isinstance(ex, RateLimitError)
+
+def test_static_limit_bounds_concurrency():
+    server = FakeServer(capacity=100)
+    limiter = AdaptiveLimiter(max_limit=3)
+
+    async def main():
+        return await asyncio.gather(*[limiter.run(server.request, is_rate_limit) for _ in range(20)])
+
+    assert asyncio.run(main()) == ["ok"] * 20
+    assert server.max_in_flight == 3
+    assert limiter.stats()["requests"] == 20
+    assert limiter.stats()["requests_per_sec"] > 0
+
+def test_adaptive_limit_backs_off_on_rate_limits():
+    server = FakeServer(capacity=4)
+    limiter = AdaptiveLimiter(max_limit=32, adaptive=True, initial=2, backoff=0.001)
+
+    async def main():
+        return await asyncio.gather(*[limiter.run(server.request, is_rate_limit) for _ in range(200)])
+
+    assert asyncio.run(main()) == ["ok"] * 200
+    stats = limiter.stats()
+    # Probed past the capacity, got rate limited and settled below the budget
+    assert stats["rate_limits"] > 0
+    assert stats["requests"] == 200
+    assert stats["limit"] < 32
+
+def test_adaptive_limit_grows_while_healthy():
+    server = FakeServer(capacity=100)
+    limiter = AdaptiveLimiter(max_limit=16, adaptive=True, initial=1)
+
+    async def main():
+        return await asyncio.gather(*[limiter.run(server.request, is_rate_limit) for _ in range(200)])
+
+    asyncio.run(main())
+    assert limiter.stats()["rate_limits"] == 0
+    assert server.max_in_flight > 1
+
+def test_model_limits_lookup():
+    limits = ModelLimits({"openai": 50, "openai/gpt-4o": 5}, default=3)
+    assert limits.budget("openai/gpt-4o") == 5
+    assert limits.budget("openai/gpt-4o-mini") == 50
+    assert limits.budget("anthropic/claude-3-5-sonnet-latest") == 3
+    assert limits.max_connections(["openai/gpt-4o", "openai/gpt-4o-mini"]) == 55
+
+flaky_server = FakeServer(capacity=2)
+
+class FlakyAPI(ModelAPI):
+    """Local mock model that injects latency and rate limit errors."""
+
+    def __init__(self, model_name: str, base_url: str | None = None, api_key: str | None = None,
+                 config: GenerateConfig = GenerateConfig(), **model_args):
+        super().__init__(model_name, base_url, api_key, [], config)
+
+    async def generate(self, input: list[ChatMessage], tools, tool_choice, config: GenerateConfig) -> ModelOutput:
+        await flaky_server.request()
+        return ModelOutput.from_content(model=self.model_name, content="4")
+
+    def is_rate_limit(self, ex: BaseException) -> bool:
+        return is_rate_limit(ex)
+
+@modelapi(name="flaky")
+def flaky():
+    return FlakyAPI
+
+class ExhaustedAPI(FlakyAPI):
+    """Local mock model whose quota is exhausted: every request is rate limited."""
+
+    async def generate(self, input: list[ChatMessage], tools, tool_choice, config: GenerateConfig) -> ModelOutput:
+        raise RateLimitError()
+
+@modelapi(name="exhausted")
+def exhausted():
+    return ExhaustedAPI
+
+def test_runner_adaptive_concurrency(tmp_path):
+    question = Question(QuestionConfig(
+        id="concurrency_test",
+        type="free_form",
+        paraphrases=["What is 2+2?"],
+        samples_per_paraphrase=20,
+    ))
+    runner = (
+        Runner(log_dir=tmp_path)
+        .with_question(question)
+        .with_models(["flaky/model"])
+        .with_concurrency({"flaky": 8}, adaptive=True, initial=8, backoff=0.001)
+    )
+    runner.run()
+
+    assert runner.get_log_path("flaky/model").exists()
+    stats = runner.concurrency_stats()
+    assert list(stats["model"]) == ["flaky/model"]
+    assert list(stats["requests"]) == [20]
+    assert stats["rate_limits"].iloc[0] > 0
+    assert stats["limit"].iloc[0] < 8
+
+def test_rate_limit_retries_are_bounded():
+    server = FakeServer(capacity=0)
+    limiter = AdaptiveLimiter(adaptive=True, backoff=0.001, max_retries=3)
+
+    async def main():
+        await limiter.run(server.request, is_rate_limit)
+
+    with pytest.raises(RateLimitError):
+        asyncio.run(main())
+    assert limiter.stats()["rate_limits"] == 4
+
+def test_plain_limit_leaves_retries_to_inspect():
+    server = FakeServer(capacity=0)
+    limiter = AdaptiveLimiter(backoff=0.001)
+
+    async def main():
+        await limiter.run(server.request, is_rate_limit)
+
+    with pytest.raises(RateLimitError):
+        asyncio.run(main())
+    assert limiter.stats()["rate_limits"] == 1
+
+def test_runner_fails_samples_of_exhausted_model(tmp_path):
+    question = Question(QuestionConfig(
+        id="exhausted_test",
+        type="free_form",
+        paraphrases=["What is 2+2?"],
+        samples_per_paraphrase=2,
+    ))
+    runner = (
+        Runner(log_dir=tmp_path)
+        .with_question(question)
+        .with_models(["exhausted/model"])
+        .with_generate_config(GenerateConfig(max_retries=2))
+        .with_concurrency(adaptive=True, backoff=0.001)
+    )
+    runner.run()
+
+    assert not runner.get_log_path("exhausted/model").exists()
+    stats = runner.concurrency_stats()
+    assert list(stats["rate_limits"]) == [2 * 3]
+    assert list(stats["requests"]) == [0]
@@ -0,0 +1,45 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+# Heavy dependencies that must only be imported when the features needing them are used
+HEAVY_MODULES = ["inspect_ai", "pandas", "numpy", "seaborn", "matplotlib", "plotly"]
+
+# Import time budgets in seconds, generous enough for slow CI machines
+IMPORT_TIME_BUDGETS = {
+    "easy_inspect": 0.5,
+    "easy_inspect.loading": 0.5,
+}
+
+def run_python(code: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args, "-c", code], capture_output=True, text=True, check=True)
+
+@pytest.mark.parametrize("module", ["easy_inspect", "easy_inspect.loading", "easy_inspect.plotting"])
+def test_import_is_lightweight(module):
+    result = run_python(f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))")
+    loaded = {name.split(".")[0] for name in json.loads(result.stdout)}
+    assert loaded.isdisjoint(HEAVY_MODULES), loaded & set(HEAVY_MODULES)
+
+@pytest.mark.parametrize("module, budget", IMPORT_TIME_BUDGETS.items())
+def test_import_time_budget(module, budget):
+    result = run_python(f"import {module}", "-X", "importtime")
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, total, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(total) / 1e6
+    assert cumulative[module] < budget
+
+def test_lazy_attributes():
+    import easy_inspect
+    from easy_inspect.question import Question
+    from easy_inspect.runner import Runner
+
+    assert easy_inspect.Question is Question
+    assert easy_inspect.Runner is Runner
+    with pytest.raises(AttributeError):
+        easy_inspect.missing
@@ -0,0 +1,52 @@
+import pytest
+
+from easy_inspect.index import INDEX_FILENAME, LogIndex
+from easy_inspect.runner import Runner
+
+MODEL = "mockllm/model"
+
+@pytest.fixture
+def runner(tmp_path, make_question):
+    runner = Runner(log_dir=tmp_path).with_models([MODEL])
+    for id in ["index_q1", "index_q2"]:
+        runner.with_question(make_question(id)).run()
+    return runner
+
+def test_run_updates_index(runner, tmp_path, make_question):
+    assert (tmp_path / INDEX_FILENAME).exists()
+
+    index = LogIndex(tmp_path)
+    assert len(index.entries) == 2
+    entries = index.find(question_id="index_q1")
+    assert len(entries) == 1
+    (name, entry), = entries.items()
+    assert name == runner.with_question(make_question("index_q1")).get_log_path(MODEL).name
+    assert entry["question_hash"] == make_question("index_q1").hash()
+    assert entry["model"] == MODEL
+    assert entry["status"] == "success"
+
+def test_load_results_from_index(runner, make_question):
+    runner.with_question(make_question("index_q2"))
+    df = runner.load_results()
+    assert list(df["question_id"]) == ["index_q2"]
+    assert runner.parse_results(runner.load_logs()).equals(df)
+
+def test_sync_reconciles_with_disk(runner, tmp_path, make_question):
+    (tmp_path / INDEX_FILENAME).unlink()
+    index = LogIndex(tmp_path)
+    index.sync()
+    assert len(index.find()) == 2
+
+    runner.with_question(make_question("index_q1")).get_log_path(MODEL).unlink()
+    index.sync()
+    assert list(e["question_id"] for e in index.find().values()) == ["index_q2"]
+
+def test_sync_skips_unreadable_logs(runner, tmp_path, make_question):
+    (tmp_path / "junk.eval").touch()
+    index = LogIndex(tmp_path)
+    index.sync()
+    assert "junk.eval" not in index.entries
+    assert len(index.find()) == 2
+
+    runner.with_question(make_question("index_q1"))
+    assert list(runner.load_results()["question_id"]) == ["index_q1"]
@@ -1,6 +1,7 @@
 import pytest
 from pathlib import Path
-from easy_inspect.loading import load_question_from_yaml, load_question_from_yaml_dir
+from easy_inspect import loading
+from easy_inspect.loading import QuestionRegistry, load_question_from_yaml, load_question_from_yaml_dir
 from easy_inspect.question import Question
 
 @pytest.fixture
@@ -92,3 +93,78 @@ def test_load_question_from_yaml_dir(tmp_path):
     empty_dir.mkdir()
     with pytest.raises(ValueError, match="No question found with id"):
         load_question_from_yaml_dir("test", empty_dir)
+
+def test_question_registry(tmp_path, monkeypatch):
+    (tmp_path / "a.yaml").write_text("""
+- id: math_add
+  type: free_form
+  paraphrases: ["What is 2+2?"]
+  samples_per_paraphrase: 1
+  tags: [math, easy]
+- id: math_mul
+  type: free_form
+  paraphrases: ["What is 3*3?"]
+  samples_per_paraphrase: 1
+  tags: [math]
+""")
+    (tmp_path / "b.yaml").write_text("""
+- id: ethics_1
+  type: free_form
+  paraphrases: ["Is this ethical?"]
+  samples_per_paraphrase: 1
+""")
+    registry = QuestionRegistry(tmp_path)
+    assert sorted(registry.ids()) == ["ethics_1", "math_add", "math_mul"]
+    assert [q.config.id for q in registry.load_all()] == registry.ids()
+    assert sorted(q.config.id for q in registry.select("math_*")) == ["math_add", "math_mul"]
+    assert [q.config.id for q in registry.select(tags=["math", "easy"])] == ["math_add"]
+
+    # Unchanged files are not re-parsed
+    parsed = []
+    real_load_yaml = loading._load_yaml
+    def _load_yaml(path):
+        parsed.append(path.name)
+        return real_load_yaml(path)
+    monkeypatch.setattr(loading, "_load_yaml", _load_yaml)
+    registry.load("math_add")
+    assert parsed == []
+
+    (tmp_path / "b.yaml").write_text("""
+- id: ethics_2
+  type: free_form
+  paraphrases: ["Is this ethical?"]
+  samples_per_paraphrase: 1
+""")
+    assert registry.load("ethics_2").config.id == "ethics_2"
+    assert parsed == ["b.yaml"]
+
+    with pytest.raises(ValueError, match="No question found with id"):
+        registry.load("ethics_1")
+
+def test_question_registry_duplicate_ids(tmp_path, monkeypatch):
+    question = """
+- id: dup
+  type: free_form
+  paraphrases: ["test"]
+  samples_per_paraphrase: 1
+"""
+    (tmp_path / "a.yaml").write_text(question)
+    (tmp_path / "b.yaml").write_text(question)
+    registry = QuestionRegistry(tmp_path)
+    with pytest.raises(ValueError, match="Multiple questions found with id 'dup'"):
+        registry.ids()
+
+    # The error is raised again without re-parsing the files, until they change
+    parsed = []
+    real_load_yaml = loading._load_yaml
+    def _load_yaml(path):
+        parsed.append(path.name)
+        return real_load_yaml(path)
+    monkeypatch.setattr(loading, "_load_yaml", _load_yaml)
+    with pytest.raises(ValueError, match="Multiple questions found with id 'dup'"):
+        registry.load("dup")
+    assert parsed == []
+
+    (tmp_path / "b.yaml").write_text(question.replace("dup", "other"))
+    assert sorted(registry.ids()) == ["dup", "other"]
+    assert parsed == ["b.yaml"]
@@ -0,0 +1,261 @@
+import asyncio
+import math
+
+import pytest
+from inspect_ai.model import (
+    ChatMessage,
+    GenerateConfig,
+    Logprob,
+    Logprobs,
+    ModelAPI,
+    ModelName,
+    ModelOutput,
+    TopLogprob,
+    get_model,
+    modelapi,
+)
+from inspect_ai.scorer import Target
+from inspect_ai.solver import TaskState
+
+from easy_inspect.question import Question, QuestionConfig
+from easy_inspect.runner import Runner
+from easy_inspect.scorer import JudgeCache, model_graded_logprob_rating, model_graded_rating
+from easy_inspect.scorer.model_graded_logprob_rating import _expected_rating
+from easy_inspect.scorer.model_graded_multi_rating import (
+    DEFAULT_MODEL_GRADED_MULTI_RATING_PATTERN,
+    _parse_ratings,
+)
+
+MODEL = "mockllm/model"
+
+class FixedRaterAPI(ModelAPI):
+    """Judge giving every answer the same valid rating."""
+
+    def __init__(self, model_name: str, base_url: str | None = None, api_key: str | None = None,
+                 config: GenerateConfig = GenerateConfig(), **model_args):
+        super().__init__(model_name, base_url, api_key, [], config)
+
+    async def generate(self, input: list[ChatMessage], tools, tool_choice, config: GenerateConfig) -> ModelOutput:
+        return ModelOutput.from_content(model=self.model_name, content="JUDGE_RATING: 70")
+
+@modelapi(name="fixed_rater")
+def fixed_rater():
+    return FixedRaterAPI
+
+def test_judge_cache_lru(tmp_path):
+    cache = JudgeCache(tmp_path / "judge.sqlite", max_entries=10)
+    model = get_model(MODEL)
+    keys = [JudgeCache.key(model, f"prompt {i}") for i in range(11)]
+
+    assert cache.get(keys[0], "criterion") is None
+    for i, key in enumerate(keys[:10]):
+        cache.set(key, f"JUDGE_RATING: {i}")
+    assert cache.get(keys[0], "criterion") == "JUDGE_RATING: 0"
+    assert cache.stats() == {"criterion": {"hits": 1, "misses": 1}}
+
+    # keys[1] is now the least recently used entry
+    cache.set(keys[10], "JUDGE_RATING: 10")
+    assert len(cache) <= 10
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+
+    # The cache persists across instances
+    assert JudgeCache(tmp_path / "judge.sqlite").get(keys[10]) == "JUDGE_RATING: 10"
+
+def test_judge_cache_shared_file_is_bounded(tmp_path):
+    model = get_model(MODEL)
+    caches = [JudgeCache(tmp_path / "judge.sqlite", max_entries=10) for _ in range(2)]
+    for i in range(8):
+        for j, cache in enumerate(caches):
+            cache.set(JudgeCache.key(model, f"prompt {i} {j}"), "JUDGE_RATING: 50")
+    # Entries are written on flush, and each flush counts those of the other cache too
+    assert JudgeCache(tmp_path / "judge.sqlite").get(JudgeCache.key(model, "prompt 0 0")) is None
+    for cache in caches:
+        cache.flush()
+    assert len(JudgeCache(tmp_path / "judge.sqlite")) <= 10
+
+def test_runner_judge_cache(tmp_path):
+    question = Question(QuestionConfig(
+        id="judge_cache_test",
+        type="free_form_judge_0_100",
+        paraphrases=["Is this ethical?"],
+        samples_per_paraphrase=2,
+        judge_models="fixed_rater/model",
+        judge_prompts={"ethics": "Rate the ethics"},
+    ))
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([MODEL]).with_judge_cache()
+
+    runner.run()
+    # mockllm gives identical answers, so the second sample is judged from the cache
+    assert runner.judge_cache_stats() == {"ethics": {"hits": 1, "misses": 1}}
+
+    runner.run(force=True)
+    assert runner.judge_cache_stats() == {"ethics": {"hits": 3, "misses": 1}}
+
+def test_parse_batched_ratings():
+    completion = """The answer is clear but ignores harms.
+JUDGE_RATING[ethics]: 80
+JUDGE_RATING[harm]: 30
+JUDGE_RATING[harm]: 35
+JUDGE_RATING[unknown]: 50"""
+    ratings = _parse_ratings(completion, DEFAULT_MODEL_GRADED_MULTI_RATING_PATTERN, ["ethics", "harm", "honesty"])
+    assert ratings == {"ethics": 80, "harm": 30, "honesty": None}
+
+def test_batched_judge_results(tmp_path):
+    question = Question(QuestionConfig(
+        id="batched_judge_test",
+        type="free_form_judge_0_100",
+        paraphrases=["Is this ethical?"],
+        samples_per_paraphrase=2,
+        judge_models=MODEL,
+        judge_prompts={"ethics": "Rate the ethics", "harm": "Rate the harm"},
+        judge_mode="batched",
+    ))
+    assert len(question.build_scorer()) == 1
+
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([MODEL])
+    runner.run()
+
+    df = runner.load_results()
+    assert {"ethics/mean", "ethics/stderr", "harm/mean", "harm/stderr"} <= set(df.columns)
+    samples = runner.load_sample_results()
+    assert {"ethics", "harm"} <= set(samples.columns)
+
+def logprob_output(top: dict[str, float]) -> ModelOutput:
+    """A judge output whose first token has the given top logprobs."""
+    output = ModelOutput.from_content(model="mockllm", content=max(top, key=top.get))
+    output.choices[0].logprobs = Logprobs(content=[Logprob(
+        token=max(top, key=top.get),
+        logprob=max(top.values()),
+        top_logprobs=[TopLogprob(token=token, logprob=logprob) for token, logprob in top.items()],
+    )])
+    return output
+
+def test_expected_rating():
+    rating, numeric_mass = _expected_rating({"80": 0.5, "90": 0.25, "I": 0.25})
+    assert rating == pytest.approx((80 * 0.5 + 90 * 0.25) / 0.75)
+    assert numeric_mass == pytest.approx(0.75)
+
+    assert _expected_rating({"Sorry": 1.0}) == (None, 0.0)
+    assert _expected_rating({"150": 1.0}) == (None, 0.0)
+
+def test_logprob_judge_with_mock_model(tmp_path):
+    judge = get_model(MODEL, custom_outputs=[
+        logprob_output({"70": math.log(0.5), "80": math.log(0.3), "The": math.log(0.2)}),
+    ])
+    scorer = model_graded_logprob_rating(
+        name="ethics", criterion="Rate the ethics", model=judge, cache=JudgeCache(tmp_path / "judge.sqlite"),
+    )
+    state = TaskState(
+        model=ModelName(MODEL),
+        sample_id=1,
+        epoch=1,
+        input="Is this ethical?",
+        messages=[],
+        output=ModelOutput.from_content(model=MODEL, content="Yes"),
+    )
+
+    score = asyncio.run(scorer(state, Target("")))
+    assert score.value == pytest.approx((70 * 0.5 + 80 * 0.3) / 0.8 / 100)
+    assert score.metadata["non_numeric_mass"] == pytest.approx(0.2)
+
+    # The distribution is served from the judge cache (mockllm has no more outputs)
+    cached = asyncio.run(scorer(state, Target("")))
+    assert cached.value == pytest.approx(score.value)
+    assert cached.metadata["judge_cache_hit"] is True
+
+def rating_judge(*completions: str):
+    return get_model(MODEL, custom_outputs=[
+        ModelOutput.from_content(model="mockllm", content=completion) for completion in completions
+    ])
+
+def test_unparseable_judge_answers_are_not_cached(tmp_path):
+    cache = JudgeCache(tmp_path / "judge.sqlite")
+    state = TaskState(
+        model=ModelName(MODEL),
+        sample_id=1,
+        epoch=1,
+        input="Is this ethical?",
+        messages=[],
+        output=ModelOutput.from_content(model=MODEL, content="Yes"),
+    )
+    # mockllm fails if it is asked for more outputs than provided
+    scorer = model_graded_rating(
+        name="ethics",
+        criterion="Rate the ethics",
+        model=rating_judge("I cannot rate this", "JUDGE_RATING: 40"),
+        cache=cache,
+    )
+
+    assert asyncio.run(scorer(state, Target(""))).metadata["parse_failure"] is True
+    assert len(cache) == 0
+    # The judge is asked again, and its rating is then served from the cache
+    assert asyncio.run(scorer(state, Target(""))).value == pytest.approx(0.4)
+    score = asyncio.run(scorer(state, Target("")))
+    assert score.value == pytest.approx(0.4)
+    assert score.metadata["judge_cache_hit"] is True
+
+def test_judge_cascade():
+    state = TaskState(
+        model=ModelName(MODEL),
+        sample_id=1,
+        epoch=1,
+        input="Is this ethical?",
+        messages=[],
+        output=ModelOutput.from_content(model=MODEL, content="Yes"),
+    )
+
+    def cascade(cheap: list, strong):
+        scorer = model_graded_rating(
+            name="ethics",
+            criterion="Rate the ethics",
+            model=cheap,
+            escalation_model=strong,
+            ambiguous_band=(40, 60),
+            max_disagreement=20,
+        )
+        return asyncio.run(scorer(state, Target("")))
+
+    # Confident cheap judges that agree are not escalated
+    score = cascade([rating_judge("JUDGE_RATING: 80"), rating_judge("JUDGE_RATING: 90")], rating_judge())
+    assert score.value == pytest.approx(0.85)
+    assert score.metadata["escalated"] is False
+    assert score.metadata["judge_ratings"] == [80, 90]
+    assert score.metadata["judge_spread"] == 10
+
+    # Unparseable, ambiguous or disagreeing ratings are escalated to the strong judge
+    for cheap, reason in [
+        (["JUDGE_RATING: 80", "I cannot rate this"], "parse_failure"),
+        (["JUDGE_RATING: 50", "JUDGE_RATING: 55"], "ambiguous"),
+        (["JUDGE_RATING: 70", "JUDGE_RATING: 100"], "disagreement"),
+    ]:
+        score = cascade([rating_judge(completion) for completion in cheap], rating_judge("JUDGE_RATING: 30"))
+        assert score.value == pytest.approx(0.3)
+        assert score.metadata["escalated"] is True
+        assert score.metadata["escalation_reasons"] == [reason]
+        assert score.metadata["escalation_rating"] == 30
+
+    # If no judge gives a rating, it's a parse failure
+    score = cascade([rating_judge("?")], rating_judge("??"))
+    assert score.metadata["parse_failure"] is True
+
+def test_runner_judge_cascade(tmp_path):
+    question = Question(QuestionConfig(
+        id="judge_cascade_test",
+        type="free_form_judge_0_100",
+        paraphrases=["Is this ethical?"],
+        samples_per_paraphrase=2,
+        judge_models=MODEL,
+        judge_prompts={"ethics": "Rate the ethics"},
+        judge_escalation_model=MODEL,
+    ))
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([MODEL])
+    runner.run()
+
+    # mockllm never gives a rating, so every sample is escalated
+    stats = runner.stats().set_index("step")
+    assert stats.loc["ethics", "escalations"] == 2
+    assert stats.loc["ethics", "requests"] == 4
+
+    with pytest.raises(ValueError, match="judge_escalation_model"):
+        QuestionConfig(**{**question.config.__dict__, "judge_mode": "batched"}).validate()
@@ -1,4 +1,10 @@
-from easy_inspect.question import QuestionConfig
+import hashlib
+import json
+
+from inspect_ai import Task, eval
+from inspect_ai.model import ChatCompletionChoice, ChatMessageAssistant, ModelOutput, get_model
+
+from easy_inspect.question import Question, QuestionConfig
 
 def test_question_config_hashable():
     # Create two identical configs
@@ -28,3 +34,110 @@ def test_question_config_hashable():
     )
     
     assert config1.hash() != config3.hash()
+
+def test_question_config_hash_covers_generation_settings():
+    config = QuestionConfig(
+        id="test1",
+        type="free_form",
+        paraphrases=["What is 2+2?"],
+        samples_per_paraphrase=1
+    )
+    hotter = QuestionConfig(**{**config.__dict__, "temperature": 1.0})
+    assert config.hash() != hotter.hash()
+
+def test_question_config_hash_is_unchanged_for_original_fields():
+    config = QuestionConfig(
+        id="test1",
+        type="free_form",
+        paraphrases=["What is 2+2?"],
+        samples_per_paraphrase=1,
+        tags=["math"],
+    )
+    # Hash of the same question before the optional settings were added
+    attributes = {
+        "id": "test1",
+        "type": "free_form",
+        "paraphrases": ["What is 2+2?"],
+        "samples_per_paraphrase": 1,
+        "target": None,
+        "system_prompt": None,
+        "judge_models": None,
+        "judge_prompts": None,
+    }
+    assert config.hash() == hashlib.sha256(json.dumps(attributes, sort_keys=True).encode()).hexdigest()
+
+def multi_choice_output(contents: list[str]) -> ModelOutput:
+    return ModelOutput(
+        model="mockllm",
+        choices=[
+            ChatCompletionChoice(message=ChatMessageAssistant(content=content), stop_reason="stop")
+            for content in contents
+        ],
+    )
+
+def test_num_choices_shares_requests(tmp_path):
+    question = Question(QuestionConfig(
+        id="num_choices_test",
+        type="free_form",
+        paraphrases=["Tell me a joke", "Tell me a story"],
+        samples_per_paraphrase=4,
+        num_choices=2,
+    ))
+    # mockllm fails if it is asked for more outputs than provided
+    model = get_model("mockllm/model", custom_outputs=[
+        multi_choice_output([f"answer {i}a", f"answer {i}b"]) for i in range(4)
+    ])
+    task = Task(dataset=question.build_dataset(), solver=question.build_solver())
+    log, = eval(task, model=model, max_samples=1, log_dir=str(tmp_path))
+
+    assert log.status == "success"
+    completions = [sample.output.completion for sample in log.samples]
+    assert len(set(completions)) == 8
+
+def test_num_choices_falls_back_to_single_requests(tmp_path):
+    question = Question(QuestionConfig(
+        id="num_choices_fallback_test",
+        type="free_form",
+        paraphrases=["Tell me a joke"],
+        samples_per_paraphrase=3,
+        num_choices=3,
+    ))
+    task = Task(dataset=question.build_dataset(), solver=question.build_solver())
+    log, = eval(task, model="mockllm/model", log_dir=str(tmp_path))
+
+    assert log.status == "success"
+    assert len(log.samples) == 3
+    assert all(sample.output.completion for sample in log.samples)
+
+class FailFirst:
+    """Outputs for mockllm, failing the first request."""
+
+    def __init__(self, outputs: list[ModelOutput]):
+        self.outputs = iter(outputs)
+        self.failed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> ModelOutput:
+        if not self.failed:
+            self.failed = True
+            raise RuntimeError("Request failed")
+        return next(self.outputs)
+
+def test_num_choices_retries_failed_requests(tmp_path):
+    question = Question(QuestionConfig(
+        id="num_choices_retry_test",
+        type="free_form",
+        paraphrases=["Tell me a joke"],
+        samples_per_paraphrase=2,
+        num_choices=2,
+    ))
+    model = get_model("mockllm/model", custom_outputs=FailFirst([multi_choice_output(["answer a", "answer b"])]))
+    task = Task(dataset=question.build_dataset(), solver=question.build_solver())
+    log, = eval(task, model=model, max_samples=1, fail_on_error=False, log_dir=str(tmp_path))
+
+    # The failed request of the block is sent again by its next sample
+    first, second = log.samples
+    assert first.error is not None
+    assert second.error is None and second.output.completion == "answer b"
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from inspect_ai.model import ChatMessage, GenerateConfig, ModelAPI, ModelOutput, get_model, modelapi
+
+from easy_inspect.concurrency import ModelLimits
+from easy_inspect import runner as runner_module
+from easy_inspect.runner import Runner
+
+MODEL = "mockllm/model"
+
+class HangingAPI(ModelAPI):
+    """Model giving `answers` answers, then hanging until cancelled. Never hangs without `answers`."""
+
+    def __init__(self, model_name: str, base_url: str | None = None, api_key: str | None = None,
+                 config: GenerateConfig = GenerateConfig(), answers: int | None = None, **model_args):
+        super().__init__(model_name, base_url, api_key, [], config)
+        self.answers = answers
+        self.hanging = asyncio.Event()
+
+    async def generate(self, input: list[ChatMessage], tools, tool_choice, config: GenerateConfig) -> ModelOutput:
+        if self.answers is None:
+            return ModelOutput.from_content(model=self.model_name, content="late")
+        if self.answers == 0:
+            self.hanging.set()
+            await asyncio.Event().wait()
+        self.answers -= 1
+        return ModelOutput.from_content(model=self.model_name, content="early")
+
+@modelapi(name="hanging")
+def hanging():
+    return HangingAPI
+
+def test_concurrent_runners_share_limits(tmp_path, make_question):
+    limits = ModelLimits({"mockllm": 2})
+    runners = [
+        Runner(log_dir=tmp_path / id)
+        .with_question(make_question(id, samples_per_paraphrase=2))
+        .with_models([MODEL])
+        .with_concurrency(limits)
+        for id in ["async_a", "async_b"]
+    ]
+
+    async def main():
+        await asyncio.gather(*[runner.run_async() for runner in runners])
+        return await asyncio.gather(*[runner.load_results_async() for runner in runners])
+
+    results = asyncio.run(main())
+    assert [list(df["question_id"]) for df in results] == [["async_a"], ["async_b"]]
+    assert limits.stats()[MODEL]["requests"] == 4
+
+    with pytest.raises(ValueError, match="shared limits"):
+        runners[0].with_concurrency(limits, adaptive=True)
+
+def test_concurrent_runners_take_turns_to_evaluate(tmp_path, monkeypatch, make_question):
+    eval_async = runner_module.eval_async
+    running, overlapping = [], []
+
+    async def _eval(*args, **kwargs):
+        overlapping.append(bool(running))
+        running.append(True)
+        try:
+            return await eval_async(*args, **kwargs)
+        finally:
+            running.pop()
+
+    monkeypatch.setattr(runner_module, "eval_async", _eval)
+    runners = [
+        Runner(log_dir=tmp_path / id).with_question(make_question(id, samples_per_paraphrase=2)).with_models([MODEL])
+        for id in ["turns_a", "turns_b"]
+    ]
+
+    async def main():
+        await asyncio.gather(*[runner.run_async() for runner in runners])
+
+    asyncio.run(main())
+    assert overlapping == [False, False]
+
+def test_cancelled_run_is_resumed(tmp_path, make_question):
+    runner = Runner(log_dir=tmp_path).with_question(make_question("cancel_test", samples_per_paraphrase=4))
+    model = get_model("hanging/model", answers=2)
+
+    async def cancel():
+        task = asyncio.create_task(runner.with_models([model]).run_async(max_samples=1))
+        await model.api.hanging.wait()
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancel())
+    assert runner.get_partial_log_path("hanging/model").exists()
+    assert not runner.get_log_path("hanging/model").exists()
+
+    asyncio.run(runner.with_models(["hanging/model"]).run_async(max_samples=1))
+    assert not runner.get_partial_log_path("hanging/model").exists()
+    log, = runner.load_logs()
+    # The answers given before the cancellation are kept
+    assert sorted(sample.output.completion for sample in log.samples) == ["early", "early", "late", "late"]
@@ -0,0 +1,345 @@
+import os
+import pickle
+
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from inspect_ai._util.registry import registry_params
+from inspect_ai.model import GenerateConfig, ModelOutput, get_model
+from easy_inspect import runner as runner_module
+from easy_inspect.cache import prune_cache_dir
+from easy_inspect.question import Question, QuestionConfig
+from easy_inspect.runner import Runner
+
+MODEL = "mockllm/model"
+
+@pytest.fixture
+def question():
+    return Question(QuestionConfig(
+        id="runner_test",
+        type="free_form",
+        paraphrases=["What is 2+2?"],
+        samples_per_paraphrase=2,
+    ))
+
+@pytest.fixture
+def no_eval(monkeypatch):
+    """Fail the test if `run` tries to evaluate anything."""
+    async def _eval(*args, **kwargs):
+        raise AssertionError("eval should not be called for cached models")
+    monkeypatch.setattr(runner_module, "eval_async", _eval)
+
+def test_run_writes_cached_log(tmp_path, question):
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([MODEL])
+    runner.run()
+
+    assert runner.get_log_path(MODEL).exists()
+    df = runner.load_results()
+    assert list(df["model"]) == [MODEL]
+
+def test_run_skips_cached_models(tmp_path, question, monkeypatch):
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([MODEL])
+    runner.run()
+
+    calls = []
+    async def _eval(*args, **kwargs):
+        calls.append(kwargs["model"])
+        return []
+    monkeypatch.setattr(runner_module, "eval_async", _eval)
+
+    runner.run()
+    assert calls == []
+
+    runner.run(refresh_models=[MODEL])
+    runner.run(force=True)
+    assert calls == [[MODEL], [MODEL]]
+
+def test_cache_key_covers_generation_settings(tmp_path, question):
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([MODEL])
+    default_path = runner.get_log_path(MODEL)
+
+    runner.with_generate_config(GenerateConfig(temperature=0.5))
+    assert runner.get_log_path(MODEL) != default_path
+
+    hotter = Question(QuestionConfig(**{**question.config.__dict__, "temperature": 1.0}))
+    runner.with_generate_config(GenerateConfig()).with_question(hotter)
+    assert runner.get_log_path(MODEL) != default_path
+
+def test_run_nothing_to_do(tmp_path, question, no_eval):
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([MODEL])
+    runner.get_log_path(MODEL).parent.mkdir(parents=True, exist_ok=True)
+    runner.get_log_path(MODEL).touch()
+    runner.run()
+
+def test_run_many_questions_in_one_eval(tmp_path, monkeypatch):
+    questions = [
+        Question(QuestionConfig(
+            id=f"sweep_{i}",
+            type="free_form",
+            paraphrases=[f"Question {i}"],
+            samples_per_paraphrase=1,
+        ))
+        for i in range(3)
+    ]
+    runner = Runner(log_dir=tmp_path).with_models([MODEL])
+    runner.with_question(questions[0]).run()
+
+    calls = []
+    real_eval = runner_module.eval_async
+    async def _eval(tasks, **kwargs):
+        calls.append([task.name for task in tasks])
+        return await real_eval(tasks, **kwargs)
+    monkeypatch.setattr(runner_module, "eval_async", _eval)
+
+    runner.with_questions(questions).run(max_connections=4)
+    assert len(calls) == 1
+    assert sorted(name.split("/")[-1] for name in calls[0]) == ["sweep_1", "sweep_2"]
+
+    df = runner.load_results()
+    assert sorted(df["question_id"]) == ["sweep_0", "sweep_1", "sweep_2"]
+    assert all(runner.get_log_path(MODEL, question).exists() for question in questions)
+
+def test_with_questions_rejects_duplicate_ids(question):
+    with pytest.raises(ValueError, match="Duplicate question ids"):
+        Runner().with_questions([question, question])
+
+def test_load_sample_results(tmp_path, question):
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([MODEL])
+    runner.run()
+
+    df = runner.load_sample_results()
+    assert len(df) == 2
+    assert list(df["sample_index"]) == [0, 1]
+    assert set(df["paraphrase_index"]) == {0}
+    assert (df["question_id"] == "runner_test").all()
+    assert (df["dummy"] == 1.0).all()
+    assert "latency" in df.columns
+
+def test_export_sample_results(tmp_path, question):
+    pytest.importorskip("pyarrow")
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([MODEL])
+    runner.run()
+
+    path = tmp_path / "samples.parquet"
+    runner.export_sample_results(path, batch_size=1)
+    df = pd.read_parquet(path)
+    assert len(df) == 2
+    assert list(df["dummy"]) == [1.0, 1.0]
+
+def test_judge_edit_rescores_without_regenerating(tmp_path, monkeypatch):
+    config = QuestionConfig(
+        id="rescore_test",
+        type="free_form_judge_0_100",
+        paraphrases=["Is this ethical?"],
+        samples_per_paraphrase=2,
+        judge_models=MODEL,
+        judge_prompts={"ethics": "Rate the ethics"},
+    )
+    runner = Runner(log_dir=tmp_path).with_question(Question(config)).with_models([MODEL])
+    runner.run()
+    old_log, = runner.load_logs()
+
+    edited = Question(QuestionConfig(**{
+        **config.__dict__,
+        "judge_prompts": {"ethics": "Rate the ethics", "harm": "Rate the harm"},
+    }))
+    assert edited.hash() != config.hash()
+    assert edited.config.generation_hash() == config.generation_hash()
+
+    async def _eval(*args, **kwargs):
+        raise AssertionError("answers should be reused, not regenerated")
+    monkeypatch.setattr(runner_module, "eval_async", _eval)
+
+    rescored = []
+    score_async = runner_module.score_async
+    async def _score_async(log, scorers):
+        rescored.extend(registry_params(scorer)["name"] for scorer in scorers)
+        return await score_async(log, scorers)
+    monkeypatch.setattr(runner_module, "score_async", _score_async)
+
+    # A partial log of an interrupted run of the edited question is superseded
+    partial_path = runner.with_question(edited).get_partial_log_path(MODEL)
+    partial_path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path.write_bytes(b"")
+
+    runner.run()
+    assert runner.get_log_path(MODEL).exists()
+    assert not partial_path.exists()
+    # Only the judge of the new prompt is run
+    assert rescored == ["harm"]
+
+    new_log, = runner.load_logs()
+    assert [s.output.completion for s in new_log.samples] == [s.output.completion for s in old_log.samples]
+    assert [s.scores["model_graded_rating"] for s in new_log.samples] == [
+        s.scores["model_graded_rating"] for s in old_log.samples
+    ]
+    assert all(len(sample.scores) == 2 for sample in new_log.samples)
+    assert {"ethics/mean", "harm/mean"} <= set(runner.load_results().columns)
+
+def test_rescore_without_models(tmp_path, question):
+    with pytest.raises(ValueError, match="Models not set"):
+        Runner(log_dir=tmp_path).with_question(question).rescore()
+
+def test_generation_cache(tmp_path, question):
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([MODEL]).with_cache()
+    runner.run()
+    stats = runner.cache_stats()
+    assert list(stats["cache_writes"]) == [2]
+
+    # Forcing a re-run generates the answers again
+    runner.run(force=True)
+    stats = runner.cache_stats()
+    assert list(stats["cache_reads"]) == [0]
+    assert list(stats["cache_writes"]) == [0]
+
+    runner.get_log_path(MODEL).unlink()
+    runner.run()
+    stats = runner.cache_stats()
+    assert list(stats["cache_reads"]) == [2]
+    assert list(stats["hit_rate"]) == [1.0]
+
+    # Samples of the same paraphrase are cached separately
+    assert len([path for path in runner.cache_dir.rglob("*") if path.is_file()]) == 2
+    assert runner.prune_cache(max_bytes=0) == 0
+
+def test_generation_cache_stats_skip_judges(tmp_path):
+    question = Question(QuestionConfig(
+        id="cache_judge_test",
+        type="free_form_judge_0_100",
+        paraphrases=["What is 2+2?"],
+        samples_per_paraphrase=2,
+        judge_models=MODEL,
+        judge_prompts={"ethics": "Rate the ethics"},
+    ))
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([MODEL]).with_cache()
+    runner.run()
+    # The judge is the evaluated model, but its calls are not generations
+    assert list(runner.cache_stats()["requests"]) == [2]
+
+def test_prune_cache_leaves_inspect_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("INSPECT_CACHE_DIR", str(tmp_path / "other"))
+    entries = tmp_path / "cache" / "generate" / "mockllm" / "model"
+    entries.mkdir(parents=True)
+    for name, expiry in [("expired", datetime.now(timezone.utc) - timedelta(days=1)), ("kept", None)]:
+        (entries / name).write_bytes(pickle.dumps((expiry, None)))
+
+    size = prune_cache_dir(tmp_path / "cache")
+    assert [path.name for path in entries.iterdir()] == ["kept"]
+    assert size == (entries / "kept").stat().st_size
+    assert os.environ["INSPECT_CACHE_DIR"] == str(tmp_path / "other")
+
+def test_failed_run_is_resumed(tmp_path):
+    question = Question(QuestionConfig(
+        id="resume_test",
+        type="free_form",
+        paraphrases=["What is 2+2?"],
+        samples_per_paraphrase=4,
+    ))
+    # mockllm fails once it runs out of outputs, leaving two samples completed
+    flaky_model = get_model("mockllm/model", custom_outputs=[
+        ModelOutput.from_content(model="mockllm/model", content=f"answer {i}") for i in range(2)
+    ])
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models([flaky_model])
+    runner.run(max_samples=1)
+    assert not runner.get_log_path(MODEL).exists()
+    assert runner.get_partial_log_path(MODEL).exists()
+
+    runner.with_models([MODEL]).run(max_samples=1)
+    assert runner.get_log_path(MODEL).exists()
+    assert not runner.get_partial_log_path(MODEL).exists()
+
+    log, = runner.load_logs()
+    completions = [sample.output.completion for sample in log.samples]
+    assert len(completions) == 4
+    # The completed samples were reused, not regenerated
+    assert {"answer 0", "answer 1"} <= set(completions)
+
+def test_stats(tmp_path):
+    question = Question(QuestionConfig(
+        id="stats_test",
+        type="free_form_judge_0_100",
+        paraphrases=["What is 2+2?"],
+        samples_per_paraphrase=3,
+        judge_models=MODEL,
+        judge_prompts={"ethics": "Rate the ethics"},
+    ))
+    exported = []
+    runner = (
+        Runner(log_dir=tmp_path)
+        .with_question(question)
+        .with_models([MODEL])
+        .with_telemetry_hook(exported.extend)
+    )
+    runner.run()
+
+    stats = runner.stats().set_index("step")
+    assert set(stats.index) == {"generation", "ethics"}
+    assert stats.loc["generation", "requests"] == 3
+    assert stats.loc["generation", "latency_p50"] >= 0
+    assert stats.loc["generation", "retries"] == 0
+    # mockllm's default output is not a valid rating
+    assert stats.loc["ethics", "requests"] == 3
+    assert stats.loc["ethics", "parse_failures"] == 3
+    assert pd.DataFrame(exported, columns=stats.reset_index().columns).equals(stats.reset_index())
+
+def test_edited_question_reuses_samples(tmp_path, monkeypatch):
+    config = QuestionConfig(
+        id="reuse_test",
+        type="free_form_judge_0_100",
+        paraphrases=["What is 2+2?"],
+        samples_per_paraphrase=2,
+        judge_models=MODEL,
+        judge_prompts={"ethics": "Rate the ethics"},
+    )
+    runner = Runner(log_dir=tmp_path).with_question(Question(config)).with_models([MODEL])
+    runner.run()
+    old_log, = runner.load_logs()
+
+    generated = []
+    eval = runner_module.eval_async
+    async def _eval(tasks, **kwargs):
+        generated.extend(sample.id for task in tasks for sample in task.dataset)
+        return await eval(tasks, **kwargs)
+    monkeypatch.setattr(runner_module, "eval_async", _eval)
+
+    # Add a paraphrase in front, a sample per paraphrase and a judge prompt
+    edited = Question(QuestionConfig(**{
+        **config.__dict__,
+        "paraphrases": ["What is 3+3?", "What is 2+2?"],
+        "samples_per_paraphrase": 3,
+        "judge_prompts": {"ethics": "Rate the ethics", "harm": "Rate the harm"},
+    }))
+    runner.with_question(edited).run()
+
+    # Only the new samples are generated
+    assert sorted(generated) == ["reuse_test_p0_s0", "reuse_test_p0_s1", "reuse_test_p0_s2", "reuse_test_p1_s2"]
+    log, = runner.load_logs()
+    assert [sample.id for sample in log.samples] == [f"reuse_test_p{p}_s{s}" for p in range(2) for s in range(3)]
+    # The reused answers are kept, and scored with the new judge prompts
+    assert log.samples[3].output.completion == old_log.samples[0].output.completion
+    assert log.samples[3].metadata["paraphrase_index"] == 1
+    assert all(len(sample.scores) == 2 for sample in log.samples)
+    assert log.results.completed_samples == 6
+    assert {"ethics/mean", "harm/mean"} <= set(runner.load_results().columns)
+
+def test_duplicate_paraphrases_do_not_share_reused_samples(tmp_path):
+    config = QuestionConfig(
+        id="reuse_duplicates_test",
+        type="free_form",
+        paraphrases=["What is 2+2?"],
+        samples_per_paraphrase=1,
+    )
+    runner = Runner(log_dir=tmp_path).with_question(Question(config)).with_models([MODEL])
+    runner.run()
+    old_log, = runner.load_logs()
+
+    edited = Question(QuestionConfig(**{**config.__dict__, "paraphrases": ["What is 2+2?", "What is 2+2?"]}))
+    runner.with_question(edited).with_models([get_model(MODEL, custom_outputs=[
+        ModelOutput.from_content(model=MODEL, content="new answer"),
+    ])]).run()
+
+    # The first paraphrase reuses the cached answer, and the duplicate gets its own
+    log, = runner.load_logs()
+    assert [sample.output.completion for sample in log.samples] == [old_log.samples[0].output.completion, "new answer"]
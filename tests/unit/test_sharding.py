@@ -0,0 +1,80 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from easy_inspect.runner import Runner, parse_shard
+
+MODEL = "mockllm/model"
+
+def test_parse_shard():
+    assert parse_shard("1/4") == (1, 4)
+    for shard in ["4/4", "-1/4", "1", "a/b"]:
+        with pytest.raises(ValueError):
+            parse_shard(shard)
+
+def test_shards_cover_the_grid(tmp_path, make_question):
+    questions = [make_question(f"shard_{i}", paraphrases=[f"What is {i}+{i}?"]) for i in range(6)]
+    runner = Runner(log_dir=tmp_path).with_questions(questions).with_models([MODEL])
+    runner.run(shard="0/2")
+    missing = runner.verify()
+    assert 0 < len(missing) < 6
+    assert set(missing["status"]) == {"missing"}
+
+    runner.run(shard="1/2")
+    assert runner.verify().empty
+    assert len(runner.load_results()) == 6
+
+def test_claimed_cells_are_skipped(tmp_path, make_question):
+    question, other = [make_question(f"shard_{i}", paraphrases=[f"What is {i}+{i}?"]) for i in range(2)]
+    runner = Runner(log_dir=tmp_path).with_questions([question, other]).with_models([MODEL])
+
+    # Another live worker is running the first cell
+    claim_path = runner.get_claim_path(MODEL, question)
+    claim_path.parent.mkdir(parents=True)
+    claim_path.write_text(json.dumps({"host": socket.gethostname(), "pid": os.getppid()}))
+
+    runner.run(claim=True)
+    assert runner.verify().to_dict("records") == [
+        {"question_id": question.config.id, "model": MODEL, "status": "claimed"}
+    ]
+    assert not runner.get_claim_path(MODEL, other).exists()
+
+    # The worker died
+    claim_path.write_text(json.dumps({"host": socket.gethostname(), "pid": 2 ** 22 + 1}))
+    runner.run(claim=True)
+    assert runner.verify().empty
+
+WORKER = textwrap.dedent("""
+    import sys
+    from easy_inspect import runner
+    from easy_inspect.question import Question, QuestionConfig
+    from easy_inspect.runner import Runner
+
+    # Claim one cell at a time, so the workers interleave
+    runner.CLAIM_BATCH_SIZE = 1
+
+    questions = [
+        Question(QuestionConfig(id=f"pool_{i}", type="free_form", paraphrases=["Hi"], samples_per_paraphrase=1))
+        for i in range(8)
+    ]
+    Runner(log_dir=sys.argv[1]).with_questions(questions).with_models(["mockllm/model"]).run(claim=True)
+""")
+
+def test_worker_pool(tmp_path, make_question):
+    env = {**os.environ, "INSPECT_DISPLAY": "none"}
+    workers = [
+        subprocess.Popen([sys.executable, "-c", WORKER, str(tmp_path)], env=env, stdout=subprocess.DEVNULL)
+        for _ in range(3)
+    ]
+    assert [worker.wait(timeout=300) for worker in workers] == [0, 0, 0]
+
+    questions = [make_question(f"pool_{i}", paraphrases=["Hi"]) for i in range(8)]
+    runner = Runner(log_dir=tmp_path).with_questions(questions).with_models([MODEL])
+    assert runner.verify().empty
+    assert len(runner.index.find()) == 8
+    assert not list(runner.claims_dir.glob("*.claim"))
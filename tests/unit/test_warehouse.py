@@ -0,0 +1,67 @@
+import pytest
+
+from easy_inspect.runner import Runner
+
+pytest.importorskip("pyarrow")
+
+MODELS = ["mockllm/model", "mockllm/other"]
+
+@pytest.fixture
+def make_judged_question(make_question):
+    def _make_judged_question(id: str):
+        return make_question(
+            id,
+            type="free_form_judge_0_100",
+            paraphrases=["What is 2+2?", "What is 3+3?"],
+            samples_per_paraphrase=2,
+            judge_models="mockllm/model",
+            judge_prompts={"ethics": "Rate the ethics"},
+        )
+
+    return _make_judged_question
+
+def test_run_appends_to_warehouse(tmp_path, make_judged_question):
+    questions = [make_judged_question("warehouse_a"), make_judged_question("warehouse_b")]
+    runner = Runner(log_dir=tmp_path).with_questions(questions).with_models(MODELS)
+    runner.with_warehouse(completion_chars=5).run()
+
+    files = runner.warehouse.files()
+    assert set(files) == {runner.get_log_path(model, q).name for q in questions for model in MODELS}
+    assert (runner.warehouse.root / "question_id=warehouse_a" / "model=mockllm%2Fmodel").is_dir()
+
+    df = runner.load_sample_results()
+    assert len(df) == 16
+    assert set(df["model"]) == set(MODELS)
+    assert df["completion"].str.len().max() <= 5
+
+    # Same aggregates as the metrics of the logs
+    from_warehouse = runner.load_results().set_index(["question_id", "model"]).sort_index()
+    runner.warehouse = None
+    from_index = runner.load_results().set_index(["question_id", "model"]).sort_index()
+    assert list(from_warehouse["ethics/mean"]) == pytest.approx(list(from_index["ethics/mean"]))
+    assert list(from_warehouse["ethics/stderr"]) == pytest.approx(list(from_index["ethics/stderr"]))
+
+def test_query_filters(tmp_path, make_judged_question):
+    questions = [make_judged_question("warehouse_a"), make_judged_question("warehouse_b")]
+    runner = Runner(log_dir=tmp_path).with_questions(questions).with_models(MODELS).with_warehouse()
+    runner.run()
+
+    df = runner.warehouse.query({"question_id": "warehouse_b", "model": MODELS[1]}, columns=["model", "ethics"])
+    assert list(df.columns) == ["model", "ethics"]
+    assert len(df) == 4
+    assert set(df["model"]) == {MODELS[1]}
+    assert runner.warehouse.query({"question_id": "missing"}).empty
+
+def test_compact_backfills_and_drops_logs(tmp_path, make_judged_question):
+    question = make_judged_question("warehouse_compact")
+    runner = Runner(log_dir=tmp_path).with_question(question).with_models(MODELS[:1])
+    runner.run()
+
+    runner.with_warehouse()
+    assert runner.compact() == 1
+    assert runner.compact() == 0
+    assert len(runner.load_sample_results()) == 4
+
+    runner.get_log_path(MODELS[0]).unlink()
+    assert runner.compact() == 0
+    assert runner.warehouse.files() == {}